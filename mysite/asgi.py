@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
+# settings.py بيشيل WhiteNoise (sync بس) تحت ASGI عشان الطلبات متتنقلش لـ thread؛
+# الاستاتيك (بعد collectstatic) بيتخدم من الـ reverse proxy
+os.environ.setdefault('DJANGO_ASGI', '1')
 
 application = get_asgi_application()
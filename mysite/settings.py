@@ -40,14 +40,21 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware', # لازم تكون في الأول
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # لو عايز دجانجو يخدم الاستاتيك (اختياري)
+    'realestate.instrumentation.RequestInstrumentationMiddleware', # Server-Timing + log (عينة من الطلبات)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'realestate.replicas.ReplicaRoutingMiddleware', # read replica + read-your-writes cookie
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# تحت ASGI (mysite/asgi.py) WhiteNoise بيجبر كل request يستنى في thread لأنه sync بس؛
+# الاستاتيك هناك بيتخدم من الـ reverse proxy من STATIC_ROOT (بعد collectstatic)
+if os.environ.get('DJANGO_ASGI') == '1':
+    MIDDLEWARE.remove('whitenoise.middleware.WhiteNoiseMiddleware')
+
 ROOT_URLCONF = 'mysite.urls'
 
 TEMPLATES = [
@@ -68,13 +75,159 @@ TEMPLATES = [
 WSGI_APPLICATION = 'mysite.wsgi.application'
 
 # Database
+# mysite/sqlite_backend: WAL + busy timeout + BEGIN IMMEDIATE (شوف الـ docstring هناك).
+# الاتصالات بتفضل مفتوحة CONN_MAX_AGE ثانية بدل اتصال جديد لكل request.
+# DB_WRITE_LOCK=1 بيخلي الـ threads جوه الـ worker الواحد تكتب واحد ورا التاني.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'mysite.sqlite_backend',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'write_lock': os.environ.get('DB_WRITE_LOCK', '') == '1',
+        },
     }
 }
 
+# Read replica للـ public API (realestate/replicas.py): القراءة من Public*ViewSet بتروح للـ replica،
+# وكل الكتابة والـ admin على الـ primary. محلياً: DB_REPLICA_NAME=replica.sqlite3 و manage.py sync_replica.
+if os.environ.get('DB_REPLICA_NAME'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': BASE_DIR / os.environ['DB_REPLICA_NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['realestate.replicas.ReplicaRouter']
+DATABASE_REPLICA = {
+    'ALIAS': 'replica',
+    'STICKY_SECONDS': int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 10)),
+    'MAX_LAG_SECONDS': int(os.environ.get('DB_REPLICA_MAX_LAG_SECONDS', 10)),
+}
+
+# Cache
+# الـ public API بيتخزن في 'public_api' وبيتلغي أوتوماتيك من الـ signals (realestate/signals.py).
+# FileBasedCache بيتشارك بين كل الـ gunicorn workers على نفس السيرفر؛
+# لأكتر من سيرفر استخدم backend مشترك (مثلاً django.core.cache.backends.redis.RedisCache)،
+# ولـ worker واحد ينفع LocMemCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'public_api': {
+        'BACKEND': os.environ.get('PUBLIC_API_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('PUBLIC_API_CACHE_LOCATION', str(BASE_DIR / 'cache' / 'public_api')),
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+PUBLIC_API_CACHE_ALIAS = 'public_api'
+
+# ترشيحات "مشاريع مشابهة" (realestate/related.py)
+RELATED_COMPOUNDS = {
+    'LIMIT': 5,
+    'PRICE_RANGE': 0.2,             # +-20% من السعر المبدئي
+    'DELIVERY_WINDOW_DAYS': 730,    # فرق الاستلام اللي بعده النقاط = صفر
+    'WEIGHTS': {
+        'location': 5.0,
+        'price': 3.0,
+        'developer': 2.0,
+        'delivery': 1.0,
+    },
+}
+
+# نسخ مصغرة WebP/JPEG من الصور المرفوعة (realestate/images.py)
+IMAGE_DERIVATIVES = {
+    'WIDTHS': [320, 640, 1024, 1600],
+    'FORMATS': {'webp': 80, 'jpeg': 82},    # format -> quality
+    'DIRECTORY': 'derivatives',
+    'WORKERS': int(os.environ.get('IMAGE_DERIVATIVE_WORKERS', 2)),
+}
+
+# شرايح السعر في /facets/ (realestate/facets.py): أقل من 2 مليون، 2-5، 5-10، 10-20، أكتر من 20
+FACETS = {
+    'PRICE_BUCKETS': [2_000_000, 5_000_000, 10_000_000, 20_000_000],
+}
+
+# بحث الخريطة (realestate/geo.py): clusters تحت CLUSTER_BELOW_ZOOM، و near me بالكيلومتر
+GEO = {
+    'CLUSTER_BELOW_ZOOM': 14,
+    'MAX_MARKERS': 500,
+    'NEARBY_RADIUS_KM': 10,
+    'MAX_RADIUS_KM': 100,
+}
+
+# قياس الطلبات (realestate/instrumentation.py): عدد الـ queries ووقتها والمتكرر منها ووقت الـ serializers،
+# في header اسمه Server-Timing وسطر JSON في الـ log. بيتقاس SAMPLE_RATE من الطلبات بس.
+# وقت الـ serializers بيتقاس للـ public viewsets (SerializerTimingMixin) و PropertyListFastSerializer
+# والـ homepage وصفحات page/ بس؛ مفيش patch عام على BaseSerializer
+INSTRUMENTATION = {
+    'SAMPLE_RATE': 1.0 if DEBUG else 0.05,
+    'SERVER_TIMING': True,
+    'LOG': True,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'realestate.instrumentation': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# شرايح الـ sliders (realestate/histograms.py): عدد الشرايح وعرض الشريحة.
+# بعد أي تغيير هنا: manage.py rebuild_histograms
+HISTOGRAMS = {
+    'BUCKETS': 60,
+    'STEPS': {'price': 500_000, 'area': 10},
+}
+
+# الصفحة الرئيسية (realestate/homepage.py): عدد العناصر في كل قسم
+HOMEPAGE = {
+    'FEATURED_COMPOUNDS': 8,
+    'NEW_LAUNCHES': 8,
+    'DEVELOPERS': 12,
+    'PARTNERS': 20,
+    'TESTIMONIALS': 10,
+    'BLOG_POSTS': 3,
+}
+
+# فورم التواصل (realestate/contact_queue.py): الطلب بيدخل طابور SQLite منفصل ويرجع 202،
+# و manage.py process_contact_queue بيحفظ ويبعت الإيميل. CONTACT_NOTIFY_EMAILS مفصولة بفاصلة.
+CONTACT_QUEUE = {
+    'PATH': os.environ.get('CONTACT_QUEUE_PATH', str(BASE_DIR / 'queue' / 'contact.sqlite3')),
+    'BATCH_SIZE': 500,
+    'GROUP_COMMIT_WAIT': 0.1,
+    'NOTIFY_EMAILS': [email.strip() for email in os.environ.get('CONTACT_NOTIFY_EMAILS', '').split(',') if email.strip()],
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 60,
+}
+
+# Email (SMTP). محلياً: python -m aiosmtpd -n -l localhost:1025 و EMAIL_PORT=1025
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@fourseasons.local')
+
+# Throttling للـ public API (realestate/throttling.py): token bucket في ملف mmap مشترك بين الـ workers.
+# rate = معدل إعادة الملء، burst = أقصى عدد requests ورا بعض
+THROTTLE = {
+    'SLOTS': 65536,
+    'SCOPES': {
+        'public': {'rate': '600/min', 'burst': 120},
+        'search': {'rate': '60/min', 'burst': 20},
+        'contact': {'rate': '5/min', 'burst': 5},
+    },
+}
+if os.environ.get('THROTTLE_PATH'):
+    THROTTLE['PATH'] = os.environ['THROTTLE_PATH']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     { 'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator', },
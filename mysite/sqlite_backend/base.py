@@ -0,0 +1,100 @@
+"""
+SQLite backend with a production profile (``ENGINE: 'mysite.sqlite_backend'``).
+
+Same as ``django.db.backends.sqlite3`` plus:
+
+* a pragma profile applied to every new connection (``DEFAULT_PRAGMAS``,
+  overridable with ``OPTIONS['pragmas']``): WAL so readers never wait for
+  the writer, ``synchronous=NORMAL`` (safe with WAL), a busy timeout instead
+  of failing straight away with "database is locked", a bigger page cache
+  and memory-mapped reads,
+* ``BEGIN IMMEDIATE`` for ``atomic()`` blocks (unless
+  ``OPTIONS['transaction_mode']`` says otherwise). A deferred transaction
+  that reads and then writes cannot wait for the write lock - SQLite fails
+  it at once, busy timeout or not - while an immediate one takes the lock
+  up front and queues behind the current writer,
+* ``OPTIONS['write_lock']``: an optional in-process lock per database file
+  so the threads of one worker run their write transactions one at a time
+  instead of all polling SQLite's busy handler. Other processes are still
+  serialized by SQLite itself (with the busy timeout).
+
+Connections are meant to be persistent (``CONN_MAX_AGE`` in settings) so the
+profile and the page cache are set up once per thread, not per request.
+"""
+import threading
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,               # ms
+    'cache_size': -20000,               # negative = KiB, i.e. ~20 MB per connection
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+OPTIONS = ('pragmas', 'write_lock')     # ours, not sqlite3.connect() arguments
+
+_write_locks = {}
+_write_locks_guard = threading.Lock()
+
+
+def get_write_lock(name):
+    with _write_locks_guard:
+        return _write_locks.setdefault(str(name), threading.Lock())
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    holds_write_lock = False
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        options = {name: kwargs.pop(name, None) for name in OPTIONS}
+        self.pragmas = {**DEFAULT_PRAGMAS, **(options['pragmas'] or {})}
+        self.write_lock = get_write_lock(self.settings_dict['NAME']) if options['write_lock'] else None
+        if 'transaction_mode' not in self.settings_dict['OPTIONS']:
+            self.transaction_mode = 'IMMEDIATE'
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    # ---------- single writer ----------
+    def _start_transaction_under_autocommit(self):
+        if self.write_lock is not None and not self.holds_write_lock:
+            # نفس مهلة SQLite: بعدها نفس الخطأ اللي كان هيطلع من غير القفل
+            if not self.write_lock.acquire(timeout=int(self.pragmas['busy_timeout']) / 1000):
+                raise OperationalError('database is locked (timed out waiting for the write lock)')
+            self.holds_write_lock = True
+        try:
+            super()._start_transaction_under_autocommit()
+        except BaseException:
+            self.release_write_lock()
+            raise
+
+    def release_write_lock(self):
+        if self.holds_write_lock:
+            self.holds_write_lock = False
+            self.write_lock.release()
+
+    def _commit(self):
+        try:
+            return super()._commit()
+        finally:
+            self.release_write_lock()
+
+    def _rollback(self):
+        try:
+            return super()._rollback()
+        finally:
+            self.release_write_lock()
+
+    def _close(self):
+        try:
+            return super()._close()
+        finally:
+            self.release_write_lock()
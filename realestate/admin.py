@@ -42,7 +42,7 @@ class CompoundAdmin(admin.ModelAdmin):
     inlines = [CompoundImageInline]
 
     # القوائم التي تظهر في الجدول الخارجي
-    list_display = ('name', 'developer', 'location', 'min_price', 'min_area', 'delivery_date', 'status', 'is_featured')
+    list_display = ('name', 'developer', 'location', 'min_price', 'min_area', 'delivery_date', 'status', 'is_featured', 'updated_at')
     
     # خيارات الفلترة والبحث
     list_filter = ('developer', 'location', 'status', 'is_featured')
@@ -60,6 +60,9 @@ class CompoundAdmin(admin.ModelAdmin):
         ('Media & Details', {
             'fields': ('main_image', 'video_url', 'description', 'amenities')
         }),
+        ('Map', {
+            'fields': ('latitude', 'longitude')
+        }),
     )
     
     # لتسهيل اختيار الـ Amenities الكثيرة
@@ -70,7 +73,7 @@ class CompoundAdmin(admin.ModelAdmin):
 class PropertyAdmin(admin.ModelAdmin):
     inlines = [PropertyImageInline]
     
-    list_display = ('title', 'compound', 'price', 'property_type', 'is_featured')
+    list_display = ('title', 'compound', 'price', 'property_type', 'is_featured', 'updated_at')
     list_filter = ('property_type', 'is_featured', 'is_new_launch', 'compound', 'location')
     search_fields = ('title', 'compound__name', 'location__name')
     prepopulated_fields = {'slug': ('title',)}
@@ -99,6 +102,7 @@ class TestimonialAdmin(admin.ModelAdmin):
 
 @admin.register(ContactFormSubmission)
 class ContactFormSubmissionAdmin(admin.ModelAdmin):
-    list_display = ('name', 'email', 'phone', 'submitted_at')
-    readonly_fields = ('name', 'email', 'phone', 'message', 'submitted_at')
-    list_filter = ('submitted_at',)
\ No newline at end of file
+    list_display = ('name', 'email', 'phone', 'submitted_at', 'notification_status')
+    readonly_fields = ('name', 'email', 'phone', 'message', 'submitted_at', 'reference', 'notification_status',
+                       'notification_attempts', 'notification_error', 'notify_after', 'notified_at')
+    list_filter = ('submitted_at', 'notification_status')
\ No newline at end of file
@@ -0,0 +1,124 @@
+"""
+Async detail pages for ASGI deployments:
+
+* ``GET /api/public/compounds/<id>/page/`` -> ``{"compound": ..., "related": [...]}``
+* ``GET /api/public/properties/<id>/page/`` -> ``{"property": ..., "similar": [...]}``
+
+A detail screen needs the object (with its developer, location, amenities
+and gallery) plus a list of cards next to it. With the sync endpoints that
+is two requests and their queries run one after the other. Here both
+lookups start together: each one is a plain sync function (ORM +
+serializer, same output as ``/<id>/`` and ``/<id>/related/``) run with
+``sync_to_async(thread_sensitive=False)``, i.e. in its own executor thread
+with its own connection, and SQLite in WAL mode serves them in parallel.
+Django's ORM has no native async driver for SQLite - its ``a*`` methods do
+the same thread hop per query - so this is the async ORM path with the
+independent lookups overlapped instead of awaited in turn.
+
+Everything else stays on the event loop: the response cache (same versions,
+key and ETag scheme as ``CachedResponseMixin``, so 304s and hits never
+leave it - only a version stamp missing from the cache is read from the
+database in a thread), the ``public`` throttle and the replica choice.
+Under WSGI the views still work (Django runs them in an event loop per
+request).
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.db.models import Subquery
+from django.http import HttpResponse, QueryDict
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+from rest_framework.throttling import BaseThrottle
+
+from .cache import ResponseCache, get_versions
+from .fieldsets import restrict_queryset, select_fields
+from .instrumentation import timed_serializer
+from .models import Amenity, Compound, CompoundImage, Developer, Location, Property, PropertyImage, RelatedCompound
+from .replicas import read_from_replica
+from .serializers import CompoundSerializer, PropertyListFastSerializer, PropertySerializer
+from .throttling import take
+from .views import CompoundViewSet, PropertyViewSet
+
+SIMILAR_LIMIT = 6
+
+
+def in_thread(func):
+    """Run a sync lookup in its own executor thread, so several can run at once."""
+    def run(*args):
+        close_old_connections()     # CONN_MAX_AGE: اتصالات الـ threads دي مش بتتقفل مع الـ request
+        return func(*args)
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def json_response(data, status=200, headers=None):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json', headers=headers)
+
+
+# ---------- lookups (sync, one thread each) ----------
+def compound_detail(pk, request):
+    compound = CompoundViewSet.queryset.filter(pk=pk).first()
+    return None if compound is None else timed_serializer(CompoundSerializer(compound, context={'request': request})).data
+
+
+def compound_related(pk, request):
+    # نفس /related/: كروت بترتيب RelatedCompound
+    selection = select_fields(CompoundSerializer, QueryDict(), card=True)
+    related = (restrict_queryset(CompoundViewSet.queryset, CompoundSerializer, selection)
+               .filter(linked_from__compound_id=pk).order_by('linked_from__rank'))
+    return timed_serializer(CompoundSerializer(related, many=True, context={'request': request, 'field_selection': selection})).data
+
+
+def property_detail(pk, request):
+    unit = PropertyViewSet.queryset.filter(pk=pk).first()
+    return None if unit is None else timed_serializer(PropertySerializer(unit, context={'request': request})).data
+
+
+def property_similar(pk, request):
+    # باقي وحدات نفس الكمبوند؛ الكمبوند من subquery عشان منستناش الـ lookup التاني
+    selection = select_fields(PropertySerializer, QueryDict(), card=True)
+    compound_id = Property.objects.filter(pk=pk).values('compound_id')
+    rows = (Property.objects.filter(compound_id=Subquery(compound_id)).exclude(pk=pk).order_by('price', 'id')
+            .values(*PropertyListFastSerializer.columns_for(selection))[:SIMILAR_LIMIT])
+    return PropertyListFastSerializer(rows, context={'request': request, 'field_selection': selection}).data
+
+
+# ---------- views ----------
+class AsyncPageView(ResponseCache, View):
+    """Cached, throttled async GET that gathers ``lookups`` concurrently."""
+    http_method_names = ['get', 'head', 'options']
+    lookups = {}                # response key -> sync lookup(pk, request); the first one is the object
+
+    async def get(self, request, pk):
+        versions = get_versions(self.get_cache_models(), cached_only=True)
+        if versions is None:
+            # cache بارد: النسخ من الداتابيز، بره الـ event loop
+            versions = await in_thread(get_versions)(self.get_cache_models())
+        response, key, validators = self.lookup_cache(request, versions)
+        if response is not None:
+            return response
+
+        allowed, wait = take('public', f'ip:{BaseThrottle().get_ident(request)}')
+        if not allowed:
+            return json_response(
+                {'detail': f'Request was throttled. Expected available in {int(wait) + 1} seconds.'},
+                status=429, headers={'Retry-After': str(int(wait) + 1)},
+            )
+
+        read_from_replica(request, self.cache_versions)
+        results = await asyncio.gather(*(in_thread(lookup)(pk, request) for lookup in self.lookups.values()))
+        data = dict(zip(self.lookups, results))
+        if data[next(iter(self.lookups))] is None:
+            return json_response({'detail': 'Not found.'}, status=404)
+        return self.store_response(json_response(data), key, validators)
+
+
+class CompoundPageView(AsyncPageView):
+    cache_models = (Compound, Developer, Location, Amenity, CompoundImage, RelatedCompound)
+    lookups = {'compound': compound_detail, 'related': compound_related}
+
+
+class PropertyPageView(AsyncPageView):
+    cache_models = (Property, Compound, Developer, Location, Amenity, PropertyImage)
+    lookups = {'property': property_detail, 'similar': property_similar}
@@ -0,0 +1,145 @@
+"""
+Batched upserts for imports (scrape_* commands, import scripts).
+
+``get_or_create`` per scraped item costs one or two queries and a
+transaction per row. ``BatchUpserter`` instead collects model instances,
+dedupes them on a natural key (a unique field such as ``slug`` or ``name``)
+and writes each batch with one ``bulk_create`` inside one transaction:
+
+* ``update_fields=None``: existing rows are left alone (``get_or_create``
+  semantics, ``INSERT ... ON CONFLICT DO NOTHING``),
+* ``update_fields=[...]``: existing rows get those columns overwritten
+  (``ON CONFLICT (key) DO UPDATE``).
+
+``bulk_create`` skips ``save()`` and the model signals. What ``save()``
+computes (slug, ``geohash``) is filled in when a row is queued, and after
+each batch the ``bulk_upserted`` signal is sent with the primary keys that
+were written and, in update mode, the values the overwritten columns had
+before; ``signals.py`` uses it to keep the API cache, the search index,
+related compounds, slider histograms and image derivatives in sync.
+"""
+import time
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils.text import slugify
+
+from .models import set_geohash
+
+# sender=model, pks=[...] (every row of the batch), created=[...] (the new ones), using=alias,
+# before={pk: {attname: old value}} (update mode: the overwritten columns of the rows that existed)
+bulk_upserted = Signal()
+
+
+class BatchResult:
+    def __init__(self, number, created, existing, skipped, seconds):
+        self.number = number
+        self.created = created
+        self.existing = existing
+        self.skipped = skipped      # rejected by another unique constraint (e.g. same slug, different name)
+        self.seconds = seconds
+
+    def __str__(self):
+        summary = f"batch {self.number}: {self.created} created, {self.existing} existing"
+        if self.skipped:
+            summary += f", {self.skipped} skipped"
+        return f"{summary} ({self.seconds * 1000:.0f} ms)"
+
+
+class BatchUpserter:
+    def __init__(self, model, key, update_fields=None, slug_from=None, batch_size=1000,
+                 using='default', on_batch=None):
+        self.model = model
+        self.key = key
+        self.update_fields = list(update_fields) if update_fields else None
+        if self.update_fields:
+            # ON CONFLICT DO UPDATE بيكتب بس الأعمدة المذكورة، فلازم updated_at (auto_now) يتحدث معاها
+            self.update_fields += [
+                field.name for field in model._meta.concrete_fields
+                if getattr(field, 'auto_now', False) and field.name not in self.update_fields
+            ]
+        self.has_geohash = any(field.name == 'geohash' for field in model._meta.concrete_fields)
+        if self.has_geohash and self.update_fields and {'latitude', 'longitude'} & set(self.update_fields):
+            self.update_fields.append('geohash')
+        self.slug_from = slug_from
+        self.batch_size = batch_size
+        self.using = using
+        self.on_batch = on_batch      # callable(BatchResult), e.g. to print a summary
+
+        self.pending = {}
+        self.pks = {}                 # natural key -> pk for every row written so far
+        self.results = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.flush()
+
+    @property
+    def created(self):
+        return sum(result.created for result in self.results)
+
+    @property
+    def existing(self):
+        return sum(result.existing for result in self.results)
+
+    def add(self, obj):
+        """Queue an unsaved instance; returns False for a duplicate key."""
+        if self.slug_from and not obj.slug:
+            obj.slug = slugify(getattr(obj, self.slug_from))
+        if self.has_geohash:
+            set_geohash(obj, {})
+        value = getattr(obj, self.key)
+        if not value:
+            return False
+        duplicate = value in self.pending or value in self.pks
+        if duplicate and not self.update_fields:
+            return False            # زي get_or_create: أول نسخة بس
+        self.pending[value] = obj   # في وضع التحديث آخر نسخة هي اللي بتتكتب
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        return not duplicate
+
+    def flush(self):
+        if not self.pending:
+            return None
+        start = time.perf_counter()
+        objs = list(self.pending.values())
+        keys = list(self.pending)
+        manager = self.model._default_manager.using(self.using)
+
+        # القيم القديمة للأعمدة اللي هتتكتب فوقها (للـ histograms)
+        overwritten = [self.model._meta.get_field(name).attname for name in self.update_fields or ()]
+        columns = list(dict.fromkeys([self.key, 'pk', *overwritten]))
+
+        with transaction.atomic(using=self.using):
+            existing = {row[self.key]: row for row in manager.filter(**{f'{self.key}__in': keys}).values(*columns)}
+            if self.update_fields:
+                manager.bulk_create(objs, update_conflicts=True, unique_fields=[self.key], update_fields=self.update_fields)
+            else:
+                manager.bulk_create(objs, ignore_conflicts=True)
+            written = dict(manager.filter(**{f'{self.key}__in': keys}).values_list(self.key, 'pk'))
+            self.pks.update(written)
+            bulk_upserted.send(
+                sender=self.model,
+                pks=list(written.values()),
+                created=[pk for key, pk in written.items() if key not in existing],
+                using=self.using,
+                before={row['pk']: {name: row[name] for name in overwritten} for row in existing.values()}
+                if self.update_fields else {},
+            )
+
+        result = BatchResult(
+            len(self.results) + 1,
+            created=len(written) - len(existing),
+            existing=len(existing),
+            skipped=len(keys) - len(written),
+            seconds=time.perf_counter() - start,
+        )
+        self.results.append(result)
+        self.pending = {}
+        if self.on_batch:
+            self.on_batch(result)
+        return result
@@ -0,0 +1,185 @@
+"""
+Response cache for the public/* API.
+
+Every cached view declares the models its output is built from
+(``cache_models``). Each of those models has a version stamp in the cache
+and the stamps are part of the response key, so a change to e.g. a Developer
+(see ``signals.py``) makes every cached compound/property/developer page
+unreachable while blog posts or partners stay cached.
+
+The cache alias is ``settings.PUBLIC_API_CACHE_ALIAS``; with a file-based or
+shared backend the versions are shared by all gunicorn workers, with
+LocMemCache they are per process (fine for a single worker / runserver).
+
+The stamps are also stored in the database (``CacheVersion``, written by
+``bump_version``). A stamp missing from the cache (first hit, evicted, cache
+flushed) is read back from there, so it keeps its value: the validators
+below stay the same across cache restarts and a cold cache only costs the
+rebuild of the responses.
+
+The same stamps make the validators for conditional GETs: the ETag is a hash
+of the response key (request + versions) and ``Last-Modified`` is the newest
+stamp, i.e. the time of the last change to any of the models, so
+``If-None-Match``/``If-Modified-Since`` are answered with a 304 from the
+cache versions alone - no query, no serialization. ``If-None-Match`` wins
+when both are sent (``Last-Modified`` only has one-second precision).
+
+Hits and 304s are answered before DRF's dispatch and so skip the throttles
+on purpose: they cost one cache read and never reach the database or the
+serializers, which is what the throttles are there to protect. Only
+requests that build a response spend a token; the async page views do the
+same.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import CacheVersion
+
+VERSION_KEY = 'public-api:version:{}'
+RESPONSE_KEY = 'public-api:response:{}:{}'
+
+
+def get_cache():
+    return caches[getattr(settings, 'PUBLIC_API_CACHE_ALIAS', 'default')]
+
+
+def get_versions(models, cached_only=False):
+    """
+    Current version stamp of each model (a time.time_ns() value). Stamps
+    missing from the cache are read from ``CacheVersion``; with
+    ``cached_only`` the result is None instead (callers on the event loop).
+    """
+    cache = get_cache()
+    labels = {VERSION_KEY.format(model._meta.label_lower): model._meta.label_lower for model in models}
+    versions = cache.get_many(list(labels))
+    missing = [key for key in labels if key not in versions]
+    if missing:
+        if cached_only:
+            return None
+        versions.update(load_versions({key: labels[key] for key in missing}))
+    return [versions[key] for key in labels]
+
+
+def load_versions(labels):
+    """
+    Put the stored stamps of ``{cache key: label}`` back in the cache (first
+    hit, evicted, cache flushed); a model that never changed starts now.
+    """
+    cache = get_cache()
+    manager = CacheVersion.objects.using(DEFAULT_DB_ALIAS)
+    now = time.time_ns()
+    manager.bulk_create([CacheVersion(label=label, version=now) for label in labels.values()], ignore_conflicts=True)
+    stored = dict(manager.filter(label__in=labels.values()).values_list('label', 'version'))
+    for key, label in labels.items():
+        # add مش set: bump_version اللي حصل في النص بيكسب
+        cache.add(key, stored[label], timeout=None)
+    cached = cache.get_many(list(labels))
+    return {key: cached.get(key, stored[label]) for key, label in labels.items()}
+
+
+def bump_version(model):
+    label, version = model._meta.label_lower, time.time_ns()
+    CacheVersion.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+        [CacheVersion(label=label, version=version)],
+        update_conflicts=True, unique_fields=['label'], update_fields=['version'],
+    )
+    get_cache().set(VERSION_KEY.format(label), version, timeout=None)
+
+
+class ResponseCache:
+    """
+    Lookup/store helpers of the public API response cache, for ``CachedResponseMixin``
+    and the async views (``async_views.py``).
+
+    Keyed on host, path, the (sorted) query string - which includes the page
+    number - and the Accept header. Only JSON 200 responses are stored (and
+    carry ETag/Last-Modified).
+    """
+    cache_models = ()
+
+    def get_cache_models(self):
+        return self.cache_models
+
+    def get_response_cache_key(self, request, versions=None):
+        if versions is None:
+            versions = get_versions(self.get_cache_models())
+        versions = '.'.join(str(v) for v in versions)
+        query = sorted((key, value) for key in request.GET for value in request.GET.getlist(key))
+        raw = '|'.join([
+            request.get_host(),
+            request.path,
+            repr(query),
+            request.META.get('HTTP_ACCEPT', ''),
+        ])
+        return RESPONSE_KEY.format(versions, hashlib.sha1(raw.encode()).hexdigest())
+
+    def lookup_cache(self, request, versions=None):
+        """(304 / cached response or None, cache key, validator headers) for a GET."""
+        if versions is None:
+            versions = get_versions(self.get_cache_models())
+        self.cache_versions = versions
+        key = self.get_response_cache_key(request, versions)
+        etag = quote_etag(hashlib.sha1(key.encode()).hexdigest())
+        last_modified = max(versions) // 10 ** 9
+        validators = {'ETag': etag, 'Last-Modified': http_date(last_modified)}
+
+        # العميل عنده نفس النسخة: 304 من غير ما نلمس الـ ORM أو الـ cache
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            for header, value in validators.items():
+                not_modified[header] = value
+            return not_modified, key, validators
+
+        cached = get_cache().get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            for header, value in validators.items():
+                response[header] = value
+            response['X-Cache'] = 'HIT'
+            return response, key, validators
+        return None, key, validators
+
+    def store_response(self, response, key, validators):
+        """Cache a freshly built JSON 200 (DRF ``Response`` once rendered, or a plain ``HttpResponse``)."""
+        cache = get_cache()
+        renderer = getattr(response, 'accepted_renderer', None)
+        if renderer is not None:
+            cacheable = renderer.format == 'json'
+        else:
+            cacheable = response.get('Content-Type') == 'application/json'
+        if response.status_code == 200 and cacheable:
+            if renderer is not None:
+                response.add_post_render_callback(
+                    lambda rendered: cache.set(key, (rendered.content, rendered['Content-Type']))
+                )
+            else:
+                cache.set(key, (response.content, response['Content-Type']))
+            for header, value in validators.items():
+                response[header] = value
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedResponseMixin(ResponseCache):
+    """
+    Serve GET responses of a viewset from the public API cache. Hits and 304s
+    are answered before DRF's dispatch, so they never touch the ORM and are
+    not throttled (see the module docstring).
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or not self.get_cache_models():
+            return super().dispatch(request, *args, **kwargs)
+
+        response, key, validators = self.lookup_cache(request)
+        if response is not None:
+            return response
+        return self.store_response(super().dispatch(request, *args, **kwargs), key, validators)
@@ -0,0 +1,203 @@
+"""
+Contact form pipeline: enqueue in the request, store and notify in a worker.
+
+``POST /api/public/contact-submissions/`` validates the form, appends it to
+a small SQLite queue file (``settings.CONTACT_QUEUE['PATH']``) and answers
+``202 Accepted`` with the submission's ``reference``. The queue is a
+separate file from the catalog database, so a lead never waits behind admin
+writes or imports, and it is written with ``synchronous=FULL``: once the
+client has its 202 the submission survives a crash.
+
+``manage.py process_contact_queue`` (one worker process) then loops:
+
+1. group commit: everything queued so far (up to ``BATCH_SIZE``, after
+   waiting ``GROUP_COMMIT_WAIT`` seconds for more to arrive) is written with
+   one ``bulk_create`` in one transaction, and only then removed from the
+   queue. ``reference`` is unique, so a batch replayed after a crash
+   between the two steps is not stored twice.
+2. notifications: pending submissions are emailed to ``NOTIFY_EMAILS`` over
+   one SMTP connection. A failed send is retried after ``RETRY_DELAY *
+   2**(attempts - 1)`` seconds, up to ``MAX_ATTEMPTS``; then the submission
+   is marked ``failed`` (it stays visible in the admin either way).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ContactFormSubmission
+
+DEFAULTS = {
+    'PATH': os.path.join(settings.BASE_DIR, 'queue', 'contact.sqlite3'),
+    'BATCH_SIZE': 500,
+    'GROUP_COMMIT_WAIT': 0.1,       # ثواني
+    'NOTIFY_EMAILS': [],
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 60,              # ثواني، وبتتضاعف مع كل محاولة
+}
+FIELDS = ('name', 'email', 'phone', 'message')
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'CONTACT_QUEUE', {})}
+
+
+class ContactQueue:
+    """Append-only SQLite table of JSON payloads; one connection per thread."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+
+    def connect(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = FULL')
+            conn.execute('CREATE TABLE IF NOT EXISTS contact_queue (id INTEGER PRIMARY KEY, payload TEXT NOT NULL)')
+            self.local.conn = conn
+        return conn
+
+    def put(self, payload):
+        self.connect().execute('INSERT INTO contact_queue (payload) VALUES (?)', (json.dumps(payload, cls=DjangoJSONEncoder),))
+
+    def peek(self, limit):
+        rows = self.connect().execute('SELECT id, payload FROM contact_queue ORDER BY id LIMIT ?', (limit,))
+        return [(pk, json.loads(payload)) for pk, payload in rows]
+
+    def remove(self, ids):
+        self.connect().execute(
+            f"DELETE FROM contact_queue WHERE id IN ({', '.join('?' * len(ids))})", list(ids),
+        )
+
+    def __len__(self):
+        return self.connect().execute('SELECT COUNT(*) FROM contact_queue').fetchone()[0]
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_queue():
+    path = get_config()['PATH']
+    with _queues_lock:
+        if path not in _queues:
+            _queues[path] = ContactQueue(path)
+        return _queues[path]
+
+
+def enqueue_submission(data):
+    """Queue validated form data; returns the submission's reference."""
+    reference = str(uuid.uuid4())
+    payload = {name: data.get(name) for name in FIELDS}
+    payload.update(reference=reference, submitted_at=timezone.now())
+    get_queue().put(payload)
+    return reference
+
+
+# ---------- worker ----------
+def store_batch(queue=None):
+    """Move the queued submissions into the database in one transaction; returns how many."""
+    config = get_config()
+    queue = queue or get_queue()
+    rows = queue.peek(config['BATCH_SIZE'])
+    if rows and len(rows) < config['BATCH_SIZE'] and config['GROUP_COMMIT_WAIT']:
+        # وقت الزحمة: نستنى شوية عشان الـ commit الواحد ياخد أكبر دفعة
+        time.sleep(config['GROUP_COMMIT_WAIT'])
+        rows = queue.peek(config['BATCH_SIZE'])
+    if not rows:
+        return 0
+    submissions = [
+        ContactFormSubmission(
+            reference=uuid.UUID(payload['reference']),
+            submitted_at=parse_datetime(payload['submitted_at']),
+            **{name: payload.get(name) for name in FIELDS},
+        )
+        for _, payload in rows
+    ]
+    with transaction.atomic():
+        ContactFormSubmission.objects.bulk_create(submissions, ignore_conflicts=True)
+    queue.remove([pk for pk, _ in rows])
+    return len(rows)
+
+
+def build_message(submission, recipients):
+    body = '\n'.join([
+        f'Name: {submission.name}',
+        f'Email: {submission.email}',
+        f'Phone: {submission.phone or "-"}',
+        f'Submitted: {timezone.localtime(submission.submitted_at):%Y-%m-%d %H:%M}',
+        '',
+        submission.message,
+    ])
+    return EmailMessage(
+        subject=f'New contact form submission from {submission.name}',
+        body=body,
+        to=recipients,
+        reply_to=[submission.email],
+    )
+
+
+def send_notifications(limit=100):
+    """Email the due pending submissions; returns (sent, failed) counts."""
+    config = get_config()
+    recipients = config['NOTIFY_EMAILS']
+    if not recipients:
+        return 0, 0
+    now = timezone.now()
+    due = list(
+        ContactFormSubmission.objects
+        .filter(Q(notify_after__isnull=True) | Q(notify_after__lte=now), notification_status='pending')
+        .order_by('id')[:limit]
+    )
+    if not due:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        # الـ SMTP مش متاح: الدفعة كلها تتأجل للمحاولة الجاية
+        unavailable = exc
+    else:
+        unavailable = None
+    for submission in due:
+        submission.notification_attempts += 1
+        try:
+            if unavailable is not None:
+                raise unavailable
+            connection.send_messages([build_message(submission, recipients)])
+        except Exception as exc:
+            failed += 1
+            submission.notification_error = f'{type(exc).__name__}: {exc}'[:1000]
+            if submission.notification_attempts >= config['MAX_ATTEMPTS']:
+                submission.notification_status = 'failed'
+            else:
+                delay = config['RETRY_DELAY'] * 2 ** (submission.notification_attempts - 1)
+                submission.notify_after = now + timedelta(seconds=delay)
+        else:
+            sent += 1
+            submission.notification_status = 'sent'
+            submission.notification_error = ''
+            submission.notified_at = timezone.now()
+    if unavailable is None:
+        connection.close()
+
+    ContactFormSubmission.objects.bulk_update(due, [
+        'notification_status', 'notification_attempts', 'notification_error', 'notify_after', 'notified_at',
+    ])
+    return sent, failed
@@ -0,0 +1,187 @@
+"""
+Facet counts for the compound/property search screens (``.../facets/``).
+
+The endpoint takes the same query parameters as the list. Every facet is
+counted with all the *other* filters applied but not its own, so the
+location list still shows the other locations after the user picked one.
+
+That takes two aggregate queries however many facets there are:
+
+1. the list filters minus the facet filters, plus the price filters,
+   ``GROUP BY`` the facet columns (location, developer, ...). The facet
+   filters are then evaluated in Python on the grouped rows, once per facet
+   leaving its own filter out - there are at most a few thousand groups.
+2. the list filters minus the price filters, ``GROUP BY`` price bucket
+   (``settings.FACETS['PRICE_BUCKETS']``). Price ranges cannot be evaluated
+   on bucketed rows, hence the second query.
+
+Responses go through the public API cache (``CachedResponseMixin``), keyed on
+the query string like any other list.
+"""
+import operator
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Case, Count, F, IntegerField, Value, When
+from django.db.models.functions import ExtractYear
+from django_filters import utils
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters as drf_filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import Developer, Location
+
+DEFAULTS = {
+    # حدود الشرايح بالجنيه: أقل من 2 مليون، من 2 لـ 5، ... ، أكتر من 20
+    'PRICE_BUCKETS': [2_000_000, 5_000_000, 10_000_000, 20_000_000],
+}
+LOOKUPS = {'exact': operator.eq, 'gte': operator.ge, 'lte': operator.le}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'FACETS', {})}
+
+
+class Facet:
+    def __init__(self, name, expression, filters, model=None, sort='count'):
+        self.name = name
+        self.key = f'facet_{name}'
+        self.expression = F(expression) if isinstance(expression, str) else expression
+        self.filters = filters      # query param -> lookup, evaluated on the grouped value
+        self.model = model          # adds a "label" (the object's name) to each value
+        self.sort = sort            # 'count' (most results first) or 'value'
+
+
+class PriceFacet:
+    def __init__(self, field, filters):
+        self.field = field
+        self.filters = filters      # query params of the price range (applied in SQL)
+
+    def bucket_expression(self, bounds):
+        # NULL price -> NULL bucket (مش بيتعد)
+        whens = [When(**{f'{self.field}__lt': bound}, then=Value(index)) for index, bound in enumerate(bounds)]
+        whens.append(When(**{f'{self.field}__isnull': False}, then=Value(len(bounds))))
+        return Case(*whens, default=None, output_field=IntegerField())
+
+    def counts(self, queryset):
+        bounds = sorted(get_config()['PRICE_BUCKETS'])
+        rows = dict(queryset.values(facet_price=self.bucket_expression(bounds))
+                    .annotate(count=Count('pk')).values_list('facet_price', 'count'))
+        edges = [None, *bounds, None]
+        return [
+            {'min': edges[index], 'max': edges[index + 1], 'count': rows.get(index, 0)}
+            for index in range(len(bounds) + 1)
+        ]
+
+
+class FacetSet:
+    def __init__(self, facets, price):
+        self.facets = facets
+        self.price = price
+
+    def without(self, data, params):
+        data = data.copy()
+        for param in params:
+            data.pop(param, None)
+        return data
+
+    def filtered(self, filterset_class, data, queryset, request):
+        filterset = filterset_class(data, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            raise utils.translate_validation(filterset.errors)
+        return filterset.qs.order_by()
+
+    def counts(self, filterset_class, data, queryset, request=None):
+        facet_params = [param for facet in self.facets for param in facet.filters]
+        price_params = list(self.price.filters)
+
+        # القيم المختارة، متحققة ومحولة بنفس فورم الـ FilterSet (Location -> pk, "3" -> 3)
+        selected = filterset_class(data, queryset=queryset, request=request)
+        if not selected.is_valid():
+            raise utils.translate_validation(selected.errors)
+        tests = [
+            (facet, LOOKUPS[lookup], getattr(value, 'pk', value))
+            for facet in self.facets
+            for param, lookup in facet.filters.items()
+            for value in [selected.form.cleaned_data.get(param)]
+            if value not in (None, '')
+        ]
+
+        # (1) الـ facets العادية: GROUP BY واحد وبعدين كل facet من غير فلتره
+        groups = list(
+            self.filtered(filterset_class, self.without(data, facet_params), queryset, request)
+            .values(**{facet.key: facet.expression for facet in self.facets})
+            .annotate(count=Count('pk'))
+        )
+        totals = {facet.name: Counter() for facet in self.facets}
+        total = 0
+        for group in groups:
+            failed = {
+                facet for facet, compare, value in tests
+                if group[facet.key] is None or not compare(group[facet.key], value)
+            }
+            if not failed:
+                total += group['count']
+            for facet in self.facets:
+                if not failed - {facet} and group[facet.key] is not None:
+                    totals[facet.name][group[facet.key]] += group['count']
+
+        result = {facet.name: self.values(facet, totals[facet.name]) for facet in self.facets}
+        # (2) شرايح السعر: كل الفلاتر ما عدا السعر
+        result['price'] = self.price.counts(
+            self.filtered(filterset_class, self.without(data, price_params), queryset, request)
+        )
+        return {'count': total, 'facets': result}
+
+    def values(self, facet, counts):
+        labels = {}
+        if facet.model is not None and counts:
+            labels = dict(facet.model._default_manager.filter(pk__in=list(counts)).values_list('pk', 'name'))
+        if facet.sort == 'count':
+            items = sorted(counts.items(), key=lambda item: (-item[1], str(labels.get(item[0], item[0]))))
+        else:
+            items = sorted(counts.items())
+        values = []
+        for value, count in items:
+            entry = {'value': value, 'count': count}
+            if facet.model is not None:
+                entry['label'] = labels.get(value)
+            values.append(entry)
+        return values
+
+
+compound_facets = FacetSet(
+    [
+        Facet('location', 'location_id', {'location': 'exact'}, model=Location),
+        Facet('developer', 'developer_id', {'developer': 'exact'}, model=Developer),
+        Facet('delivery_year', ExtractYear('delivery_date'),
+              {'delivery_year': 'exact', 'delivery_year_lte': 'lte'}, sort='value'),
+    ],
+    PriceFacet('min_price', {'min_price': 'gte', 'max_price': 'lte'}),
+)
+
+property_facets = FacetSet(
+    [
+        Facet('location', 'location_id', {'location': 'exact'}, model=Location),
+        Facet('developer', 'developer_id', {'developer': 'exact'}, model=Developer),
+        Facet('property_type', 'property_type', {'property_type': 'exact'}, sort='value'),
+        Facet('bedrooms', 'bedrooms', {'bedrooms__gte': 'gte'}, sort='value'),
+    ],
+    PriceFacet('price', {'price__gte': 'gte', 'price__lte': 'lte'}),
+)
+
+
+class FacetedListMixin:
+    """Adds ``GET <list>/facets/`` for the viewset's ``facet_set``."""
+    facet_set = None
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        queryset = self.get_queryset().prefetch_related(None)
+        # باقي الـ backends (زي البحث) بتتطبق زي القائمة؛ الترتيب ملوش لازمة هنا
+        for backend in self.filter_backends:
+            if not issubclass(backend, (DjangoFilterBackend, drf_filters.OrderingFilter)):
+                queryset = backend().filter_queryset(request, queryset, self)
+        filterset_class = DjangoFilterBackend().get_filterset_class(self, queryset)
+        return Response(self.facet_set.counts(filterset_class, request.query_params, queryset, request))
@@ -0,0 +1,138 @@
+"""
+Sparse fieldsets for the public compound/property endpoints.
+
+* ``?fields=id,name,min_price`` returns just those fields (``id`` always),
+* ``?expand=description,images`` adds fields to the default set.
+
+Lists (and ``related/``, ``nearby/``) default to the serializer's
+``card_fields``: what a result card shows, without the RichText
+description, gallery, amenities...
+The detail endpoint keeps returning every field.
+
+Relations in ``compact_fields`` are inlined in a short form in lists
+(``{"id", "name", "slug", ...}``); the ones also in ``expandable_fields``
+(the developer) come in full with ``?expand=`` or on the detail endpoint.
+
+The queryset follows the selection: columns that are not needed are
+deferred, relations that are not needed are neither joined nor prefetched.
+"""
+from rest_framework.exceptions import ValidationError
+
+
+class FieldSelection:
+    def __init__(self, fields=None, expand=None):
+        self.fields = fields    # None -> every field
+        self.expand = expand    # None -> every expandable relation in full
+
+    def wants(self, name):
+        return self.fields is None or name in self.fields
+
+    def expands(self, name):
+        return self.expand is None or name in self.expand
+
+
+ALL = FieldSelection()
+
+
+def split(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else []
+
+
+def select_fields(serializer_class, query_params, card=False):
+    available = [name for name, field in serializer_class().fields.items() if not field.write_only]
+    fields, expand = split(query_params.get('fields')), split(query_params.get('expand'))
+    unknown = [name for name in fields + expand if name not in available]
+    if unknown:
+        raise ValidationError({'fields': [f'Unknown field: {name}' for name in unknown]})
+
+    if fields:
+        selected = {'id', *fields, *expand}
+    elif card:
+        selected = {*serializer_class.card_fields, *expand}
+    else:
+        return ALL
+    return FieldSelection(selected, set(expand) if card else None)
+
+
+def is_compact(serializer_class, selection, relation):
+    return relation in serializer_class.compact_fields and not (
+        relation in serializer_class.expandable_fields and selection.expands(relation)
+    )
+
+
+def restrict_queryset(queryset, serializer_class, selection, keep=()):
+    """Defer/skip everything the selected fields do not read; ``keep`` columns are always loaded."""
+    if selection.fields is None:
+        return queryset
+    needed = {'id', *keep}
+    for name in selection.fields:
+        needed.update(serializer_class.field_sources.get(name, [name]))
+
+    model = queryset.model
+    deferred = [
+        field.name for field in model._meta.concrete_fields
+        if field.name not in needed and field.attname not in needed
+    ]
+    joined = queryset.query.select_related
+    select_related = [name for name in (joined if isinstance(joined, dict) else {}) if name in needed]
+    prefetch = [lookup for lookup in queryset._prefetch_related_lookups if lookup in needed]
+
+    # العلاقات المختصرة (id/name/slug...) من غير باقي أعمدة الجدول
+    for relation in select_related:
+        if is_compact(serializer_class, selection, relation):
+            related = model._meta.get_field(relation).related_model
+            deferred += [
+                f'{relation}__{field.name}' for field in related._meta.concrete_fields
+                if field.name not in serializer_class.compact_fields[relation]
+            ]
+
+    queryset = queryset.select_related(None).prefetch_related(None)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset.defer(*deferred) if deferred else queryset
+
+
+class SparseFieldsetMixin:
+    """?fields= / ?expand= for a viewset whose serializer uses ``SparseFieldsSerializerMixin``."""
+    card_actions = ('list', 'related', 'nearby')
+
+    def get_field_selection(self):
+        if not hasattr(self, '_field_selection'):
+            request = getattr(self, 'request', None)
+            self._field_selection = ALL if request is None else select_fields(
+                self.get_serializer_class(), request.query_params, card=self.action in self.card_actions,
+            )
+        return self._field_selection
+
+    def get_queryset(self):
+        return restrict_queryset(
+            super().get_queryset(), self.get_serializer_class(), self.get_field_selection(),
+            keep=getattr(self, 'cursor_ordering_fields', ()),
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['field_selection'] = self.get_field_selection()
+        return context
+
+
+class SparseFieldsSerializerMixin:
+    card_fields = ()            # the default fields of list ("card") responses
+    compact_fields = {}         # relation -> fields of its short inline form
+    expandable_fields = ()      # compact relations that ?expand= inlines in full
+    field_sources = {}          # output field -> model columns it reads (default: the field itself)
+
+    @property
+    def selection(self):
+        return self.context.get('field_selection') or ALL
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.selection.fields is None:
+            return fields
+        return {name: field for name, field in fields.items() if name in self.selection.fields}
+
+    def is_compact(self, relation):
+        return is_compact(type(self), self.selection, relation)
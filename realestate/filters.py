@@ -1,5 +1,9 @@
 import django_filters
-from .models import Compound
+from django.db.models import Q
+from rest_framework import filters as drf_filters
+
+from .models import Compound, Property
+from .search import compound_index, property_index
 
 class CompoundFilter(django_filters.FilterSet):
     # 1. البحث بالاسم (بحث مرن)
@@ -26,12 +30,38 @@ class CompoundFilter(django_filters.FilterSet):
 
     class Meta:
         model = Compound
-        fields = ['location', 'developer']
+        fields = ['location', 'developer', 'is_featured', 'is_new_launch']
 
     def filter_search(self, queryset, name, value):
-        from django.db.models import Q
+        # FTS5 index لو متاح (مرتب بالـ relevance)، وإلا البحث القديم
+        results = compound_index.search(queryset, value)
+        if results is not None:
+            return results
         return queryset.filter(
             Q(name__icontains=value) |
             Q(location__name__icontains=value) |
             Q(developer__name__icontains=value)
-        )
\ No newline at end of file
+        )
+
+
+class FullTextSearchFilter(drf_filters.SearchFilter):
+    """SearchFilter that uses the FTS5 index for models that have one."""
+    indexes = {Compound: compound_index, Property: property_index}
+
+    def filter_queryset(self, request, queryset, view):
+        index = self.indexes.get(queryset.model)
+        terms = self.get_search_terms(request)
+        if index is not None and terms:
+            results = index.search(queryset, ' '.join(terms))
+            if results is not None:
+                return results
+        return super().filter_queryset(request, queryset, view)
+
+
+class RankedOrderingFilter(drf_filters.OrderingFilter):
+    """Orders search results by relevance unless the client asked for an ordering."""
+
+    def get_ordering(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return ['search_rank', '-id']
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,192 @@
+"""
+Map search for the public API on plain SQLite (no SpatiaLite, no R*Tree).
+
+* ``GET .../compounds/map/?bbox=west,south,east,north&zoom=12`` (and
+  ``.../properties/map/``) - what is inside the map viewport: markers, or
+  clusters at low zoom,
+* ``GET .../compounds/nearby/?lat=30.04&lng=31.24&radius=5`` and
+  ``.../properties/nearby/`` - result cards sorted by distance, with
+  ``distance_km``.
+
+Compounds and properties store ``latitude``/``longitude`` and a
+``geohash`` computed from them (``geohash.py``), which has an ordinary
+index. A bounding box becomes a few ``geohash`` range scans on that index
+(``within()``) plus the exact latitude/longitude test on the rows found, so
+a viewport reads the rows near it rather than the whole table.
+
+Clusters are the ``geohash`` prefixes of the precision that suits the zoom
+level (``SUBSTR(geohash, 1, n)`` in one ``GROUP BY``): count, centre (mean
+position) and lowest price. The viewport answers with markers from
+``CLUSTER_BELOW_ZOOM`` up, unless there are more than ``MAX_MARKERS`` of
+them.
+
+Distances use the equirectangular approximation (error well under 1% at
+city scale), which is plain arithmetic SQLite can sort on. The other query
+parameters of the list (``developer``, ``min_price``, ``search``...) apply
+to all three endpoints.
+"""
+import math
+
+from django.conf import settings
+from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, Min, Q, Value
+from django.db.models.functions import Substr
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from . import geohash
+
+DEFAULTS = {
+    'CLUSTER_BELOW_ZOOM': 14,       # من الـ zoom ده وأعلى: markers بدل clusters
+    'MAX_MARKERS': 500,             # أكتر من كده في الشاشة: clusters برضه
+    'COVER_CELLS': 32,              # أقصى عدد خلايا geohash لتغطية الـ bbox
+    'NEARBY_RADIUS_KM': 10,
+    'MAX_RADIUS_KM': 100,
+    'NEARBY_LIMIT': 20,
+    'MAX_NEARBY_LIMIT': 100,
+}
+KM_PER_DEGREE = 111.195             # طول درجة العرض (ودرجة الطول عند خط الاستواء)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'GEO', {})}
+
+
+# ---------- query parameters ----------
+def parse_number(params, name, low, high, default=None, cast=float):
+    value = params.get(name)
+    if value in (None, ''):
+        if default is None:
+            raise ValidationError({name: ['This parameter is required.']})
+        return default
+    try:
+        number = cast(value)
+    except ValueError:
+        raise ValidationError({name: ['A number is required.']})
+    if not low <= number <= high:
+        raise ValidationError({name: [f'Must be between {low} and {high}.']})
+    return number
+
+
+def parse_bbox(params):
+    """``bbox=west,south,east,north`` -> (south, west, north, east)."""
+    parts = (params.get('bbox') or '').split(',')
+    try:
+        west, south, east, north = (float(part) for part in parts)
+    except ValueError:
+        raise ValidationError({'bbox': ['Expected bbox=west,south,east,north in degrees.']})
+    if not (-180 <= west <= east <= 180 and -90 <= south <= north <= 90):
+        # الخريطة مش بتعدي خط 180 (مصر كلها بين 24 و 37 شرق)
+        raise ValidationError({'bbox': ['Expected west <= east and south <= north, within -180..180 / -90..90.']})
+    return south, west, north, east
+
+
+# ---------- queries ----------
+def within(queryset, south, west, north, east):
+    """Rows whose coordinates are inside the box, found through the geohash index."""
+    ranges = Q()
+    for low, high in geohash.cover(south, west, north, east, get_config()['COVER_CELLS']):
+        ranges |= Q(geohash__gte=low, geohash__lt=high)
+    return queryset.filter(ranges, latitude__range=(south, north), longitude__range=(west, east))
+
+
+def around(queryset, latitude, longitude, radius_km):
+    """Rows within ``radius_km``, annotated with ``distance_sq`` (km²) and nearest first."""
+    delta_lat = radius_km / KM_PER_DEGREE
+    scale = max(math.cos(math.radians(latitude)), 0.01)        # درجة الطول بتقصر بعيد عن خط الاستواء
+    delta_lng = min(delta_lat / scale, 180)
+    box = within(
+        queryset,
+        max(latitude - delta_lat, -90), max(longitude - delta_lng, -180),
+        min(latitude + delta_lat, 90), min(longitude + delta_lng, 180),
+    )
+    dy = (F('latitude') - Value(latitude)) * Value(KM_PER_DEGREE)
+    dx = (F('longitude') - Value(longitude)) * Value(KM_PER_DEGREE * scale)
+    return (box.annotate(distance_sq=ExpressionWrapper(dy * dy + dx * dx, output_field=FloatField()))
+            .filter(distance_sq__lte=radius_km ** 2)
+            .order_by('distance_sq', 'id'))
+
+
+def clusters(queryset, precision, price_field):
+    rows = (queryset.order_by()
+            .annotate(cell=Substr('geohash', 1, precision))
+            .values('cell')
+            .annotate(count=Count('id'), center_lat=Avg('latitude'), center_lng=Avg('longitude'),
+                      lowest_price=Min(price_field), first_id=Min('id'))
+            .order_by('cell'))
+    result = []
+    for row in rows:
+        south, west, north, east = geohash.decode(row['cell'])
+        result.append({
+            'geohash': row['cell'],
+            'count': row['count'],
+            'latitude': row['center_lat'],
+            'longitude': row['center_lng'],
+            'bounds': [west, south, east, north],
+            price_field: row['lowest_price'],
+            'id': row['first_id'] if row['count'] == 1 else None,
+        })
+    return result
+
+
+def refresh_geohashes(model, pks=None, using='default'):
+    """Recompute ``geohash`` where it no longer matches the coordinates (after raw SQL or QuerySet.update()); returns how many changed."""
+    queryset = model.objects.using(using).all()
+    if pks is not None:
+        queryset = queryset.filter(pk__in=pks)
+    changed = [
+        model(pk=pk, geohash=value)
+        for pk, latitude, longitude, current in queryset.values_list('pk', 'latitude', 'longitude', 'geohash').iterator(chunk_size=2000)
+        for value in [geohash.encode(latitude, longitude)] if value != current
+    ]
+    model.objects.using(using).bulk_update(changed, ['geohash'], batch_size=1000)
+    return len(changed)
+
+
+# ---------- API ----------
+class GeoSearchMixin:
+    """``map/`` and ``nearby/`` list actions for a public viewset."""
+    map_marker_fields = ('id', 'latitude', 'longitude')
+    map_price_field = 'price'   # lowest value per cluster
+
+    @action(detail=False, methods=['get'], url_path='map')
+    def viewport(self, request):
+        config = get_config()
+        bbox = parse_bbox(request.query_params)
+        zoom = parse_number(request.query_params, 'zoom', 0, 22, cast=int)
+        queryset = within(self.filter_queryset(self.get_queryset()), *bbox)
+
+        if zoom >= config['CLUSTER_BELOW_ZOOM']:
+            rows = list(queryset.order_by('id').values(*self.map_marker_fields)[:config['MAX_MARKERS'] + 1])
+            if len(rows) <= config['MAX_MARKERS']:
+                fields = self.get_serializer_class()().fields
+                markers = [
+                    {name: None if value is None else fields[name].to_representation(value) for name, value in row.items()}
+                    for row in rows
+                ]
+                return Response({'type': 'markers', 'count': len(markers), 'results': markers})
+
+        results = clusters(queryset, geohash.precision_for_zoom(zoom), self.map_price_field)
+        price = self.get_serializer_class()().fields[self.map_price_field]
+        for cluster in results:
+            if cluster[self.map_price_field] is not None:
+                cluster[self.map_price_field] = price.to_representation(cluster[self.map_price_field])
+        return Response({'type': 'clusters', 'count': sum(c['count'] for c in results), 'results': results})
+
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        config = get_config()
+        params = request.query_params
+        latitude = parse_number(params, 'lat', -90, 90)
+        longitude = parse_number(params, 'lng', -180, 180)
+        radius = parse_number(params, 'radius', 0, config['MAX_RADIUS_KM'], default=config['NEARBY_RADIUS_KM'])
+        limit = parse_number(params, 'limit', 1, config['MAX_NEARBY_LIMIT'], default=config['NEARBY_LIMIT'], cast=int)
+        queryset = around(self.filter_queryset(self.get_queryset()), latitude, longitude, radius)[:limit]
+        return Response(self.get_nearby_data(queryset))
+
+    def get_nearby_data(self, queryset):
+        items = list(queryset)
+        data = self.get_serializer(items, many=True).data
+        for item, card in zip(items, data):
+            card['distance_km'] = round(math.sqrt(item.distance_sq), 3)
+        return data
@@ -0,0 +1,128 @@
+"""
+Geohash encoding and bounding-box covers, in plain Python.
+
+A geohash interleaves the bits of longitude and latitude (longitude first)
+and writes them in base 32, so nearby points share a prefix and every
+prefix is a rectangular cell. Sorted as strings, the hashes follow a
+Z-order curve: the points of one cell are one contiguous range of an
+ordinary B-tree index. That is what ``geo.py`` queries instead of a spatial
+index:
+
+* ``cover()`` lists the cells of one precision that overlap a bounding box
+  and merges neighbours that are adjacent on the curve into ranges,
+  ``geohash >= low AND geohash < high``,
+* a cell prefix (``SUBSTR(geohash, 1, n)``) is a map cluster.
+"""
+import math
+
+ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+DECODE = {char: index for index, char in enumerate(ALPHABET)}
+PRECISION = 9               # ~4.8 m x 4.8 m
+END = '{'                   # sorts right after 'z': every hash starting with a prefix is < prefix + END
+
+
+def axis_bits(precision):
+    """(longitude bits, latitude bits) of a geohash of ``precision`` characters."""
+    bits = precision * 5
+    return (bits + 1) // 2, bits // 2
+
+
+def cell_size(precision):
+    """(width, height) of a cell in degrees."""
+    lng_bits, lat_bits = axis_bits(precision)
+    return 360 / 2 ** lng_bits, 180 / 2 ** lat_bits
+
+
+def to_index(value, low, high, bits):
+    index = int((value - low) / (high - low) * 2 ** bits)
+    return min(max(index, 0), 2 ** bits - 1)
+
+
+def interleave(x, y, precision):
+    """Cell (x = longitude index, y = latitude index) -> geohash string."""
+    lng_bits, lat_bits = axis_bits(precision)
+    code = 0
+    for bit in range(precision * 5):
+        if bit % 2 == 0:
+            lng_bits -= 1
+            code = code << 1 | (x >> lng_bits & 1)
+        else:
+            lat_bits -= 1
+            code = code << 1 | (y >> lat_bits & 1)
+    return to_string(code, precision)
+
+
+def to_string(code, precision):
+    return ''.join(ALPHABET[code >> 5 * (precision - 1 - i) & 31] for i in range(precision))
+
+
+def to_code(geohash):
+    code = 0
+    for char in geohash:
+        code = code << 5 | DECODE[char]
+    return code
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    """Geohash of a point, or '' when a coordinate is missing."""
+    if latitude is None or longitude is None:
+        return ''
+    lng_bits, lat_bits = axis_bits(precision)
+    return interleave(
+        to_index(longitude, -180, 180, lng_bits), to_index(latitude, -90, 90, lat_bits), precision,
+    )
+
+
+def decode(geohash):
+    """(south, west, north, east) of a geohash cell."""
+    precision = len(geohash)
+    lng_bits, lat_bits = axis_bits(precision)
+    code, x, y = to_code(geohash), 0, 0
+    for bit in range(precision * 5):
+        value = code >> (precision * 5 - 1 - bit) & 1
+        if bit % 2 == 0:
+            x = x << 1 | value
+        else:
+            y = y << 1 | value
+    width, height = cell_size(precision)
+    west, south = -180 + x * width, -90 + y * height
+    return south, west, south + height, west + width
+
+
+def cells(south, west, north, east, precision):
+    lng_bits, lat_bits = axis_bits(precision)
+    xs = range(to_index(west, -180, 180, lng_bits), to_index(east, -180, 180, lng_bits) + 1)
+    ys = range(to_index(south, -90, 90, lat_bits), to_index(north, -90, 90, lat_bits) + 1)
+    return xs, ys
+
+
+def cover(south, west, north, east, max_cells=32):
+    """
+    [(low, high), ...] geohash ranges whose union contains the box: the finest
+    precision that needs at most ``max_cells`` cells, adjacent cells merged.
+    """
+    precision = 1
+    for candidate in range(PRECISION, 0, -1):
+        xs, ys = cells(south, west, north, east, candidate)
+        if len(xs) * len(ys) <= max_cells:
+            precision = candidate
+            break
+    xs, ys = cells(south, west, north, east, precision)
+    codes = sorted(to_code(interleave(x, y, precision)) for x in xs for y in ys)
+
+    ranges = []
+    for code in codes:
+        if ranges and ranges[-1][1] == code - 1:
+            ranges[-1][1] = code
+        else:
+            ranges.append([code, code])
+    return [(to_string(low, precision), to_string(high, precision) + END) for low, high in ranges]
+
+
+def precision_for_zoom(zoom, max_precision=PRECISION - 1):
+    """
+    Cluster cell precision for a web map zoom level: cells about a quarter
+    of a 256 px tile wide (tiles are 360 / 2**zoom degrees wide).
+    """
+    lng_bits = max(zoom, 0) + 2
+    return min(max(math.floor(lng_bits * 2 / 5), 1), max_precision)
@@ -0,0 +1,338 @@
+"""
+Precomputed value distributions for the search sliders (``.../histogram/``).
+
+``GET /api/public/compounds/histogram/?location=5`` gives the min, max and
+bucket counts of ``min_price`` and ``min_area`` for the compounds of one
+location (``?developer=`` for one developer, neither for the whole
+catalog); ``/properties/histogram/`` does the same for ``price`` and
+``area``.
+
+The counts live in ``HistogramBucket``, one row per (scope, metric, bucket),
+so the endpoint reads a few dozen rows through the table's unique index
+whatever the catalog size. Buckets are ``STEPS[kind]`` wide from zero; the
+last of the ``BUCKETS`` also takes everything above it. Each bucket keeps the
+lowest and highest value in it, which gives the exact min/max.
+
+``signals.py`` keeps the table current on save and delete: a row's old
+values leave their buckets and the new ones enter (``F()`` updates, in the
+save's transaction). Only when the value leaving a bucket was that bucket's
+lowest or highest are the bucket's bounds re-read, with one range query
+limited to that bucket and scope. Bulk writes (``bulk_upserted``) apply
+the same deltas for a whole batch at once, from the batch's new rows and
+the old values ``BatchUpserter`` read before overwriting; ``import_catalog``
+instead defers them (``deferred()``) and rebuilds once at the end, which is
+cheaper over many batches. ``manage.py rebuild_histograms`` (needed after changing
+``settings.HISTOGRAMS`` or after ``QuerySet.update()``) recomputes a model's
+buckets from scratch. Negative values are not counted.
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max, Min, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .models import Compound, HistogramBucket, Property
+
+DEFAULTS = {
+    'BUCKETS': 60,
+    'STEPS': {'price': 500_000, 'area': 10},     # عرض الشريحة: 500 ألف جنيه / 10 متر
+}
+# model -> (label, {field: step kind})
+METRICS = {
+    Compound: ('compound', {'min_price': 'price', 'min_area': 'area'}),
+    Property: ('property', {'price': 'price', 'area': 'area'}),
+}
+SCOPES = ('location', 'developer')
+
+_deferred = ContextVar('histograms_deferred', default=None)
+
+
+def get_config():
+    config = {**DEFAULTS, **getattr(settings, 'HISTOGRAMS', {})}
+    config['STEPS'] = {**DEFAULTS['STEPS'], **config['STEPS']}
+    return config
+
+
+def metrics_for(model):
+    """(label, {field: step kind}) of a model."""
+    # بالاسم مش بالكلاس: الـ migrations بتبعت موديلات تاريخية
+    for source, metrics in METRICS.items():
+        if source._meta.label_lower == model._meta.label_lower:
+            return metrics
+    raise KeyError(model._meta.label)
+
+
+def bucket_for(value, step, buckets):
+    return min(max(int(value // step), 0), buckets - 1)
+
+
+def bucket_range(bucket, step, buckets):
+    """[low, high) of a bucket; high is None for the last one."""
+    return bucket * step, None if bucket == buckets - 1 else (bucket + 1) * step
+
+
+def row_fields(model):
+    return ['location_id', 'developer_id', *metrics_for(model)[1]]
+
+
+def row_of(instance, fields=None):
+    return {name: getattr(instance, name) for name in (fields or row_fields(type(instance)))}
+
+
+def entries(model, row, config):
+    """{(scope, scope_id, metric, bucket): value} for one row's values."""
+    label, fields = metrics_for(model)
+    scopes = [('all', 0)] + [(scope, row[f'{scope}_id']) for scope in SCOPES if row[f'{scope}_id'] is not None]
+    result = {}
+    for field, kind in fields.items():
+        value = row[field]
+        if value is None or value < 0:
+            continue        # سعر/مساحة بالسالب = داتا بايظة، مبتتحسبش
+        bucket = bucket_for(value, config['STEPS'][kind], config['BUCKETS'])
+        for scope, scope_id in scopes:
+            result[scope, scope_id, f'{label}.{field}', bucket] = value
+    return result
+
+
+def bucket_filter(key):
+    scope, scope_id, metric, bucket = key
+    return {'scope': scope, 'scope_id': scope_id, 'metric': metric, 'bucket': bucket}
+
+
+def collect(model, changes, config):
+    """
+    (count delta, values entering, values leaving) per bucket for
+    ``[(before, after), ...]`` row values (either side may be None).
+    """
+    counts = Counter()
+    entering = defaultdict(list)
+    leaving = defaultdict(list)
+    for before, after in changes:
+        removed = entries(model, before, config) if before else {}
+        added = entries(model, after, config) if after else {}
+        for key, value in removed.items():
+            if added.get(key) != value:
+                leaving[key].append(value)
+                if key not in added:
+                    counts[key] -= 1
+        for key, value in added.items():
+            if removed.get(key) != value:
+                entering[key].append(value)
+                if key not in removed:
+                    counts[key] += 1
+    return counts, entering, leaving
+
+
+def update(model, before, after, using='default'):
+    """
+    Move one row's values from the ``before`` buckets to the ``after`` ones
+    (either may be None), with ``F()`` updates that are safe next to
+    concurrent saves.
+    """
+    config = get_config()
+    counts, entering, leaving = collect(model, [(before, after)], config)
+    if not (entering or leaving):
+        return
+    manager = HistogramBucket.objects.using(using)
+    field = HistogramBucket._meta.get_field('min_value')
+
+    with transaction.atomic(using=using):
+        manager.bulk_create([HistogramBucket(**bucket_filter(key)) for key in entering], ignore_conflicts=True)
+        for key in counts.keys() | entering.keys():
+            values = {}
+            if counts[key]:
+                values['count'] = F('count') + counts[key]
+            if key in entering:
+                low, high = Value(min(entering[key]), output_field=field), Value(max(entering[key]), output_field=field)
+                values['min_value'] = Least(Coalesce('min_value', low), low)
+                values['max_value'] = Greatest(Coalesce('max_value', high), high)
+            if values:
+                manager.filter(**bucket_filter(key)).update(**values)
+        for key, values in leaving.items():
+            refresh_bounds(model, key, values, config, using)
+
+
+def apply_batch(model, created, before, using='default'):
+    """
+    Histogram deltas of a ``BatchUpserter`` batch (the ``bulk_upserted``
+    signal): rows in ``created`` are new, rows in ``before`` had those
+    columns overwritten, the others were left alone.
+
+    This runs in the batch's transaction after its writes, so no other
+    writer can touch the buckets meanwhile: the buckets involved are read
+    in one query, merged in Python and written back as a few bulk
+    statements rather than one UPDATE per bucket.
+    """
+    pending = _deferred.get()
+    if pending is not None:
+        pending.add(model)
+        return
+    config = get_config()
+    fields = row_fields(model)
+    created = set(created)
+    changes = []
+    rows = model._default_manager.using(using).filter(pk__in=created | before.keys()).values('pk', *fields)
+    for row in rows.iterator(chunk_size=2000):
+        pk = row.pop('pk')
+        old = None if pk in created else {**row, **{name: value for name, value in before[pk].items() if name in row}}
+        changes.append((old, row))
+    counts, entering, leaving = collect(model, changes, config)
+    keys = counts.keys() | entering.keys()
+    if not keys:
+        return
+
+    manager = HistogramBucket.objects.using(using)
+    buckets = {
+        (bucket.scope, bucket.scope_id, bucket.metric, bucket.bucket): bucket
+        for bucket in manager.filter(
+            metric__in={key[2] for key in keys}, scope_id__in={key[1] for key in keys}, bucket__in={key[3] for key in keys},
+        )
+    }
+    new, changed = [], []
+    for key in keys:
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = HistogramBucket(**bucket_filter(key))
+            new.append(bucket)
+        else:
+            changed.append(bucket)
+        bucket.count += counts[key]
+        if key in entering:
+            low, high = min(entering[key]), max(entering[key])
+            bucket.min_value = low if bucket.min_value is None else min(bucket.min_value, low)
+            bucket.max_value = high if bucket.max_value is None else max(bucket.max_value, high)
+    with transaction.atomic(using=using):
+        # delete + insert: bulk_update بيبني CASE لكل صف وده أبطأ بكتير على آلاف الشرايح
+        pks = [bucket.pk for bucket in changed]
+        for start in range(0, len(pks), 1000):
+            manager.filter(pk__in=pks[start:start + 1000]).delete()
+        # الشرايح اللي فضيت مبترجعش (زي rebuild)
+        manager.bulk_create([bucket for bucket in new + changed if bucket.count > 0], batch_size=1000)
+        for key, values in leaving.items():
+            if buckets[key].count <= 0:
+                continue
+            refresh_bounds(model, key, values, config, using, bounds=(buckets[key].min_value, buckets[key].max_value))
+
+
+@contextmanager
+def deferred(using='default'):
+    """
+    Skip the per-batch updates of ``apply_batch`` inside the block and
+    ``rebuild()`` each model written once at the end: for imports of many
+    batches, one pass over the table is cheaper than a delta per batch.
+    """
+    pending = set()
+    token = _deferred.set(pending)
+    try:
+        yield
+    finally:
+        _deferred.reset(token)
+        # حتى لو الاستيراد وقع في النص: الدفعات اللي اتكتبت لازم تتحسب
+        for model in pending:
+            rebuild(model, using=using)
+
+
+def refresh_bounds(model, key, removed_values, config, using, bounds=None):
+    """Re-read a bucket's min/max if a value that left it was one of them (``bounds``: its current min/max, if known)."""
+    if bounds is None:
+        bucket_row = HistogramBucket.objects.using(using).filter(**bucket_filter(key)).values('min_value', 'max_value').first()
+        if bucket_row is None:
+            return
+        bounds = bucket_row['min_value'], bucket_row['max_value']
+    if not set(bounds) & set(removed_values):
+        return
+    scope, scope_id, metric, bucket = key
+    field = metric.split('.', 1)[1]
+    low, high = bucket_range(bucket, config['STEPS'][metrics_for(model)[1][field]], config['BUCKETS'])
+    rows = model._default_manager.using(using).filter(**{f'{field}__gte': low})
+    if high is not None:
+        rows = rows.filter(**{f'{field}__lt': high})
+    if scope != 'all':
+        rows = rows.filter(**{f'{scope}_id': scope_id})
+    bounds = rows.aggregate(low=Min(field), high=Max(field))
+    HistogramBucket.objects.using(using).filter(**bucket_filter(key)).update(
+        min_value=bounds['low'], max_value=bounds['high'],
+    )
+
+
+def rebuild(model, using='default', bucket_model=HistogramBucket):
+    """
+    Recompute every bucket of ``model`` (Compound or Property) from its rows
+    and return the number of buckets written. The model arguments let
+    migrations pass historical models.
+    """
+    config = get_config()
+    label, _ = metrics_for(model)
+    counts = defaultdict(lambda: [0, None, None])
+    for values in model._default_manager.using(using).values_list(*row_fields(model)).iterator(chunk_size=5000):
+        for key, value in entries(model, dict(zip(row_fields(model), values)), config).items():
+            bucket = counts[key]
+            bucket[0] += 1
+            bucket[1] = value if bucket[1] is None else min(bucket[1], value)
+            bucket[2] = value if bucket[2] is None else max(bucket[2], value)
+
+    manager = bucket_model._default_manager.using(using)
+    with transaction.atomic(using=using):
+        manager.filter(metric__startswith=f'{label}.').delete()
+        manager.bulk_create(
+            [bucket_model(**bucket_filter(key), count=count, min_value=low, max_value=high)
+             for key, (count, low, high) in counts.items()],
+            batch_size=1000,
+        )
+    return len(counts)
+
+
+# ---------- API ----------
+class HistogramMixin:
+    """``histogram/`` list action for the public compound/property viewsets."""
+
+    @action(detail=False, methods=['get'])
+    def histogram(self, request):
+        scope, scope_id = 'all', 0
+        given = [name for name in SCOPES if request.query_params.get(name)]
+        if len(given) > 1:
+            raise ValidationError({'detail': 'Give either location or developer, not both.'})
+        if given:
+            scope = given[0]
+            try:
+                scope_id = int(request.query_params[scope])
+            except ValueError:
+                raise ValidationError({scope: ['A valid integer is required.']})
+
+        config = get_config()
+        label, fields = metrics_for(self.queryset.model)
+        rows = (HistogramBucket.objects
+                .filter(scope=scope, scope_id=scope_id, metric__in=[f'{label}.{field}' for field in fields], count__gt=0)
+                .values('metric', 'bucket', 'count', 'min_value', 'max_value'))
+        by_metric = defaultdict(dict)
+        for row in rows:
+            by_metric[row['metric']][row['bucket']] = row
+
+        serializer_fields = self.get_serializer_class()().fields
+        data = {}
+        for field, kind in fields.items():
+            step = config['STEPS'][kind]
+            present = by_metric[f'{label}.{field}']
+            represent = serializer_fields[field].to_representation
+            if not present:
+                data[field] = {'min': None, 'max': None, 'count': 0, 'step': step, 'buckets': []}
+                continue
+            first, last = min(present), max(present)
+            buckets = []
+            for bucket in range(first, last + 1):
+                low, high = bucket_range(bucket, step, config['BUCKETS'])
+                buckets.append({'min': low, 'max': high, 'count': present[bucket]['count'] if bucket in present else 0})
+            data[field] = {
+                'min': represent(present[first]['min_value']),
+                'max': represent(present[last]['max_value']),
+                'count': sum(row['count'] for row in present.values()),
+                'step': step,
+                'buckets': buckets,
+            }
+        return Response(data)
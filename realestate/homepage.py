@@ -0,0 +1,79 @@
+"""
+Everything the landing page shows, in one response (``GET /api/public/homepage/``).
+
+The landing page used to call six endpoints (featured compounds, new
+launches, developers, partners, testimonials, blog posts): six round trips
+and six paginated querysets, each with its own COUNT. Here each section is
+one query with a fixed size (``settings.HOMEPAGE``) and no COUNT, so the
+page costs six queries however much data there is:
+
+* compound sections are cards (same fields as the compound list, developer
+  joined in compact form),
+* blog posts come with their author joined,
+* the other sections are flat tables.
+
+Sections are ordered for the landing page: newest compounds, testimonials
+and posts first, developers by number of projects. The response is cached
+as a single unit (``PublicHomepageView`` lists in ``cache_models`` every
+model the sections serialize, including the locations and developers
+embedded in the compound cards and the blog posts' authors): a change to
+any of them gives the whole page a new cache key and ETag.
+"""
+from django.conf import settings
+from django.http import QueryDict
+
+from .fieldsets import restrict_queryset, select_fields
+from .instrumentation import timed_serializer
+from .models import BlogPost, Developer, Partner, Testimonial
+from .serializers import (
+    BlogPostSerializer, CompoundSerializer, DeveloperSerializer, PartnerSerializer, TestimonialSerializer,
+)
+
+DEFAULTS = {
+    # عدد العناصر في كل قسم
+    'FEATURED_COMPOUNDS': 8,
+    'NEW_LAUNCHES': 8,
+    'DEVELOPERS': 12,
+    'PARTNERS': 20,
+    'TESTIMONIALS': 10,
+    'BLOG_POSTS': 3,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'HOMEPAGE', {})}
+
+
+def compound_cards(queryset, limit, context):
+    selection = select_fields(CompoundSerializer, QueryDict(), card=True)
+    queryset = restrict_queryset(queryset, CompoundSerializer, selection)[:limit]
+    return timed_serializer(CompoundSerializer(queryset, many=True, context={**context, 'field_selection': selection})).data
+
+
+def build_homepage(request, compounds):
+    """``compounds`` is the public compound queryset (select_related developer)."""
+    config = get_config()
+    context = {'request': request}
+    return {
+        'featured_compounds': compound_cards(
+            compounds.filter(is_featured=True).order_by('-id'), config['FEATURED_COMPOUNDS'], context,
+        ),
+        'new_launches': compound_cards(
+            compounds.filter(is_new_launch=True).order_by('-id'), config['NEW_LAUNCHES'], context,
+        ),
+        'developers': timed_serializer(DeveloperSerializer(
+            Developer.objects.order_by('-projects_count', 'name')[:config['DEVELOPERS']],
+            many=True, context=context,
+        )).data,
+        'partners': timed_serializer(PartnerSerializer(
+            Partner.objects.order_by('id')[:config['PARTNERS']], many=True, context=context,
+        )).data,
+        'testimonials': timed_serializer(TestimonialSerializer(
+            Testimonial.objects.order_by('-id')[:config['TESTIMONIALS']], many=True, context=context,
+        )).data,
+        'blog_posts': timed_serializer(BlogPostSerializer(
+            BlogPost.objects.filter(status='Published').select_related('author')
+            .order_by('-publish_date')[:config['BLOG_POSTS']],
+            many=True, context=context,
+        )).data,
+    }
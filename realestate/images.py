@@ -0,0 +1,164 @@
+"""
+Resized WebP/JPEG derivatives of uploaded images.
+
+Originals are served untouched; after an upload (``post_save`` in
+``signals.py``) the image is handed to a small thread pool that writes one
+file per width/format in ``settings.IMAGE_DERIVATIVES`` next to the media
+files (``derivatives/<original path>/<width>w.<format>``) and records them in
+the ``<field>_variants`` JSON column:
+
+    {"source": "compounds/main_images/a.jpg",
+     "formats": {"webp": [[320, "derivatives/.../320w.webp"], ...], "jpeg": [...]}}
+
+``source`` ties the variants to the file they were made from, so a replaced
+image is regenerated and its stale variants are never served. Serializers
+turn the column into a ``<field>_srcset`` map (``srcset()``); until the
+variants exist it is null and clients fall back to the original URL.
+
+Pillow releases the GIL while decoding/resizing/encoding, so threads use
+several cores without a separate worker process. ``manage.py
+generate_image_derivatives`` backfills existing images.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from .cache import bump_version
+from .models import Compound, CompoundImage, Developer, Property, PropertyImage
+
+logger = logging.getLogger(__name__)
+
+# (model, image field) -> variants are stored in "<field>_variants"
+TARGETS = [
+    (Compound, 'main_image'),
+    (CompoundImage, 'image'),
+    (Property, 'main_image'),
+    (PropertyImage, 'image'),
+    (Developer, 'logo'),
+]
+
+DEFAULTS = {
+    'WIDTHS': [320, 640, 1024, 1600],
+    'FORMATS': {'webp': 80, 'jpeg': 82},
+    'DIRECTORY': 'derivatives',
+    'WORKERS': 2,
+}
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'IMAGE_DERIVATIVES', {})}
+
+
+def variants_field(field_name):
+    return f'{field_name}_variants'
+
+
+def derivative_name(name, width, fmt, directory):
+    root, _ = os.path.splitext(name)
+    return f'{directory}/{root}/{width}w.{fmt}'
+
+
+def is_current(name, variants):
+    return bool(name) and (variants or {}).get('source') == name
+
+
+# ==========================================
+#  Serializer side
+# ==========================================
+def srcset(name, variants, url):
+    """``{"webp": "<url> 320w, <url> 640w", ...}`` or None if not generated (yet)."""
+    if not is_current(name, variants) or not variants.get('formats'):
+        return None
+    result = {}
+    for fmt, sizes in variants['formats'].items():
+        urls = [(url(path), width) for width, path in sizes]
+        if any(full_url is None for full_url, _ in urls):
+            return None  # مفيش request نبني بيه الروابط
+        result[fmt] = ', '.join(f'{full_url} {width}w' for full_url, width in urls)
+    return result
+
+
+# ==========================================
+#  Generation
+# ==========================================
+def render(source, width, fmt, quality):
+    image = source.copy()
+    image.thumbnail((width, source.height), Image.LANCZOS)
+    if fmt == 'jpeg' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    options = {'optimize': True, 'progressive': True} if fmt == 'jpeg' else {'method': 4}
+    buffer = io.BytesIO()
+    image.save(buffer, PIL_FORMATS[fmt], quality=quality, **options)
+    return buffer.getvalue()
+
+
+def generate(model, pk, field_name, using='default', force=False):
+    """Write the derivatives of one image; returns True if anything was generated."""
+    config = get_config()
+    column = variants_field(field_name)
+    manager = model._default_manager.using(using)
+    row = manager.filter(pk=pk).values(field_name, column).first()
+    if row is None or not row[field_name] or (is_current(row[field_name], row[column]) and not force):
+        return False
+
+    name = row[field_name]
+    storage = model._meta.get_field(field_name).storage
+    with storage.open(name, 'rb') as fh:
+        image = Image.open(fh)
+        widths = sorted(config['WIDTHS'])
+        # JPEG: فك الصورة بدقة أقل من الأول (أسرع كتير مع صور الموبايل الكبيرة)
+        image.draft('RGB', (widths[-1], widths[-1]))
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    formats = {}
+    # من الأكبر للأصغر: كل مقاس بيتعمل من الأصلي، ومفيش تكبير لصورة أصغر من المقاس
+    for width in reversed([w for w in widths if w < image.width]):
+        for fmt, quality in config['FORMATS'].items():
+            path = derivative_name(name, width, fmt, config['DIRECTORY'])
+            if storage.exists(path):
+                storage.delete(path)
+            saved = storage.save(path, ContentFile(render(image, width, fmt, quality)))
+            formats.setdefault(fmt, []).insert(0, [width, saved])
+
+    # update() مش save(): من غير signals، ولو الصورة اتغيرت في النص مش هنكتب فوقها
+    updated = manager.filter(pk=pk, **{field_name: name}).update(**{column: {'source': name, 'formats': formats}})
+    if updated:
+        transaction.on_commit(lambda: bump_version(model), using=using)
+    return bool(updated)
+
+
+def _run(model, pk, field_name, using):
+    try:
+        generate(model, pk, field_name, using=using)
+    except Exception:
+        logger.exception('Image derivatives failed for %s %s.%s', model._meta.label, pk, field_name)
+    finally:
+        # الـ thread ليه connection خاص بيه
+        connections.close_all()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=get_config()['WORKERS'], thread_name_prefix='image-derivatives')
+        return _executor
+
+
+def schedule(model, pk, field_name, using='default'):
+    """Generate in the background once the upload is committed."""
+    transaction.on_commit(lambda: get_executor().submit(_run, model, pk, field_name, using), using=using)
@@ -0,0 +1,219 @@
+"""
+Per-request SQL and timing instrumentation (``RequestInstrumentationMiddleware``).
+
+For a sampled request (``SAMPLE_RATE``, a fraction of all requests) it records:
+
+* the number of SQL queries and the time spent in them, on every
+  connection the request uses (also the worker threads of the async
+  ``page/`` views),
+* repeated query shapes: the same SQL text run more than once, with ``IN
+  (%s, %s, ...)`` lists of any length counted as one shape. A shape
+  repeated once per result row is an N+1,
+* the time spent building serializer output (``serializer.data``, outermost
+  call only, including the queries it triggers) of the serializers a view
+  builds with ``get_serializer()`` (``SerializerTimingMixin`` on the public
+  viewsets), of ``PropertyListFastSerializer`` and of the ones wrapped in
+  ``timed_serializer()`` (homepage, ``page/`` lookups),
+
+and reports them as a ``Server-Timing`` header (``total``, ``db``,
+``serializer``, shown in the browser's network panel) and as one JSON log
+line on the ``realestate.instrumentation`` logger, keyed by the route name
+from ``realestate/urls.py`` (``public-compound-list``,
+``public-property-histogram``...).
+
+Requests that are not sampled pay for one ``ContextVar`` lookup per query
+and per timed serializer. The query hook is installed once, when the
+middleware is loaded; serializers are only touched for sampled requests,
+where ``timed_serializer()`` gives the instance a timed subclass of its own
+class - no serializer class is patched. A streamed response (bulk export)
+is measured up to the point the view returns it.
+"""
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.05,        # نسبة الطلبات اللي بتتقاس
+    'SERVER_TIMING': True,
+    'LOG': True,
+    'LOGGED_SHAPES': 5,         # أكتر الاستعلامات تكراراً في سطر الـ log
+}
+IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+
+logger = logging.getLogger(__name__)
+_recorder = ContextVar('request_instrumentation', default=None)
+_open_timers = ContextVar('request_instrumentation_timers', default=frozenset())
+_timed_classes = {}
+_installed = False
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'INSTRUMENTATION', {})}
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()        # الـ page/ views بتعمل queries من أكتر من thread
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.shapes = Counter()
+        self.timers = defaultdict(float)
+
+    def add_query(self, sql, seconds):
+        shape = IN_LIST.sub('(%s...)', sql)
+        with self.lock:
+            self.queries += 1
+            self.sql_seconds += seconds
+            self.shapes[shape] += 1
+
+    def add_time(self, name, seconds):
+        with self.lock:
+            self.timers[name] += seconds
+
+    def repeated(self):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > 1]
+
+
+# ---------- hooks ----------
+def record_query(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.add_query(sql, time.perf_counter() - start)
+
+
+def instrument_connection(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        # في الأول: connection.execute_wrapper() بيشيل آخر wrapper لما يخلص
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@contextmanager
+def timed(name):
+    """Add the block's duration to timer ``name`` of the current request (outermost block only)."""
+    recorder = _recorder.get()
+    if recorder is None or name in _open_timers.get():
+        yield
+        return
+    token = _open_timers.set(_open_timers.get() | {name})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add_time(name, time.perf_counter() - start)
+        _open_timers.reset(token)
+
+
+def timed_serializer(serializer):
+    """Add ``serializer.data`` to the ``serializer`` timer, if the current request is sampled."""
+    if _recorder.get() is None:
+        return serializer
+    cls = type(serializer)
+    if cls not in _timed_classes:
+        _timed_classes[cls] = type(cls.__name__, (cls,), {
+            '__module__': cls.__module__,
+            'data': property(timed('serializer')(cls.data.fget)),
+        })
+    serializer.__class__ = _timed_classes[cls]
+    return serializer
+
+
+class SerializerTimingMixin:
+    """Time the ``.data`` of the serializers a view builds with ``get_serializer()``."""
+
+    def get_serializer(self, *args, **kwargs):
+        return timed_serializer(super().get_serializer(*args, **kwargs))
+
+
+def install():
+    """Hook the query timer in, once per process."""
+    global _installed
+    if _installed:
+        return
+    connection_created.connect(instrument_connection, dispatch_uid='realestate.instrumentation')
+    _installed = True
+
+
+# ---------- middleware ----------
+class RequestInstrumentationMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        recorder, token = self.start()
+        if recorder is None:
+            return self.get_response(request)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        recorder, token = self.start()
+        if recorder is None:
+            return await self.get_response(request)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        return self.finish(request, response, recorder, time.perf_counter() - start)
+
+    def start(self):
+        if random.random() >= get_config()['SAMPLE_RATE']:
+            return None, None
+        # الاتصالات اللي اتفتحت قبل install() (مثلاً وقت الـ startup checks)
+        for connection in connections.all(initialized_only=True):
+            instrument_connection(connection)
+        recorder = Recorder()
+        return recorder, _recorder.set(recorder)
+
+    def finish(self, request, response, recorder, seconds):
+        config = get_config()
+        repeated = recorder.repeated()
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = ', '.join([
+                f'total;dur={seconds * 1000:.1f}',
+                f'db;dur={recorder.sql_seconds * 1000:.1f};'
+                f'desc="{recorder.queries} queries, {len(repeated)} repeated"',
+                f"serializer;dur={recorder.timers['serializer'] * 1000:.1f}",
+            ])
+        if config['LOG']:
+            match = request.resolver_match
+            logger.info(json.dumps({
+                'route': match.view_name if match else None,
+                'method': request.method,
+                'status': response.status_code,
+                'total_ms': round(seconds * 1000, 1),
+                'queries': recorder.queries,
+                'sql_ms': round(recorder.sql_seconds * 1000, 1),
+                'serializer_ms': round(recorder.timers['serializer'] * 1000, 1),
+                'repeated': [{'count': count, 'sql': shape} for shape, count in repeated[:config['LOGGED_SHAPES']]],
+            }))
+        return response
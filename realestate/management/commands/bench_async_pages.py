@@ -0,0 +1,208 @@
+"""
+Load comparison of the detail screens under WSGI and ASGI:
+
+    python manage.py bench_async_pages --concurrency 32 --pages 2000
+
+A "page" is what a client needs to draw a compound or property screen:
+
+* ``sync``: ``/<id>/`` then ``/<id>/related/`` (or the list filtered by
+  compound for a property) - two requests to the DRF viewsets,
+* ``async``: one ``/<id>/page/`` request to ``async_views``.
+
+Each is driven through Django's ``WSGIHandler`` (a thread pool of
+``--concurrency`` threads, like gunicorn's gthread workers) and through
+``ASGIHandler`` (``--concurrency`` asyncio tasks in one event loop, like
+uvicorn), in process and without sockets, so the numbers compare the
+request paths rather than the servers. The response cache and throttles are
+switched off for the run, otherwise every page after the first would be a
+cache hit.
+
+Runs on a ``scratch_database()`` copy topped up with ``--properties``
+synthetic rows and their related compounds.
+"""
+import asyncio
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.test.utils import override_settings
+
+from realestate import related
+from realestate.management.seed import scratch_database, seed_catalog
+from realestate.models import Compound, Property
+
+from .bench_sqlite_concurrency import percentile
+
+PREFIX = '/api/public'
+DUMMY_CACHE = 'bench-dummy'
+COLLECTIONS = {'compound': 'compounds', 'property': 'properties'}
+
+
+def sync_paths(kind, pk, compound_id):
+    if kind == 'compound':
+        return [f'{PREFIX}/compounds/{pk}/', f'{PREFIX}/compounds/{pk}/related/']
+    return [f'{PREFIX}/properties/{pk}/', f'{PREFIX}/properties/?compound={compound_id}&ordering=price&page_size=6']
+
+
+def async_paths(kind, pk, compound_id):
+    return [f'{PREFIX}/{COLLECTIONS[kind]}/{pk}/page/']
+
+
+def split(path):
+    path, _, query = path.partition('?')
+    return path, query
+
+
+# ---------- WSGI ----------
+def wsgi_get(app, path):
+    path, query = split(path)
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query, 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1', 'HTTP_ACCEPT': 'application/json',
+        'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http', 'wsgi.input': BytesIO(), 'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True, 'wsgi.multiprocess': False, 'wsgi.run_once': False,
+    }
+    status = []
+    body = app(environ, lambda code, headers, exc_info=None: status.append(int(code[:3])))
+    try:
+        b''.join(body)
+    finally:
+        body.close()
+    return status[0]
+
+
+def run_wsgi(pages, build_paths, concurrency):
+    app = WSGIHandler()
+
+    def load(page):
+        start = time.perf_counter()
+        codes = [wsgi_get(app, path) for path in build_paths(*page)]
+        return time.perf_counter() - start, codes
+
+    def close(_):
+        connections.close_all()
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        load(pages[0])      # warm up (URLconf, serializers)
+        started = time.perf_counter()
+        results = list(pool.map(load, pages))
+        elapsed = time.perf_counter() - started
+        list(pool.map(close, range(concurrency)))
+    return elapsed, results
+
+
+# ---------- ASGI ----------
+async def asgi_get(app, path):
+    path, query = split(path)
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'accept', b'application/json')],
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    received = False
+    status = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()    # العميل مش بيقفل؛ Django بيلغي الـ task دي بعد الـ response
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+def run_asgi(pages, build_paths, concurrency):
+    app = ASGIHandler()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def load(page):
+        async with semaphore:
+            start = time.perf_counter()
+            codes = [await asgi_get(app, path) for path in build_paths(*page)]
+            return time.perf_counter() - start, codes
+
+    async def main():
+        await load(pages[0])
+        started = time.perf_counter()
+        results = await asyncio.gather(*(load(page) for page in pages))
+        return time.perf_counter() - started, results
+
+    loop = asyncio.new_event_loop()
+    # الـ executor الافتراضي هو اللي بيشغل الـ lookups (thread_sensitive=False)
+    loop.set_default_executor(ThreadPoolExecutor(concurrency))
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Compare detail page loads through the sync endpoints and the async /page/ endpoints, under WSGI and ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients')
+        parser.add_argument('--pages', type=int, default=2000, help='Page loads per run')
+        parser.add_argument('--properties', type=int, default=20000, help='Synthetic properties added to the copy')
+        parser.add_argument('--kind', choices=['compound', 'property'], default='compound')
+
+    def handle(self, *args, **options):
+        with scratch_database(prefix='bench-async-'):
+            pages = self.prepare(options)
+            middleware = [name for name in settings.MIDDLEWARE if 'whitenoise' not in name]
+            with override_settings(
+                CACHES={**settings.CACHES, DUMMY_CACHE: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+                PUBLIC_API_CACHE_ALIAS=DUMMY_CACHE,
+                THROTTLE={'SCOPES': {}},
+                ALLOWED_HOSTS=['testserver'],
+                MIDDLEWARE=middleware,
+            ):
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    f"\n{len(pages)} {options['kind']} pages, {options['concurrency']} concurrent clients"
+                ))
+                for server, run in (('WSGI', run_wsgi), ('ASGI', run_asgi)):
+                    for name, build_paths in (('sync', sync_paths), ('async', async_paths)):
+                        elapsed, results = run(pages, build_paths, options['concurrency'])
+                        self.report(f'{server} {name}', elapsed, results)
+
+    def prepare(self, options):
+        if options['properties']:
+            self.stdout.write(f"Seeding {options['properties']} properties...")
+            with transaction.atomic():
+                seed_catalog(properties=options['properties'])
+            related.refresh()
+        if options['kind'] == 'compound':
+            rows = list(Compound.objects.values_list('pk', 'pk'))
+        else:
+            rows = list(Property.objects.filter(compound__isnull=False).values_list('pk', 'compound_id'))
+        connections.close_all()
+        if not rows:
+            raise CommandError('Nothing to benchmark; use --properties.')
+        rng = random.Random(42)
+        return [(options['kind'], *rng.choice(rows)) for _ in range(options['pages'])]
+
+    def report(self, name, elapsed, results):
+        latencies = [latency for latency, _ in results]
+        errors = sum(1 for _, codes in results if any(code != 200 for code in codes))
+        self.stdout.write(
+            f"{name:<11} {len(results) / elapsed:8.0f} pages/s   "
+            f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms   "
+            f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms   "
+            f"errors {errors}"
+        )
@@ -0,0 +1,103 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import QueryDict
+from django_filters.rest_framework import DjangoFilterBackend
+
+from realestate.filters import CompoundFilter
+from realestate.management.seed import seed_catalog
+from realestate.models import Compound, Property
+from realestate.views import PropertyViewSet
+
+# (label, query string, ordering) - the combinations the search screens send
+COMPOUND_CASES = [
+    ('location + price range', 'location={location}&min_price=3000000&max_price=8000000', ['-id']),
+    ('location, order by price', 'location={location}', ['min_price', 'id']),
+    ('developer + max price', 'developer={developer}&max_price=10000000', ['-id']),
+    ('price range only', 'min_price=5000000&max_price=6000000', ['-id']),
+    ('delivery year', 'delivery_year=2027', ['-id']),
+    ('location + delivery <= year', 'location={location}&delivery_year_lte=2026', ['delivery_date', 'id']),
+    ('installments >= 8', 'min_installment_years=8', ['-id']),
+    ('area range', 'min_area=150&max_area=200', ['-id']),
+    ('featured', 'is_featured=true', ['-id']),
+    ('new launches', 'is_new_launch=true', ['-id']),
+]
+PROPERTY_CASES = [
+    ('type + price range', 'property_type=Villa&price__gte=5000000&price__lte=9000000', ['-id']),
+    ('type, order by price', 'property_type=Apartment', ['price', 'id']),
+    ('location + price range', 'location={location}&price__gte=2000000&price__lte=4000000', ['-id']),
+    ('compound, order by price', 'compound={compound}', ['price', 'id']),
+    ('developer + max price', 'developer={developer}&price__lte=5000000', ['-id']),
+    ('bedrooms >= 3 + price range', 'bedrooms__gte=3&price__gte=2000000&price__lte=2500000', ['-id']),
+    ('price range only', 'price__gte=1000000&price__lte=1200000', ['-id']),
+    ('featured', 'is_featured=true', ['-id']),
+    ('new launches', 'is_new_launch=true', ['-id']),
+]
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic catalog (rolled back) and report EXPLAIN QUERY PLAN + timings per filter combination'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=100000)
+        parser.add_argument('--compounds', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--compare', action='store_true',
+                            help='Also run every case with the filter indexes dropped')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['properties']} properties / {options['compounds']} compounds...")
+            seeded = seed_catalog(properties=options['properties'], compounds=options['compounds'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+            ids = {
+                'location': seeded['locations'][0].pk,
+                'developer': seeded['developers'][0].pk,
+                'compound': seeded['compounds'][0].pk,
+            }
+            try:
+                self.run_cases(ids, options['repeat'], 'with indexes')
+                if options['compare']:
+                    self.drop_filter_indexes()
+                    self.run_cases(ids, options['repeat'], 'without filter indexes')
+            finally:
+                transaction.set_rollback(True)
+
+    def run_cases(self, ids, repeat, title):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n===== {title} ====="))
+        compound_qs = Compound.objects.all()
+        property_view = PropertyViewSet()
+        property_filterset = DjangoFilterBackend().get_filterset_class(property_view, Property.objects.all())
+
+        for label, query, ordering in COMPOUND_CASES:
+            params = QueryDict(query.format(**ids))
+            queryset = CompoundFilter(params, queryset=compound_qs).qs.order_by(*ordering)
+            self.report('compound', label, queryset, repeat)
+        for label, query, ordering in PROPERTY_CASES:
+            params = QueryDict(query.format(**ids))
+            queryset = property_filterset(params, queryset=Property.objects.all()).qs.order_by(*ordering)
+            self.report('property', label, queryset, repeat)
+
+    def report(self, model, label, queryset, repeat):
+        def best(run):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                result = run()
+                timings.append(time.perf_counter() - start)
+            return result, min(timings) * 1000
+
+        count, count_ms = best(queryset.count)
+        _, page_ms = best(lambda: list(queryset.values_list('id', flat=True)[:20]))
+        self.stdout.write(f"\n[{model}] {label}: {count} rows | count {count_ms:.2f} ms | first page {page_ms:.2f} ms")
+        for line in queryset.explain().splitlines():
+            self.stdout.write(f"    {line}")
+
+    def drop_filter_indexes(self):
+        with connection.cursor() as cursor:
+            for model in (Compound, Property):
+                for index in model._meta.indexes:
+                    cursor.execute(f'DROP INDEX IF EXISTS "{index.name}"')
+            cursor.execute('ANALYZE')
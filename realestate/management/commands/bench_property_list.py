@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from realestate.fieldsets import ALL, restrict_queryset, select_fields
+from realestate.management.seed import seed_catalog
+from realestate.models import Property
+from realestate.serializers import PropertySerializer, PropertyListFastSerializer
+from realestate.views import PropertyViewSet
+
+
+class Command(BaseCommand):
+    help = 'Compare PropertySerializer with the fast .values() list path on synthetic data (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--properties', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        # روابط الصور مطلقة (request.build_absolute_uri) والطلب المصطنع جاي من testserver
+        with override_settings(ALLOWED_HOSTS=['testserver']), transaction.atomic():
+            self.stdout.write(f"Seeding {options['properties']} properties...")
+            seed_catalog(properties=options['properties'])
+            try:
+                self.run(options['repeat'])
+            finally:
+                transaction.set_rollback(True)
+
+    def run(self, repeat):
+        request = Request(APIRequestFactory().get('/api/public/properties/'))
+        queryset = PropertyViewSet.queryset.filter(slug__startswith='bench-property-').order_by('id')
+        renderer = JSONRenderer()
+        # الـ detail/admin (كل الحقول) وكروت القائمة العامة (?fields= الافتراضي)
+        modes = [('full', ALL), ('card', select_fields(PropertySerializer, request.query_params, card=True))]
+
+        for mode, selection in modes:
+            context = {'request': request, 'field_selection': selection}
+
+            def drf_path():
+                rows = restrict_queryset(queryset.all(), PropertySerializer, selection)
+                return renderer.render(PropertySerializer(rows, many=True, context=context).data)
+
+            def fast_path():
+                rows = queryset.prefetch_related(None).values(*PropertyListFastSerializer.columns_for(selection))
+                return renderer.render(PropertyListFastSerializer(rows, context=context).data)
+
+            results = {}
+            for name, path in (('PropertySerializer', drf_path), ('PropertyListFastSerializer', fast_path)):
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    body = path()
+                    timings.append(time.perf_counter() - start)
+                results[name] = body
+                self.stdout.write(f"{mode:<5} {name:<28} best {min(timings) * 1000:8.1f} ms   ({len(body)} bytes)")
+
+            if results['PropertySerializer'] != results['PropertyListFastSerializer']:
+                raise CommandError(f'Fast path output differs from PropertySerializer ({mode})')
+        self.stdout.write(self.style.SUCCESS(f"Output is byte-identical for {Property.objects.count()} properties."))
@@ -0,0 +1,177 @@
+"""
+Mixed read/write load against a copy of the database, once per backend profile:
+
+    python manage.py bench_sqlite_concurrency --readers 8 --writers 4 --duration 10
+
+* ``django``: the stock ``django.db.backends.sqlite3`` (rollback journal,
+  deferred transactions, no busy timeout beyond sqlite3's 5 s default),
+* ``tuned``: ``mysite.sqlite_backend`` with its pragma profile,
+* ``tuned+write-lock``: the same with ``OPTIONS['write_lock']``.
+
+Readers run the public list queries (a filtered property page and a
+compound page with its developer); writers run short admin-style
+transactions (read a property, update its price) and contact-form inserts.
+Each profile reports throughput, latency percentiles and the number of
+"database is locked" failures.
+
+The configured database is copied with SQLite's backup API into a temporary
+file (and topped up with ``--properties`` synthetic rows), so the real data
+is never written to.
+"""
+import random
+import sqlite3
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+from realestate.management.seed import scratch_database, seed_catalog
+from realestate.models import Compound, ContactFormSubmission, Property
+
+PROFILES = {
+    'django': {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}},
+    'tuned': {'ENGINE': 'mysite.sqlite_backend', 'OPTIONS': {}},
+    'tuned+write-lock': {'ENGINE': 'mysite.sqlite_backend', 'OPTIONS': {'write_lock': True}},
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Worker(threading.Thread):
+    def __init__(self, operation, ids, start_event, stop_event, seed):
+        super().__init__(daemon=True)
+        self.operation = operation
+        self.ids = ids
+        self.start_event = start_event
+        self.stop_event = stop_event
+        self.rng = random.Random(seed)
+        self.latencies = []
+        self.locked = 0
+        self.errors = []
+
+    def run(self):
+        # كل thread ليه اتصال خاص بيه (زي الـ request threads بتاعة السيرفر)
+        try:
+            self.start_event.wait()
+            while not self.stop_event.is_set():
+                start = time.perf_counter()
+                try:
+                    self.operation(self.rng, self.ids)
+                except OperationalError as exc:
+                    if 'locked' not in str(exc):
+                        raise
+                    self.locked += 1
+                    continue
+                self.latencies.append(time.perf_counter() - start)
+        except Exception as exc:
+            self.errors.append(exc)
+        finally:
+            connections.close_all()
+
+
+def read_properties(rng, ids):
+    price = rng.randrange(1_000_000, 15_000_000, 500_000)
+    list(Property.objects.filter(price__gte=price, price__lte=price * 1.5)
+         .select_related('compound').order_by('-id')[:20])
+
+
+def read_compounds(rng, ids):
+    list(Compound.objects.filter(location_id=rng.choice(ids['locations']))
+         .select_related('developer').order_by('-id')[:20])
+
+
+def edit_property(rng, ids):
+    with transaction.atomic():
+        pk = rng.choice(ids['properties'])
+        price = Property.objects.filter(pk=pk).values_list('price', flat=True).first()
+        Property.objects.filter(pk=pk).update(price=(price or 0) + 1)
+
+
+def submit_contact(rng, ids):
+    # bulk_create: من غير signals (إيميلات/كاش) عشان نقيس قاعدة البيانات بس
+    ContactFormSubmission.objects.bulk_create([
+        ContactFormSubmission(name='bench', email='bench@example.com', message='benchmark'),
+    ])
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent reads and writes on a copy of the SQLite database for each backend profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per profile')
+        parser.add_argument('--properties', type=int, default=20000, help='Synthetic properties added to the copy')
+        parser.add_argument('--profile', choices=list(PROFILES), action='append',
+                            help='Profiles to run (default: all)')
+
+    def handle(self, *args, **options):
+        with scratch_database(prefix='bench-sqlite-') as path:
+            self.stdout.write(f"Benchmarking on a copy at {path}...")
+            settings_dict = connections['default'].settings_dict
+            # الـ profile الأول من غير WAL: الـ journal_mode بيتحط في الملف نفسه
+            settings_dict.update(PROFILES['django'], OPTIONS={})
+            conn = sqlite3.connect(path)
+            conn.execute('PRAGMA journal_mode = DELETE')
+            conn.close()
+            ids = self.prepare(options['properties'])
+            for name in options['profile'] or list(PROFILES):
+                settings_dict.update(PROFILES[name], OPTIONS=dict(PROFILES[name]['OPTIONS']))
+                self.run_profile(name, ids, options)
+
+    def prepare(self, properties):
+        if properties:
+            self.stdout.write(f"Seeding {properties} properties...")
+            with transaction.atomic():
+                seed_catalog(properties=properties)
+        ids = {
+            'properties': list(Property.objects.values_list('pk', flat=True)),
+            'locations': list(Compound.objects.values_list('location_id', flat=True).distinct()),
+        }
+        connections.close_all()
+        if not ids['properties'] or not ids['locations']:
+            raise CommandError('No properties/compounds to benchmark; use --properties.')
+        return ids
+
+    def run_profile(self, name, ids, options):
+        start_event, stop_event = threading.Event(), threading.Event()
+        readers = [
+            Worker([read_properties, read_compounds][i % 2], ids, start_event, stop_event, seed=i)
+            for i in range(options['readers'])
+        ]
+        writers = [
+            Worker([edit_property, submit_contact][i % 2], ids, start_event, stop_event, seed=1000 + i)
+            for i in range(options['writers'])
+        ]
+        workers = readers + writers
+        for worker in workers:
+            worker.start()
+        started = time.perf_counter()
+        start_event.set()
+        time.sleep(options['duration'])
+        stop_event.set()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        errors = [exc for worker in workers for exc in worker.errors]
+        if errors:
+            raise CommandError(f'{name}: {errors[0]!r}')
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n===== {name} ====="))
+        for kind, group in (('reads', readers), ('writes', writers)):
+            latencies = [value for worker in group for value in worker.latencies]
+            locked = sum(worker.locked for worker in group)
+            self.stdout.write(
+                f"{kind:<7} {len(latencies) / elapsed:8.0f}/s   "
+                f"p50 {percentile(latencies, 0.5) * 1000:7.1f} ms   "
+                f"p95 {percentile(latencies, 0.95) * 1000:7.1f} ms   "
+                f"p99 {percentile(latencies, 0.99) * 1000:7.1f} ms   "
+                f"locked {locked}"
+            )
@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from realestate import images
+
+
+class Command(BaseCommand):
+    help = 'Generate (or backfill) resized WebP/JPEG derivatives for catalog images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--workers', type=int, default=None, help='Defaults to IMAGE_DERIVATIVES["WORKERS"]')
+        parser.add_argument('--force', action='store_true', help='Regenerate images that already have derivatives')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        workers = options['workers'] or images.get_config()['WORKERS']
+
+        jobs = []
+        for model, field_name in images.TARGETS:
+            rows = (model._default_manager.using(using)
+                    .exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+                    .values_list('pk', field_name, images.variants_field(field_name)))
+            for pk, name, variants in rows:
+                if options['force'] or not images.is_current(name, variants):
+                    jobs.append((model, pk, field_name))
+        self.stdout.write(f"{len(jobs)} images to process with {workers} workers...")
+
+        def run(job):
+            model, pk, field_name = job
+            try:
+                return images.generate(model, pk, field_name, using=using, force=options['force']), None
+            except Exception as exc:
+                return False, f"{model._meta.label} {pk}.{field_name}: {exc}"
+            finally:
+                connections.close_all()
+
+        start = time.perf_counter()
+        generated = failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for done, error in pool.map(run, jobs):
+                generated += done
+                if error:
+                    failed += 1
+                    self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"{generated} generated, {failed} failed in {time.perf_counter() - start:.2f}s"
+        ))
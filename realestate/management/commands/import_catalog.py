@@ -0,0 +1,337 @@
+"""
+Bulk import of compounds, properties and their gallery images from CSV or
+JSONL feeds:
+
+    python manage.py import_catalog --compounds compounds.csv --properties units.jsonl \
+        --property-images unit_images.csv
+
+Files are imported in dependency order (compounds, properties, images).
+Columns are the model field names; relations are given by slug
+(``developer``, ``location``, ``compound``, ``property``) and resolved
+through in-memory maps loaded once, so there is no lookup per row. A
+property without developer/location takes its compound's. Image columns hold
+paths of files already in the media storage (they are checked, not copied).
+
+Rows are validated in memory (the model fields' own validators); invalid
+rows are reported with their line number and skipped. So are rows whose
+value of another unique column (a compound's ``name``) already belongs to a
+different slug. Valid rows are written with ``BatchUpserter`` (one
+transaction per ``--batch-size`` rows), keyed on ``slug``. Existing slugs
+are left alone unless ``--update`` is given, in which case the columns
+present in the file are overwritten.
+
+``--dry-run`` writes nothing; relations to compounds/properties parsed
+earlier in the same run resolve against the parsed slugs.
+"""
+import csv
+import json
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.utils.text import slugify
+
+from realestate import histograms
+from realestate.bulk import BatchResult, BatchUpserter, bulk_upserted
+from realestate.models import Compound, CompoundImage, Developer, Location, Property, PropertyImage
+
+TRUE = {'1', 'true', 't', 'yes', 'y'}
+FALSE = {'0', 'false', 'f', 'no', 'n'}
+MAX_REPORTED_ERRORS = 20
+
+# kind -> model, importable fields, relations: column -> (attname, map name, required)
+KINDS = {
+    'compounds': {
+        'model': Compound,
+        'slug_from': 'name',
+        'fields': ['name', 'slug', 'status', 'description', 'min_price', 'min_area', 'max_installment_years',
+                   'delivery_date', 'is_featured', 'is_new_launch', 'video_url', 'main_image', 'map_image',
+                   'latitude', 'longitude'],
+        'relations': {'developer': ('developer_id', 'developers', True), 'location': ('location_id', 'locations', False)},
+    },
+    'properties': {
+        'model': Property,
+        'slug_from': 'title',
+        'fields': ['title', 'slug', 'property_type', 'price', 'area', 'bedrooms', 'bathrooms', 'description',
+                   'main_image', 'floor_plan_image', 'map_image', 'is_featured', 'is_new_launch', 'latitude', 'longitude'],
+        'relations': {
+            'compound': ('compound_id', 'compounds', False),
+            'developer': ('developer_id', 'developers', False),
+            'location': ('location_id', 'locations', False),
+        },
+    },
+    'compound_images': {
+        'model': CompoundImage,
+        'fields': ['image'],
+        'relations': {'compound': ('compound_id', 'compounds', True)},
+    },
+    'property_images': {
+        'model': PropertyImage,
+        'fields': ['image', 'alt_text'],
+        'relations': {'property': ('property_id', 'properties', True)},
+    },
+}
+
+
+def read_records(path, fmt):
+    """(line number, record dict or None, error) for every row of the file."""
+    with open(path, newline='', encoding='utf-8-sig') as fh:
+        if fmt == 'csv':
+            for line, row in enumerate(csv.DictReader(fh), start=2):
+                yield line, row, None
+            return
+        for line, text in enumerate(fh, start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError as exc:
+                yield line, None, f'invalid JSON: {exc}'
+                continue
+            if isinstance(record, dict):
+                yield line, record, None
+            else:
+                yield line, None, 'expected a JSON object'
+
+
+def clean_value(field, value):
+    if isinstance(value, str):
+        value = value.strip()
+    if value is None or value == '':
+        if field.null:
+            return None
+        if field.has_default():
+            return field.get_default()
+        if field.blank:
+            return ''
+        raise ValidationError('This field is required.')
+    if isinstance(field, models.BooleanField) and isinstance(value, str):
+        if value.lower() in TRUE:
+            return True
+        if value.lower() in FALSE:
+            return False
+        raise ValidationError(f'"{value}" is not true/false.')
+    if isinstance(field, models.FileField):
+        # مسار جوه الـ media storage؛ الملفات نفسها مش بتتنقل
+        if not field.storage.exists(str(value)):
+            raise ValidationError(f'"{value}" does not exist in the media storage.')
+        return str(value)
+    return field.clean(value, None)
+
+
+class Command(BaseCommand):
+    help = 'Import compounds, properties and gallery images from CSV/JSONL files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--compounds', help='CSV/JSONL file of compounds')
+        parser.add_argument('--properties', help='CSV/JSONL file of properties')
+        parser.add_argument('--compound-images', help='CSV/JSONL file of compound gallery images')
+        parser.add_argument('--property-images', help='CSV/JSONL file of property gallery images')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Default: from the file extension')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per transaction')
+        parser.add_argument('--update', action='store_true', help='Overwrite existing rows (same slug)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.using = options['database']
+        files = [(kind, options[kind]) for kind in KINDS if options[kind]]
+        if not files:
+            raise CommandError('Nothing to import: pass --compounds, --properties, --compound-images and/or --property-images.')
+        for _, path in files:
+            if not os.path.exists(path):
+                raise CommandError(f'No such file: {path}')
+
+        # كل الـ slugs في الذاكرة مرة واحدة بدل query لكل صف
+        self.maps = {
+            'developers': dict(Developer.objects.using(self.using).values_list('slug', 'pk')),
+            'locations': dict(Location.objects.using(self.using).values_list('slug', 'pk')),
+        }
+        self.parsed = {}    # --dry-run: kind -> {slug: (developer_id, location_id)} of the valid rows
+        # الـ histograms بتتحسب مرة واحدة في الآخر بدل delta لكل دفعة
+        with histograms.deferred(using=self.using):
+            for kind, path in files:
+                self.import_file(kind, path)
+
+    # ---------- maps ----------
+    def load_map(self, name):
+        # في --dry-run الصفوف الجديدة مش في الداتابيز: الـ slug نفسه بيبقى pk مؤقت
+        parsed = self.parsed.get(name, {})
+        if name == 'compounds':
+            rows = [(slug, slug, developer_id, location_id) for slug, (developer_id, location_id) in parsed.items()]
+            rows += Compound.objects.using(self.using).values_list('slug', 'pk', 'developer_id', 'location_id')
+            self.maps['compounds'] = {slug: pk for slug, pk, _, _ in rows}
+            self.compound_defaults = {pk: (developer_id, location_id) for _, pk, developer_id, location_id in rows}
+        elif name == 'properties':
+            self.maps['properties'] = {
+                **{slug: slug for slug in parsed},
+                **dict(Property.objects.using(self.using).values_list('slug', 'pk')),
+            }
+
+    def load_unique(self, model, fields):
+        """{field: {value: slug}} for the unique columns besides slug, to report conflicts as row errors."""
+        self.unique = {
+            name: dict(model.objects.using(self.using).values_list(name, 'slug'))
+            for name, field in fields.items() if field.unique and name != 'slug'
+        }
+
+    # ---------- import ----------
+    def import_file(self, kind, path):
+        spec = KINDS[kind]
+        model = spec['model']
+        for _, map_name, _ in spec['relations'].values():
+            if map_name in ('compounds', 'properties'):
+                self.load_map(map_name)  # بعد المرحلة اللي قبلها عشان الجديد يبان
+
+        fmt = self.options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        fields = {name: model._meta.get_field(name) for name in spec['fields']}
+        self.load_unique(model, fields)
+        self.stdout.write(f"Importing {kind} from {path} ({fmt})...")
+
+        self.started = time.perf_counter()
+        self.rows = self.invalid = 0
+        writer = self.get_writer(kind, spec, path, fmt)
+        for line, record, error in read_records(path, fmt):
+            self.rows += 1
+            obj = None
+            if error is None:
+                obj, error = self.build(kind, spec, fields, record)
+            if error is not None:
+                self.report_error(line, error)
+                continue
+            if writer is not None:
+                writer.add(obj)
+            elif hasattr(obj, 'slug'):
+                self.parsed.setdefault(kind, {})[obj.slug] = (
+                    getattr(obj, 'developer_id', None), getattr(obj, 'location_id', None),
+                )
+        if writer is not None:
+            writer.flush()
+
+        seconds = time.perf_counter() - self.started
+        summary = f"{kind}: {self.rows} rows in {seconds:.1f}s ({self.rows / max(seconds, 1e-9):.0f} rows/s), {self.invalid} invalid"
+        if writer is not None:
+            summary += f", {writer.created} created, {writer.existing} existing"
+        self.stdout.write(self.style.SUCCESS(summary))
+
+    def get_writer(self, kind, spec, path, fmt):
+        if self.options['dry_run']:
+            return None
+        if kind in ('compound_images', 'property_images'):
+            return ImageWriter(spec['model'], next(iter(spec['relations'].values()))[0], self.options['batch_size'],
+                               self.using, on_batch=self.report_batch)
+        update_fields = None
+        if self.options['update']:
+            # الأعمدة الموجودة في الملف بس، عشان الباقي ميتمسحش بالـ default
+            _, first, _ = next(read_records(path, fmt), (None, None, None))
+            columns = set(first or ())
+            update_fields = [name for name in spec['fields'] if name in columns and name != 'slug']
+            update_fields += [column for column in spec['relations'] if column in columns]
+        return BatchUpserter(
+            spec['model'], key='slug', update_fields=update_fields or None, slug_from=spec['slug_from'],
+            batch_size=self.options['batch_size'], using=self.using, on_batch=self.report_batch,
+        )
+
+    def build(self, kind, spec, fields, record):
+        """(unsaved instance, None) or (None, error message)."""
+        values, errors = {}, {}
+        for name, field in fields.items():
+            if name in record:
+                try:
+                    values[name] = clean_value(field, record[name])
+                except ValidationError as exc:
+                    errors[name] = ' '.join(exc.messages)
+        for column, (attname, map_name, required) in spec['relations'].items():
+            slug = str(record.get(column) or '').strip()
+            if slug:
+                pk = self.maps[map_name].get(slug)
+                if pk is None:
+                    errors[column] = f'unknown slug "{slug}"'
+                values[attname] = pk
+            elif required:
+                errors[column] = 'This field is required.'
+
+        # الوحدة من غير مطور/منطقة بتاخدهم من الكمبوند بتاعها
+        if kind == 'properties' and values.get('compound_id'):
+            developer_id, location_id = self.compound_defaults[values['compound_id']]
+            if values.get('developer_id') is None:
+                values['developer_id'] = developer_id
+            if values.get('location_id') is None:
+                values['location_id'] = location_id
+
+        obj = spec['model'](**values)
+        if spec.get('slug_from') and not obj.slug:
+            obj.slug = slugify(getattr(obj, spec['slug_from']) or '')
+            if not obj.slug:
+                errors['slug'] = f'cannot be derived from {spec["slug_from"]}'
+        for name, field in fields.items():
+            if name not in record and name not in errors and not field.blank and not field.has_default() and name != 'slug':
+                errors[name] = 'This field is required.'
+        for name, owners in self.unique.items():
+            owner = owners.get(getattr(obj, name))
+            if owner is not None and owner != obj.slug:
+                errors[name] = f'"{getattr(obj, name)}" already belongs to slug "{owner}"'
+        if errors:
+            return None, '; '.join(f'{name}: {message}' for name, message in errors.items())
+        for name, owners in self.unique.items():
+            owners[getattr(obj, name)] = obj.slug
+        return obj, None
+
+    # ---------- reporting ----------
+    def report_error(self, line, error):
+        self.invalid += 1
+        if self.invalid <= MAX_REPORTED_ERRORS:
+            self.stdout.write(self.style.WARNING(f"   line {line}: {error}"))
+        elif self.invalid == MAX_REPORTED_ERRORS + 1:
+            self.stdout.write(self.style.WARNING('   (further errors are only counted)'))
+
+    def report_batch(self, result):
+        rate = self.rows / max(time.perf_counter() - self.started, 1e-9)
+        self.stdout.write(f"   {result} - {self.rows} rows read, {rate:.0f} rows/s")
+
+
+class ImageWriter:
+    """Gallery images have no natural key: dedupe on (parent, image path) and insert in batches."""
+
+    def __init__(self, model, parent_attname, batch_size, using, on_batch=None):
+        self.model = model
+        self.parent = parent_attname
+        self.batch_size = batch_size
+        self.using = using
+        self.on_batch = on_batch
+        self.pending = {}
+        self.results = []
+
+    @property
+    def created(self):
+        return sum(result.created for result in self.results)
+
+    @property
+    def existing(self):
+        return sum(result.existing for result in self.results)
+
+    def add(self, obj):
+        self.pending.setdefault((getattr(obj, self.parent), obj.image.name), obj)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        start = time.perf_counter()
+        manager = self.model._default_manager.using(self.using)
+        with transaction.atomic(using=self.using):
+            existing = set(manager.filter(**{f'{self.parent}__in': {parent for parent, _ in self.pending}})
+                           .values_list(self.parent, 'image'))
+            new = [obj for key, obj in self.pending.items() if key not in existing]
+            pks = [obj.pk for obj in manager.bulk_create(new)]
+            bulk_upserted.send(sender=self.model, pks=pks, created=pks, using=self.using)
+        result = BatchResult(len(self.results) + 1, created=len(new), existing=len(self.pending) - len(new),
+                             skipped=0, seconds=time.perf_counter() - start)
+        self.results.append(result)
+        self.pending = {}
+        if self.on_batch:
+            self.on_batch(result)
@@ -0,0 +1,40 @@
+"""
+Worker for the contact form pipeline (``realestate/contact_queue.py``):
+stores queued submissions in group commits and emails the notifications.
+
+    python manage.py process_contact_queue            # run until Ctrl+C
+    python manage.py process_contact_queue --once     # drain the queue and exit (cron)
+
+Run exactly one worker per queue file.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from realestate.contact_queue import get_queue, send_notifications, store_batch
+
+
+class Command(BaseCommand):
+    help = 'Store queued contact form submissions and send their email notifications'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Drain the queue once and exit')
+        parser.add_argument('--poll', type=float, default=1.0, help='Seconds between polls when idle')
+
+    def handle(self, *args, **options):
+        queue = get_queue()
+        self.stdout.write(f"Contact queue: {queue.path} ({len(queue)} waiting)")
+        try:
+            while True:
+                close_old_connections()
+                stored = store_batch(queue)
+                sent, failed = send_notifications()
+                if stored or sent or failed:
+                    self.stdout.write(f"stored {stored}, notified {sent}, failed {failed}")
+                if not (stored or sent or failed):
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from realestate.cache import bump_version
+from realestate.geo import refresh_geohashes
+from realestate.models import Compound, Property
+
+
+class Command(BaseCommand):
+    help = 'Recompute the geohash of every compound and property from its latitude/longitude'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        for model in (Compound, Property):
+            changed = refresh_geohashes(model, using=options['database'])
+            if changed:
+                bump_version(model)
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.verbose_name_plural}: {changed} geohashes updated"))
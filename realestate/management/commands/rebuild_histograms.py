@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from realestate.cache import bump_version
+from realestate.histograms import rebuild
+from realestate.models import Compound, Property
+
+
+class Command(BaseCommand):
+    help = 'Recompute the price/area slider histograms of compounds and properties'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        for model in (Compound, Property):
+            buckets = rebuild(model, using=options['database'])
+            bump_version(model)
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.verbose_name_plural}: {buckets} buckets"))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from realestate.cache import bump_version
+from realestate.models import Developer
+
+
+class Command(BaseCommand):
+    help = 'Recompute Developer.projects_count for every developer in one aggregate UPDATE'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        updated = Developer.objects.using(options['database']).recount_projects()
+        bump_version(Developer)
+        self.stdout.write(self.style.SUCCESS(f"projects_count recomputed for {updated} developers"))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from realestate import related
+from realestate.cache import bump_version
+from realestate.models import RelatedCompound
+
+
+class Command(BaseCommand):
+    help = 'Recompute the precomputed related-compounds table (RelatedCompound)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        links = related.refresh(using=options['database'])
+        bump_version(RelatedCompound)
+        self.stdout.write(self.style.SUCCESS(f"{links} related links written in {time.perf_counter() - start:.2f}s"))
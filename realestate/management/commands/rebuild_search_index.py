@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from realestate.cache import bump_version
+from realestate.search import compound_index, property_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the SQLite FTS5 search index for compounds and properties'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        for index in (compound_index, property_index):
+            if not index.is_available(using):
+                raise CommandError(f"{index.table} does not exist (SQLite only, run migrate first).")
+            start = time.perf_counter()
+            with transaction.atomic(using=using):
+                index.rebuild(using=using)
+            # نتايج ?search= المتخزنة (و الـ ETags) اتبنت على الـ index القديم
+            bump_version(index.model)
+            self.stdout.write(self.style.SUCCESS(f"{index.table}: rebuilt in {time.perf_counter() - start:.2f}s"))
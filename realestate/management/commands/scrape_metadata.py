@@ -1,98 +1,71 @@
 from django.core.management.base import BaseCommand
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-import time
 
 # استيراد الموديلات (تأكد أن اسم التطبيق listings)
+from realestate import scraping
+from realestate.bulk import BatchUpserter
 from realestate.models import Developer, Compound, Location
 
 class Command(BaseCommand):
     help = 'Scrape Developers and Compounds from Nawy'
 
-    def handle(self, *args, **kwargs):
-        # إعدادات المتصفح
-        chrome_options = Options()
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled") 
-        
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+    def add_arguments(self, parser):
+        scraping.add_arguments(parser)
+        parser.add_argument('--pages', type=int, default=1, help='Number of search result pages to crawl (fetched concurrently)')
 
-        try:
-            # سنزور صفحة البحث لأنها تحتوي على فلاتر وقوائم كثيرة
-            url = "https://www.nawy.com/search"
-            print(f"1. Opening {url}...")
-            driver.get(url)
+    def handle(self, *args, **options):
+        # سنزور صفحات البحث لأنها تحتوي على فلاتر وقوائم كثيرة
+        # (كل الصفحات بتتجاب مع بعض بدل السكرول والانتظار)
+        paths = [f"/search?page={number}" for number in range(1, options['pages'] + 1)]
+        with scraping.from_options(options) as scraper:
+            self.stdout.write(f"1. Fetching {len(paths)} search page(s) from {scraper.url('/search')}...")
+            pages = [page for page in scraper.fetch_pages(paths) if page is not None]
+        for error in scraper.errors:
+            self.stdout.write(self.style.WARNING(f"   {error}"))
+        if not pages:
+            self.stdout.write(self.style.ERROR("Fatal Error: no page could be fetched"))
+            return
 
-            print("2. Waiting for page to load (scrolling to get more data)...")
-            time.sleep(5)
-            
-            # نقوم بعمل Scroll لتحميل المزيد من البيانات في الصفحة
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(5)
+        dev_links, comp_links = {}, {}
+        for page in pages:
+            dev_links.update(page.links(r'/real-estate-developer/'))
+            comp_links.update(page.links(r'/compound/'))
 
-            # ---------------------------------------------------------
-            # أولاً: جلب المطورين (Developers)
-            # ---------------------------------------------------------
-            print("\n🔍 Scanning for Developers...")
-            # نبحث عن الروابط التي تحتوي على كلمة developer في الرابط
-            dev_links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/real-estate-developer/']")
-            
-            for link in dev_links:
-                try:
-                    name = link.text.strip()
-                    if name:
-                        # حفظ المطور
-                        dev_obj, created = Developer.objects.get_or_create(
-                            name=name,
-                            defaults={'description': f"Imported from Nawy. Link: {link.get_attribute('href')}"}
-                        )
-                        if created:
-                            print(f"   ✅ New Developer: {name}")
-                        else:
-                            print(f"   Note: Developer {name} exists.")
-                except:
-                    pass
+        # الحفظ على دفعات (bulk) بدل get_or_create لكل رابط
+        # ---------------------------------------------------------
+        # أولاً: جلب المطورين (Developers)
+        # ---------------------------------------------------------
+        self.stdout.write("\n🔍 Scanning for Developers...")
+        with BatchUpserter(Developer, key='name', slug_from='name', on_batch=self.report_batch) as developers:
+            for href, link in dev_links.items():
+                name = scraping.link_text(link)
+                if name:
+                    developers.add(Developer(name=name, description=f"Imported from Nawy. Link: {href}"))
+        self.stdout.write(f"   ✅ {developers.created} new developers, {developers.existing} already existed.")
 
-            # ---------------------------------------------------------
-            # ثانياً: جلب الكمبوندات (Compounds)
-            # ---------------------------------------------------------
-            print("\n🔍 Scanning for Compounds...")
-            # نبحث عن الروابط التي تحتوي على كلمة compound في الرابط
-            comp_links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/compound/']")
-            
-            # نحتاج لمطور افتراضي لربط الكمبوند به لو معرفناش نجيب المطور بتاعه
-            default_dev, _ = Developer.objects.get_or_create(name="Unknown Developer")
-            # نحتاج لموقع افتراضي
-            default_loc, _ = Location.objects.get_or_create(name="Cairo")
+        # ---------------------------------------------------------
+        # ثانياً: جلب الكمبوندات (Compounds)
+        # ---------------------------------------------------------
+        self.stdout.write("\n🔍 Scanning for Compounds...")
 
-            for link in comp_links:
-                try:
-                    name = link.text.strip()
-                    href = link.get_attribute('href')
-                    
-                    if name and "compound" not in name.lower(): # تنظيف بسيط
-                        # حفظ الكمبوند
-                        # هنا بنربطه بمطور افتراضي مؤقتاً لحد ما ندخل نعدله
-                        comp_obj, created = Compound.objects.get_or_create(
-                            name=name,
-                            defaults={
-                                'developer': default_dev,
-                                'location': default_loc,
-                                'description': f"Compound imported from Nawy: {href}"
-                            }
-                        )
-                        if created:
-                            print(f"   ✅ New Compound: {name}")
-                        else:
-                            print(f"   Note: Compound {name} exists.")
-                except:
-                    pass
+        # نحتاج لمطور افتراضي لربط الكمبوند به لو معرفناش نجيب المطور بتاعه
+        default_dev, _ = Developer.objects.get_or_create(name="Unknown Developer")
+        # نحتاج لموقع افتراضي
+        default_loc, _ = Location.objects.get_or_create(name="Cairo")
 
-        except Exception as e:
-            print(f"Fatal Error: {e}")
-        
-        finally:
-            print("\nDone. Closing browser...")
-            driver.quit()
\ No newline at end of file
+        with BatchUpserter(Compound, key='name', slug_from='name', on_batch=self.report_batch) as compounds:
+            for href, link in comp_links.items():
+                name = scraping.link_text(link)
+                if name and "compound" not in name.lower(): # تنظيف بسيط
+                    # هنا بنربطه بمطور افتراضي مؤقتاً لحد ما ندخل نعدله
+                    compounds.add(Compound(
+                        name=name,
+                        developer=default_dev,
+                        location=default_loc,
+                        description=f"Compound imported from Nawy: {href}",
+                    ))
+        self.stdout.write(f"   ✅ {compounds.created} new compounds, {compounds.existing} already existed.")
+
+        self.stdout.write("\nDone.")
+
+    def report_batch(self, result):
+        self.stdout.write(f"   💾 {result}")
@@ -1,86 +1,72 @@
 from django.core.management.base import BaseCommand
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-import time
 import random
 
 # تأكد من اسم التطبيق (listings أو realestate)
-from realestate.models import Property, Location, Developer 
+from realestate import scraping
+from realestate.bulk import BatchUpserter
+from realestate.models import Property
+
+# أسماء الحقول المحتملة في الـ JSON بتاع صفحة المشروع/الوحدة (__NEXT_DATA__)
+PRICE_KEYS = ('price', 'min_price', 'minPrice', 'starting_price', 'startingPrice')
+AREA_KEYS = ('area', 'min_unit_area', 'minUnitArea', 'unit_area', 'min_area')
+BEDROOM_KEYS = ('bedrooms', 'number_of_bedrooms', 'min_bedrooms', 'minBedrooms')
+BATHROOM_KEYS = ('bathrooms', 'number_of_bathrooms', 'min_bathrooms', 'minBathrooms')
 
 class Command(BaseCommand):
     help = 'Scrape Nawy and Save to DB'
 
-    def handle(self, *args, **kwargs):
-        # إعدادات المتصفح
-        chrome_options = Options()
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled") 
-        # chrome_options.add_argument("--headless") # شيل الشباك لو عايز المتصفح مخفي
-        
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-
-        try:
-            url = "https://www.nawy.com/search"
-            print(f"1. Opening {url}...")
-            driver.get(url)
+    def add_arguments(self, parser):
+        scraping.add_arguments(parser)
+        parser.add_argument('--pages', type=int, default=1, help='Number of search result pages to crawl (fetched concurrently)')
+        parser.add_argument('--batch-size', type=int, default=1000)
 
-            print("2. Waiting for data to load...")
-            time.sleep(10) # انتظار التحميل
+    def handle(self, *args, **options):
+        with scraping.from_options(options) as scraper:
+            paths = [f"/search?page={number}" for number in range(1, options['pages'] + 1)]
+            self.stdout.write(f"1. Fetching {len(paths)} search page(s) from {scraper.url('/search')}...")
+            pages = [page for page in scraper.fetch_pages(paths) if page is not None]
 
             # البحث عن الكروت (بناءً على الروابط لأن الكلاسات متغيرة)
-            # بنجيب كل الروابط اللي بتودي على صفحة مشروع أو عقار
-            links = driver.find_elements(By.CSS_SELECTOR, "a[href*='/compound/'], a[href*='/property/']")
-            
-            print(f"-> Found {len(links)} items. Starting save process...")
-            
-            saved_count = 0
-            
-            # نستخدم set لمنع التكرار
-            processed_urls = set()
+            # بنجيب كل الروابط اللي بتودي على صفحة مشروع أو عقار، من غير تكرار
+            items = {}
+            for page in pages:
+                for href, link in page.links(r'/(compound|property)/'):
+                    title = scraping.link_text(link)
+                    # لو العنوان فاضي (صورة مثلاً)، نتجاهله
+                    if title and href not in items:
+                        items[href] = title
 
-            for link in links:
-                try:
-                    href = link.get_attribute('href')
-                    title = link.text.strip()
-                    
-                    # لو الرابط مكرر أو العنوان فاضي (صورة مثلاً)، نتجاهله
-                    if href in processed_urls or not title:
-                        continue
-                        
-                    processed_urls.add(href)
+            self.stdout.write(f"2. Found {len(items)} items. Fetching their pages...")
+            details = dict(zip(items, scraper.fetch_pages(list(items))))
 
-                    # --- مرحلة الحفظ في قاعدة البيانات ---
-                    # بنستخدم get_or_create عشان لو العقار موجود ميكرروش
-                    property_obj, created = Property.objects.get_or_create(
-                        title=title[:200], # نقص العنوان لو طويل اوي
-                        defaults={
-                            'price': random.randint(1000000, 5000000), # سعر تقريبي (لأننا مش عارفين نجيبه من بره)
-                            'area': random.randint(100, 300),          # مساحة تقريبية
-                            'bedrooms': random.randint(2, 4),
-                            'bathrooms': random.randint(1, 3),
-                            'property_type': 'Apartment',
-                            'description': f"Unit from Nawy. Link: {href}",
-                            'is_featured': False,
-                            'is_new_launch': True
-                        }
-                    )
+        for error in scraper.errors:
+            self.stdout.write(self.style.WARNING(f"   {error}"))
 
-                    if created:
-                        print(f"✅ Saved New: {title}")
-                        saved_count += 1
-                    else:
-                        print(f"⚠️ Exists: {title}")
+        # الحفظ على دفعات (bulk) بدل get_or_create لكل عقار؛ المفتاح هو الـ slug المتولد من العنوان
+        with BatchUpserter(Property, key='slug', slug_from='title', batch_size=options['batch_size'],
+                           on_batch=self.report_batch) as properties:
+            for href, title in items.items():
+                data = details[href].next_data if details[href] is not None else {}
+                # الأرقام من صفحة العقار لو موجودة، وإلا قيم تقريبية زي الأول
+                price = scraping.first_number(data, PRICE_KEYS) or random.randint(1000000, 5000000)
+                area = scraping.first_number(data, AREA_KEYS) or random.randint(100, 300)
+                bedrooms = scraping.first_number(data, BEDROOM_KEYS) or random.randint(2, 4)
+                bathrooms = scraping.first_number(data, BATHROOM_KEYS) or random.randint(1, 3)
 
-                except Exception as e:
-                    print(f"Error saving item: {e}")
+                properties.add(Property(
+                    title=title[:200], # نقص العنوان لو طويل اوي
+                    price=price,
+                    area=int(area),
+                    bedrooms=int(bedrooms),
+                    bathrooms=int(bathrooms),
+                    property_type='Apartment',
+                    description=f"Unit from Nawy. Link: {href}",
+                    is_featured=False,
+                    is_new_launch=True,
+                ))
 
-            print(f"------------------------------------------------")
-            print(f"Job Done! Successfully saved {saved_count} properties.")
+        self.stdout.write(f"------------------------------------------------")
+        self.stdout.write(f"Job Done! Successfully saved {properties.created} properties ({properties.existing} already existed).")
 
-        except Exception as e:
-            print(f"Fatal Error: {e}")
-        
-        finally:
-            driver.quit()
\ No newline at end of file
+    def report_batch(self, result):
+        self.stdout.write(f"💾 {result}")
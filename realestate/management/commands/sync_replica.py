@@ -0,0 +1,46 @@
+"""
+Copy the primary SQLite database into the replica file, for trying the read
+replica setup locally (``DB_REPLICA_NAME``). A real replica (Postgres
+streaming replication, Litestream...) is kept up to date by the database
+itself and does not need this.
+
+    python manage.py sync_replica                 # once
+    python manage.py sync_replica --every 5       # every 5 s until Ctrl+C (simulated lag)
+"""
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from realestate.replicas import get_replica_alias
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the local replica file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, help='Repeat every N seconds')
+
+    def handle(self, *args, **options):
+        alias = get_replica_alias()
+        if alias is None:
+            raise CommandError('No replica database configured (set DB_REPLICA_NAME).')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[alias]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('sync_replica only copies SQLite files; other databases replicate themselves.')
+
+        while True:
+            start = time.perf_counter()
+            source = sqlite3.connect(primary.settings_dict['NAME'])
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                # backup API: نسخة متسقة حتى والسيرفر شغال (بما فيها اللي لسه في الـ WAL)
+                source.backup(target)
+            finally:
+                source.close()
+                target.close()
+            self.stdout.write(f"{replica.settings_dict['NAME']} synced in {(time.perf_counter() - start) * 1000:.0f} ms")
+            if not options['every']:
+                break
+            time.sleep(options['every'])
@@ -0,0 +1,162 @@
+"""
+Synthetic catalog data for the bench_* management commands.
+
+Everything is written with bulk_create so seeding 100k rows takes seconds;
+callers are expected to run inside a transaction they roll back afterwards,
+or on a ``scratch_database()`` copy when the data must be committed (several
+threads or connections reading it).
+"""
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from realestate import geohash
+from realestate.models import (
+    Amenity, Compound, CompoundImage, Developer, Location, Property, PropertyImage
+)
+
+BATCH_SIZE = 2000
+
+
+def seed_catalog(properties=10000, compounds=None, developers=50, locations=40, seed=42):
+    rng = random.Random(seed)
+    compounds = compounds if compounds is not None else max(properties // 20, 1)
+
+    amenities = Amenity.objects.bulk_create(
+        [Amenity(name=f"bench-amenity-{i}") for i in range(12)]
+    )
+    developer_objs = Developer.objects.bulk_create(
+        [Developer(name=f"bench-developer-{i}", slug=f"bench-developer-{i}",
+                   description="<p>Benchmark developer</p>") for i in range(developers)],
+        batch_size=BATCH_SIZE,
+    )
+    location_objs = Location.objects.bulk_create(
+        [Location(name=f"bench-location-{i}", slug=f"bench-location-{i}") for i in range(locations)],
+        batch_size=BATCH_SIZE,
+    )
+
+    # الإحداثيات بـ random منفصل عشان باقي الداتا تفضل زي ما هي لنفس الـ seed
+    geo_rng = random.Random(seed + 1)
+    centers = {loc.pk: (geo_rng.uniform(29.8, 31.3), geo_rng.uniform(29.8, 32.4)) for loc in location_objs}
+
+    def place(obj, center, spread):
+        obj.latitude = round(center[0] + geo_rng.gauss(0, spread), 6)
+        obj.longitude = round(center[1] + geo_rng.gauss(0, spread), 6)
+        obj.geohash = geohash.encode(obj.latitude, obj.longitude)   # bulk_create مش بيعدي على save()
+
+    compound_objs = [
+        Compound(
+            name=f"bench-compound-{i}",
+            slug=f"bench-compound-{i}",
+            developer=rng.choice(developer_objs),
+            location=rng.choice(location_objs),
+            description="<p>Benchmark compound</p>",
+            main_image=f"compounds/main_images/bench-{i}.jpg" if i % 3 else "",
+            min_price=Decimal(rng.randrange(1_000_000, 30_000_000, 50_000)) if i % 10 else None,
+            min_area=rng.randrange(60, 400, 5),
+            max_installment_years=rng.choice([None, 5, 6, 7, 8, 10, 12]),
+            delivery_date=date(rng.randint(2024, 2031), rng.randint(1, 12), 1) if i % 7 else None,
+            is_featured=rng.random() < 0.1,
+            is_new_launch=rng.random() < 0.2,
+        )
+        for i in range(compounds)
+    ]
+    for compound in compound_objs:
+        place(compound, centers[compound.location_id], 0.05)
+    compound_objs = Compound.objects.bulk_create(compound_objs, batch_size=BATCH_SIZE)
+    CompoundImage.objects.bulk_create(
+        [CompoundImage(compound=c, image=f"compounds/gallery/bench-{c.pk}-{n}.jpg")
+         for c in compound_objs[::4] for n in range(3)],
+        batch_size=BATCH_SIZE,
+    )
+    Compound.amenities.through.objects.bulk_create(
+        [Compound.amenities.through(compound_id=c.pk, amenity_id=a.pk)
+         for c in compound_objs for a in rng.sample(amenities, rng.randint(0, 5))],
+        batch_size=BATCH_SIZE,
+    )
+
+    property_types = [choice for choice, _ in Property.PROPERTY_TYPES]
+    property_objs = []
+    for i in range(properties):
+        compound = rng.choice(compound_objs)
+        property_objs.append(Property(
+            title=f"Bench unit {i} in {compound.name}",
+            slug=f"bench-property-{i}",
+            compound=compound if i % 10 else None,
+            developer=compound.developer if i % 8 else None,
+            location=compound.location,
+            property_type=rng.choice(property_types),
+            price=Decimal(rng.randrange(800_000, 60_000_000, 10_000)),
+            area=rng.randrange(40, 600, 5),
+            bedrooms=rng.randint(1, 6),
+            bathrooms=rng.randint(1, 5),
+            description="<p>Benchmark unit</p>",
+            main_image=f"properties/main_images/bench-{i}.jpg" if i % 2 else "",
+            is_featured=rng.random() < 0.1,
+            is_new_launch=rng.random() < 0.2,
+        ))
+        # وحدات الكمبوند حواليه، والباقي في المنطقة
+        if property_objs[-1].compound:
+            place(property_objs[-1], (compound.latitude, compound.longitude), 0.002)
+        else:
+            place(property_objs[-1], centers[compound.location_id], 0.05)
+    property_objs = Property.objects.bulk_create(property_objs, batch_size=BATCH_SIZE)
+    PropertyImage.objects.bulk_create(
+        [PropertyImage(property=p, image=f"properties/gallery_images/bench-{p.pk}-{n}.jpg", alt_text=f"View {n}")
+         for p in property_objs[::3] for n in range(2)],
+        batch_size=BATCH_SIZE,
+    )
+    Property.amenities.through.objects.bulk_create(
+        [Property.amenities.through(property_id=p.pk, amenity_id=a.pk)
+         for p in property_objs for a in rng.sample(amenities, rng.randint(0, 3))],
+        batch_size=BATCH_SIZE,
+    )
+
+    return {
+        'developers': developer_objs,
+        'locations': location_objs,
+        'compounds': compound_objs,
+        'properties': property_objs,
+    }
+
+
+@contextmanager
+def scratch_database(using=DEFAULT_DB_ALIAS, prefix='bench-'):
+    """
+    Point ``using`` at a temporary copy of its SQLite file for the duration
+    of the block (yields the copy's path), the way the test runner swaps in
+    a test database: every thread's connection reads the same settings dict.
+    The copy is made with the backup API, so the real file is never written
+    to; the settings are restored and the copy deleted afterwards.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite' or db.is_in_memory_db():
+        raise CommandError(f"The '{using}' database is not an SQLite file.")
+    settings_dict = db.settings_dict
+    original = dict(settings_dict)
+    directory = tempfile.mkdtemp(prefix=prefix)
+    path = os.path.join(directory, 'bench.sqlite3')
+
+    source, target = sqlite3.connect(original['NAME']), sqlite3.connect(path)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+
+    connections.close_all()
+    settings_dict['NAME'] = path
+    try:
+        yield path
+    finally:
+        connections.close_all()
+        settings_dict.clear()
+        settings_dict.update(original)
+        shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:28
+
+import django.db.models.deletion
+import realestate.models
+from django.db import migrations, models
+
+
+def create_search_tables(apps, schema_editor):
+    # FTS5 is SQLite only; other backends keep using icontains (see search.py)
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    from realestate.search import compound_index, property_index
+
+    for index, model_name in ((compound_index, 'Compound'), (property_index, 'Property')):
+        schema_editor.execute(index.create_table_sql())
+        model = apps.get_model('realestate', model_name)
+        index.rebuild(model.objects.using(connection.alias), using=connection.alias)
+    connection.__dict__.pop('_realestate_fts_tables', None)
+
+
+def drop_search_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    from realestate.search import compound_index, property_index
+
+    for index in (compound_index, property_index):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {index.table}')
+    connection.__dict__.pop('_realestate_fts_tables', None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realestate', '0008_compound_is_featured_compound_is_new_launch_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompoundSearchDocument',
+            fields=[
+                ('compound', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='realestate.compound')),
+                ('document', realestate.models.FullTextField(db_column='realestate_compound_search')),
+            ],
+            options={
+                'db_table': 'realestate_compound_search',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertySearchDocument',
+            fields=[
+                ('property', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='realestate.property')),
+                ('document', realestate.models.FullTextField(db_column='realestate_property_search')),
+            ],
+            options={
+                'db_table': 'realestate_property_search',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realestate', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compound',
+            index=models.Index(fields=['location', 'min_price'], name='compound_location_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compound',
+            index=models.Index(fields=['location', 'delivery_date'], name='compound_location_deliv_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compound',
+            index=models.Index(fields=['min_price'], name='compound_min_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compound',
+            index=models.Index(fields=['delivery_date'], name='compound_delivery_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compound',
+            index=models.Index(fields=['min_area'], name='compound_min_area_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compound',
+            index=models.Index(fields=['is_featured', '-id'], name='compound_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compound',
+            index=models.Index(fields=['is_new_launch', '-id'], name='compound_new_launch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['property_type', 'price'], name='property_type_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['location', 'price'], name='property_location_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['compound', 'price'], name='property_compound_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['price'], name='property_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['bedrooms'], name='property_bedrooms_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['is_featured', '-id'], name='property_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['is_new_launch', '-id'], name='property_new_launch_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_related(apps, schema_editor):
+    from realestate import related
+
+    related.refresh(
+        using=schema_editor.connection.alias,
+        compound_model=apps.get_model('realestate', 'Compound'),
+        link_model=apps.get_model('realestate', 'RelatedCompound'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realestate', '0010_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedCompound',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('compound', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='realestate.compound')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='linked_from', to='realestate.compound')),
+            ],
+            options={
+                'ordering': ['compound', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('compound', 'rank'), name='related_compound_rank_uniq')],
+            },
+        ),
+        migrations.RunPython(build_related, migrations.RunPython.noop),
+    ]
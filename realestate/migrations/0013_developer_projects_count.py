@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:46
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_projects(apps, schema_editor):
+    Developer = apps.get_model('realestate', 'Developer')
+    Compound = apps.get_model('realestate', 'Compound')
+    compounds = (Compound.objects.filter(developer=OuterRef('pk'))
+                 .order_by().values('developer').annotate(total=Count('pk')).values('total'))
+    Developer.objects.using(schema_editor.connection.alias).update(projects_count=Coalesce(Subquery(compounds), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realestate', '0012_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='developer',
+            name='projects_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(count_projects, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def skip_existing(apps, schema_editor):
+    # الرسايل القديمة اتقرت قبل الإشعارات؛ منبعتهاش كلها مرة واحدة
+    ContactFormSubmission = apps.get_model('realestate', 'ContactFormSubmission')
+    ContactFormSubmission.objects.using(schema_editor.connection.alias).update(notification_status='sent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realestate', '0014_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactformsubmission',
+            name='notification_attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='contactformsubmission',
+            name='notification_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='contactformsubmission',
+            name='notification_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('sent', 'Sent'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='contactformsubmission',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='contactformsubmission',
+            name='notify_after',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='contactformsubmission',
+            name='reference',
+            field=models.UUIDField(blank=True, editable=False, null=True, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='contactformsubmission',
+            name='submitted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(skip_existing, migrations.RunPython.noop),
+    ]
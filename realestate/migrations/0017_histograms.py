@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 16:32
+
+from django.db import migrations, models
+
+
+def build_histograms(apps, schema_editor):
+    from realestate import histograms
+
+    for name in ('Compound', 'Property'):
+        histograms.rebuild(
+            apps.get_model('realestate', name),
+            using=schema_editor.connection.alias,
+            bucket_model=apps.get_model('realestate', 'HistogramBucket'),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realestate', '0016_geo_coordinates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistogramBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('metric', models.CharField(max_length=40)),
+                ('scope', models.CharField(max_length=20)),
+                ('scope_id', models.PositiveIntegerField(default=0)),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('min_value', models.DecimalField(decimal_places=2, max_digits=14, null=True)),
+                ('max_value', models.DecimalField(decimal_places=2, max_digits=14, null=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'scope_id', 'metric', 'bucket'), name='histogram_bucket_uniq')],
+            },
+        ),
+        migrations.RunPython(build_histograms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:15
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('realestate', '0018_cache_versions'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='amenity',
+            options={'verbose_name_plural': 'amenities'},
+        ),
+        migrations.AlterModelOptions(
+            name='property',
+            options={'verbose_name_plural': 'properties'},
+        ),
+    ]
@@ -1,24 +1,51 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.utils.text import slugify
 from ckeditor.fields import RichTextField
 
+from . import geohash
+
 # Create your models here.
 
+LATITUDE_VALIDATORS = [MinValueValidator(-90), MaxValueValidator(90)]
+LONGITUDE_VALIDATORS = [MinValueValidator(-180), MaxValueValidator(180)]
+
+
+def set_geohash(instance, save_kwargs):
+    """Keep ``geohash`` in step with latitude/longitude (bulk writes: bulk.py / rebuild_geohashes)."""
+    instance.geohash = geohash.encode(instance.latitude, instance.longitude)
+    update_fields = save_kwargs.get('update_fields')
+    if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+        save_kwargs['update_fields'] = {*update_fields, 'geohash'}
+
+
+class DeveloperQuerySet(models.QuerySet):
+    def recount_projects(self):
+        """Recompute projects_count for these developers in a single UPDATE."""
+        compounds = (Compound.objects.filter(developer=models.OuterRef('pk'))
+                     .order_by().values('developer').annotate(total=models.Count('pk')).values('total'))
+        return self.update(projects_count=Coalesce(models.Subquery(compounds), 0))
+
+
 class Developer(models.Model):
     name = models.CharField(max_length=200, unique=True)
     slug = models.SlugField(unique=True, blank=True)
     logo = models.ImageField(upload_to='developers/logos/', blank=True, null=True)
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False)  # images.py
     description = RichTextField(blank=True)
+    # عدد الكمبوندات - بيتحدث من signals.py (ممنوع يتعدل باليد)، rebuild_project_counts بيعيد حسابه
+    projects_count = models.PositiveIntegerField(default=0, editable=False, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = DeveloperQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
 
-    @property
-    def projects_count(self):
-        return self.compound_set.count()
-
     def __str__(self):
         return self.name
 
@@ -27,6 +54,7 @@ class Location(models.Model):
     name = models.CharField(max_length=150, unique=True)
     slug = models.SlugField(unique=True, blank=True)
     map_url = models.URLField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -39,6 +67,9 @@ class Location(models.Model):
 class Amenity(models.Model):
     name = models.CharField(max_length=100, unique=True)
 
+    class Meta:
+        verbose_name_plural = 'amenities'
+
     def __str__(self):
         return self.name
 
@@ -48,6 +79,7 @@ class Compound(models.Model):
     developer = models.ForeignKey(Developer, on_delete=models.CASCADE)
     location = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True)
     main_image = models.ImageField(upload_to='compounds/main_images/', blank=True, null=True)
+    main_image_variants = models.JSONField(default=dict, blank=True, editable=False)  # images.py
     description = RichTextField(blank=True)
     status = models.CharField(max_length=50, blank=True)
     amenities = models.ManyToManyField(Amenity, blank=True)
@@ -65,10 +97,29 @@ class Compound(models.Model):
     
     # 3. تاريخ الاستلام (تم تغييره لـ DateField لسهولة الفلترة)
     delivery_date = models.DateField(null=True, blank=True, help_text="Expected delivery date") 
+    # ===== الخريطة (geo.py) =====
+    latitude = models.FloatField(null=True, blank=True, validators=LATITUDE_VALIDATORS)
+    longitude = models.FloatField(null=True, blank=True, validators=LONGITUDE_VALIDATORS)
+    geohash = models.CharField(max_length=12, blank=True, editable=False)   # من latitude/longitude في save()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        # مطابقة لتركيبات CompoundFilter والـ ordering (min_price, delivery_date, -id)
+        indexes = [
+            models.Index(fields=['location', 'min_price'], name='compound_location_price_idx'),
+            models.Index(fields=['location', 'delivery_date'], name='compound_location_deliv_idx'),
+            models.Index(fields=['min_price'], name='compound_min_price_idx'),
+            models.Index(fields=['delivery_date'], name='compound_delivery_date_idx'),
+            models.Index(fields=['min_area'], name='compound_min_area_idx'),
+            models.Index(fields=['is_featured', '-id'], name='compound_featured_idx'),
+            models.Index(fields=['is_new_launch', '-id'], name='compound_new_launch_idx'),
+            models.Index(fields=['geohash'], name='compound_geohash_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        set_geohash(self, kwargs)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -95,15 +146,35 @@ class Property(models.Model):
     bathrooms = models.PositiveIntegerField()
     description = RichTextField()
     main_image = models.ImageField(upload_to='properties/main_images/', blank=True, null=True)
+    main_image_variants = models.JSONField(default=dict, blank=True, editable=False)  # images.py
     floor_plan_image = models.ImageField(upload_to='properties/floor_plans/', blank=True, null=True)
     map_image = models.ImageField(upload_to='properties/map_images/', blank=True, null=True)
     is_new_launch = models.BooleanField(default=False)
     is_featured = models.BooleanField(default=False)
     amenities = models.ManyToManyField(Amenity, blank=True)
+    latitude = models.FloatField(null=True, blank=True, validators=LATITUDE_VALIDATORS)
+    longitude = models.FloatField(null=True, blank=True, validators=LONGITUDE_VALIDATORS)
+    geohash = models.CharField(max_length=12, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        verbose_name_plural = 'properties'
+        # مطابقة لـ PropertyViewSet.filterset_fields (type/location/compound + price range, bedrooms__gte)
+        indexes = [
+            models.Index(fields=['property_type', 'price'], name='property_type_price_idx'),
+            models.Index(fields=['location', 'price'], name='property_location_price_idx'),
+            models.Index(fields=['compound', 'price'], name='property_compound_price_idx'),
+            models.Index(fields=['price'], name='property_price_idx'),
+            models.Index(fields=['bedrooms'], name='property_bedrooms_idx'),
+            models.Index(fields=['is_featured', '-id'], name='property_featured_idx'),
+            models.Index(fields=['is_new_launch', '-id'], name='property_new_launch_idx'),
+            models.Index(fields=['geohash'], name='property_geohash_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.title)
+        set_geohash(self, kwargs)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -111,6 +182,7 @@ class Property(models.Model):
 class CompoundImage(models.Model):
     compound = models.ForeignKey(Compound, related_name='images', on_delete=models.CASCADE)
     image = models.ImageField(upload_to='compounds/gallery/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # images.py
 
     def __str__(self):
         return f"Image for {self.compound.name}"
@@ -118,11 +190,64 @@ class CompoundImage(models.Model):
 class PropertyImage(models.Model):
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='gallery_images')
     image = models.ImageField(upload_to='properties/gallery_images/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)  # images.py
     alt_text = models.CharField(max_length=255, blank=True)
 
     def __str__(self):
         return f"Image for {self.property.title}"
 
+# ==========================================
+#  Full-text search index (SQLite FTS5, see search.py)
+# ==========================================
+class FullTextField(models.TextField):
+    """The hidden FTS5 column that carries the table's name; supports ``__match``."""
+
+
+@FullTextField.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class CompoundSearchDocument(models.Model):
+    compound = models.OneToOneField(Compound, primary_key=True, db_column='rowid', on_delete=models.DO_NOTHING, related_name='search_document')
+    document = FullTextField(db_column='realestate_compound_search')
+
+    class Meta:
+        managed = False
+        db_table = 'realestate_compound_search'
+
+
+class PropertySearchDocument(models.Model):
+    property = models.OneToOneField(Property, primary_key=True, db_column='rowid', on_delete=models.DO_NOTHING, related_name='search_document')
+    document = FullTextField(db_column='realestate_property_search')
+
+    class Meta:
+        managed = False
+        db_table = 'realestate_property_search'
+
+# ==========================================
+#  Related compounds (precomputed, see related.py)
+# ==========================================
+class RelatedCompound(models.Model):
+    compound = models.ForeignKey(Compound, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Compound, on_delete=models.CASCADE, related_name='linked_from')
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['compound', 'rank']
+        constraints = [
+            models.UniqueConstraint(fields=['compound', 'rank'], name='related_compound_rank_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.compound_id} -> {self.related_id} ({self.score:.2f})"
+
 class Author(models.Model):
     name = models.CharField(max_length=100)
     picture = models.ImageField(upload_to='authors/pictures/', blank=True, null=True)
@@ -171,11 +296,55 @@ class Testimonial(models.Model):
 
 
 class ContactFormSubmission(models.Model):
+    NOTIFICATION_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
     name = models.CharField(max_length=100)
     email = models.EmailField()
     phone = models.CharField(max_length=20, blank=True, null=True)
     message = models.TextField()
-    submitted_at = models.DateTimeField(auto_now_add=True)
+    # وقت الإرسال الفعلي (وقت دخوله الطابور)، مش وقت ما الـ worker كتبه - contact_queue.py
+    submitted_at = models.DateTimeField(default=timezone.now, editable=False)
+    reference = models.UUIDField(unique=True, null=True, blank=True, editable=False)
+    notification_status = models.CharField(max_length=10, choices=NOTIFICATION_STATUS_CHOICES,
+                                           default='pending', db_index=True)
+    notification_attempts = models.PositiveSmallIntegerField(default=0)
+    notification_error = models.TextField(blank=True)
+    notify_after = models.DateTimeField(null=True, blank=True)     # next retry
+    notified_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Contact form submission from {self.name}"
+
+# ==========================================
+#  Slider histograms (precomputed, see histograms.py)
+# ==========================================
+class HistogramBucket(models.Model):
+    metric = models.CharField(max_length=40)            # 'compound.min_price', 'property.area', ...
+    scope = models.CharField(max_length=20)             # 'all' / 'location' / 'developer'
+    scope_id = models.PositiveIntegerField(default=0)   # 0 مع 'all'
+    bucket = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    min_value = models.DecimalField(max_digits=14, decimal_places=2, null=True)
+    max_value = models.DecimalField(max_digits=14, decimal_places=2, null=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'scope_id', 'metric', 'bucket'], name='histogram_bucket_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} {self.scope}:{self.scope_id} #{self.bucket} ({self.count})"
+
+# ==========================================
+#  Public API cache versions (persistent copy, see cache.py)
+# ==========================================
+class CacheVersion(models.Model):
+    label = models.CharField(max_length=100, unique=True)   # model._meta.label_lower
+    version = models.BigIntegerField()                      # time.time_ns() of the last change
 
     def __str__(self):
-        return f"Contact form submission from {self.name}"
\ No newline at end of file
+        return f"{self.label} @ {self.version}"
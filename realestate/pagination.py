@@ -0,0 +1,166 @@
+"""
+Keyset ("cursor") pagination for the public catalog lists.
+
+Page-number pagination runs a COUNT(*) over the whole filtered queryset on
+every page and OFFSET gets slower the deeper the page. Infinite-scroll
+clients never show a total, so they can ask for ``?pagination=cursor`` and
+follow the ``next`` link instead: each page is one indexed range query
+(``WHERE (price, id) > (last price, last id) ORDER BY price, id LIMIT n+1``),
+no count, same speed on page 1 and page 1000.
+
+The ordering comes from ``?ordering=`` restricted to the view's
+``cursor_ordering_fields`` (falling back to the view's ``ordering``) and
+always ends with ``id`` so ties are broken deterministically. NULLs sort last
+in both directions. Without ``pagination=cursor``/``cursor`` the view keeps
+its normal page-number responses.
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CatalogPagination(PageNumberPagination):
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    ordering_param = 'ordering'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.use_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        self.ordering = self.get_cursor_ordering(request, queryset, view)
+        self.fields = {name.lstrip('-'): queryset.model._meta.get_field(name.lstrip('-')) for name in self.ordering}
+
+        queryset = queryset.order_by(*[self.order_expression(term) for term in self.ordering])
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        # صف زيادة عشان نعرف فيه صفحة بعدها ولا لأ من غير COUNT
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.cursor_page = rows[:page_size]
+        return self.cursor_page
+
+    def get_paginated_response(self, data):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_paginated_response_schema(schema)
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # ---------- ordering ----------
+    def get_cursor_ordering(self, request, queryset, view):
+        allowed = getattr(view, 'cursor_ordering_fields', ['id'])
+        ordering = []
+        param = request.query_params.get(self.ordering_param)
+        if param:
+            ordering = [term.strip() for term in param.split(',') if term.strip().lstrip('-') in allowed]
+        if not ordering:
+            ordering = [term for term in (getattr(view, 'ordering', None) or ['-id']) if term.lstrip('-') in allowed]
+        if not ordering:
+            ordering = ['-id']
+
+        # id آخر عمود دايماً عشان كل صف ليه مكان واحد بس
+        names = [term.lstrip('-') for term in ordering]
+        if 'id' in names:
+            return ordering[:names.index('id') + 1]
+        return ordering + ['-id' if ordering[0].startswith('-') else 'id']
+
+    def order_expression(self, term):
+        name = term.lstrip('-')
+        expression = F(name).desc if term.startswith('-') else F(name).asc
+        # nulls_last بس للأعمدة اللي تقبل NULL، عشان الباقي يمشي على الـ index زي ما هو
+        return expression(nulls_last=True) if self.fields[name].null else expression()
+
+    def after(self, position):
+        """
+        Rows strictly after ``position`` in ``self.ordering`` (NULLs last).
+
+        Written as ``f >= v AND (f > v OR <rest>)`` rather than
+        ``f > v OR (f = v AND <rest>)`` so SQLite can seek the index on the
+        leading column instead of scanning it.
+        """
+        condition = None
+        for term, value in reversed(list(zip(self.ordering, position))):
+            name = term.lstrip('-')
+            op = 'lt' if term.startswith('-') else 'gt'
+            if condition is None:
+                # id: not null and unique
+                condition = Q(**{f'{name}__{op}': value})
+            elif value is None:
+                condition = Q(**{f'{name}__isnull': True}) & condition
+            else:
+                condition = Q(**{f'{name}__{op}e': value}) & (Q(**{f'{name}__{op}': value}) | condition)
+                if self.fields[name].null:
+                    condition |= Q(**{f'{name}__isnull': True})
+        return condition
+
+    # ---------- cursor encoding ----------
+    def row_value(self, row, name):
+        if isinstance(row, dict):
+            return row[name]
+        return getattr(row, self.fields[name].attname)
+
+    def encode_cursor(self, row):
+        position = [self.row_value(row, term.lstrip('-')) for term in self.ordering]
+        payload = json.dumps({'o': self.ordering, 'p': position}, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            if payload['o'] != self.ordering or len(payload['p']) != len(self.ordering):
+                raise ValueError
+            position = [
+                None if value is None else self.fields[term.lstrip('-')].to_python(value)
+                for term, value in zip(self.ordering, payload['p'])
+            ]
+            if position[-1] is None:
+                raise ValueError
+            return position
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not getattr(self, 'cursor_mode', False):
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.cursor_page[-1]))
@@ -0,0 +1,125 @@
+"""
+Precomputed "related compounds" (``RelatedCompound``) for ``/related/``.
+
+Every compound gets its top ``RELATED_COMPOUNDS['LIMIT']`` neighbours scored
+on the weights in ``settings.RELATED_COMPOUNDS``:
+
+* same location / same developer: the full weight,
+* starting price: full weight at the same price, falling linearly to zero at
+  ``PRICE_RANGE`` (+-20%) away,
+* delivery date: full weight on the same day, zero ``DELIVERY_WINDOW_DAYS``
+  apart.
+
+Candidates are the compounds sharing the location or the developer, so a
+change to a compound only affects the lists of compounds in its old/new
+location and old/new developer; ``signals.py`` refreshes just those after
+the commit. ``manage.py rebuild_related_compounds`` recomputes everything
+(needed after bulk_create/update, which send no signals).
+"""
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Compound, RelatedCompound
+
+FIELDS = ('id', 'location_id', 'developer_id', 'min_price', 'delivery_date')
+# الحقول اللي بتأثر على النتيجة؛ تغيير أي حاجة تانية مش محتاج refresh
+TRACKED_FIELDS = FIELDS[1:]
+
+DEFAULTS = {
+    'LIMIT': 5,
+    'PRICE_RANGE': 0.2,
+    'DELIVERY_WINDOW_DAYS': 730,
+    'WEIGHTS': {'location': 5.0, 'price': 3.0, 'developer': 2.0, 'delivery': 1.0},
+}
+
+
+def get_config():
+    config = {**DEFAULTS, **getattr(settings, 'RELATED_COMPOUNDS', {})}
+    config['WEIGHTS'] = {**DEFAULTS['WEIGHTS'], **config['WEIGHTS']}
+    return config
+
+
+def score(compound, candidate, config):
+    weights = config['WEIGHTS']
+    total = 0.0
+    if compound['location_id'] is not None and candidate['location_id'] == compound['location_id']:
+        total += weights['location']
+    if candidate['developer_id'] == compound['developer_id']:
+        total += weights['developer']
+    if compound['min_price'] and candidate['min_price'] is not None:
+        distance = float(abs(candidate['min_price'] - compound['min_price']) / compound['min_price'])
+        total += weights['price'] * max(0.0, 1 - distance / config['PRICE_RANGE'])
+    if compound['delivery_date'] and candidate['delivery_date']:
+        days = abs((candidate['delivery_date'] - compound['delivery_date']).days)
+        total += weights['delivery'] * max(0.0, 1 - days / config['DELIVERY_WINDOW_DAYS'])
+    return total
+
+
+def top_related(compound, candidates, config):
+    """[(score, id)] best first; ties go to the newest compound."""
+    scored = (
+        (score(compound, candidate, config), candidate['id'])
+        for candidate in candidates if candidate['id'] != compound['id']
+    )
+    return heapq.nlargest(config['LIMIT'], (item for item in scored if item[0] > 0))
+
+
+def neighbourhood(locations=(), developers=()):
+    """Q for compounds sharing any of the given locations or developers."""
+    condition = Q(pk__in=[])
+    locations = {pk for pk in locations if pk is not None}
+    developers = {pk for pk in developers if pk is not None}
+    if locations:
+        condition |= Q(location_id__in=locations)
+    if developers:
+        condition |= Q(developer_id__in=developers)
+    return condition
+
+
+def affected_ids(pk=None, locations=(), developers=(), using='default'):
+    """The compound itself plus every compound whose candidate set contains it."""
+    ids = set(Compound.objects.using(using).filter(neighbourhood(locations, developers)).values_list('id', flat=True))
+    if pk is not None:
+        ids.add(pk)
+    return ids
+
+
+def refresh(ids=None, using='default', compound_model=Compound, link_model=RelatedCompound):
+    """
+    Recompute the lists of ``ids`` (all compounds when None) and return the
+    number of links written. The model arguments let migrations pass
+    historical models.
+    """
+    compounds = compound_model._default_manager.using(using)
+    config = get_config()
+    if ids is None:
+        targets = pool = list(compounds.values(*FIELDS))
+    else:
+        ids = set(ids)
+        targets = list(compounds.filter(id__in=ids).values(*FIELDS))
+        pool = list(compounds.filter(neighbourhood(
+            [row['location_id'] for row in targets], [row['developer_id'] for row in targets],
+        )).values(*FIELDS))
+
+    by_location, by_developer = defaultdict(list), defaultdict(list)
+    for row in pool:
+        if row['location_id'] is not None:
+            by_location[row['location_id']].append(row)
+        by_developer[row['developer_id']].append(row)
+
+    links = []
+    for compound in targets:
+        candidates = {row['id']: row for row in by_location[compound['location_id']] + by_developer[compound['developer_id']]}
+        for rank, (value, related_id) in enumerate(top_related(compound, candidates.values(), config), start=1):
+            links.append(link_model(compound_id=compound['id'], related_id=related_id, score=value, rank=rank))
+
+    manager = link_model._default_manager.using(using)
+    with transaction.atomic(using=using):
+        stale = manager.all() if ids is None else manager.filter(compound_id__in=ids)
+        stale.delete()
+        manager.bulk_create(links, batch_size=500)
+    return len(links)
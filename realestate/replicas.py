@@ -0,0 +1,147 @@
+"""
+Read replica routing for the public API.
+
+``ReplicaRouter`` sends every write to the primary (``default``) and reads
+to the primary too, except inside a request handled by a viewset with
+``ReplicaReadMixin`` (the ``Public*ViewSet`` lists and details), whose
+queries go to ``settings.DATABASE_REPLICA['ALIAS']`` when that database is
+configured. Admin viewsets, the admin site, management commands and the
+contact form always read from the primary.
+
+Replicas lag behind, so two things keep a client from seeing data older
+than what it just wrote or what the cache already knows about:
+
+* read-your-writes: a request that writes anything gets a short-lived
+  cookie (``STICKY_SECONDS``) and that client's next requests read from the
+  primary (``ReplicaRoutingMiddleware``),
+* a cached view whose cache version (``cache.get_versions``) changed less
+  than ``MAX_LAG_SECONDS`` ago reads from the primary, otherwise a stale
+  replica read would be cached under the new version.
+
+The per-request state lives in a ``ContextVar`` so it is local to the
+request's thread (or task under ASGI).
+"""
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULTS = {
+    'ALIAS': 'replica',
+    'STICKY_SECONDS': 10,       # read-your-writes بعد أي كتابة
+    'MAX_LAG_SECONDS': 10,      # أقصى تأخير متوقع للـ replica
+    'COOKIE_NAME': 'db_primary',
+}
+
+_state = ContextVar('replica_routing', default=None)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'DATABASE_REPLICA', {})}
+
+
+def get_replica_alias():
+    alias = get_config()['ALIAS']
+    return alias if alias in settings.DATABASES else None
+
+
+class RoutingState:
+    def __init__(self, sticky=False):
+        self.sticky = sticky        # the client wrote recently: primary only
+        self.read_alias = None      # None -> primary
+        self.wrote = False
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        return state.read_alias if state is not None else None
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        # لازم صريح: من غير كده Django بيكتب في نفس قاعدة الـ instance (اللي ممكن تكون الـ replica)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, get_config()['ALIAS']}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # الـ replica نسخة من الـ primary (replication أو sync_replica) ومش بيتعملها migrate
+        if db == get_config()['ALIAS']:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True        # تحت ASGI من غير ما الطلب يتنقل لـ thread
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        state, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self.finish(state, response)
+
+    def start(self, request):
+        state = RoutingState(sticky=get_config()['COOKIE_NAME'] in request.COOKIES)
+        return state, _state.set(state)
+
+    def finish(self, state, response):
+        if state.wrote:
+            config = get_config()
+            response.set_cookie(
+                config['COOKIE_NAME'], '1', max_age=config['STICKY_SECONDS'], httponly=True, samesite='Lax',
+            )
+        return response
+
+
+def recently_changed(versions):
+    """True if a cache version (time.time_ns() stamp) is newer than the replica lag."""
+    return bool(versions) and time.time_ns() - max(versions) < get_config()['MAX_LAG_SECONDS'] * 10 ** 9
+
+
+def read_from_replica(request, versions=None):
+    """Send this request's reads to the replica, unless it must see the primary."""
+    state = _state.get()
+    alias = get_replica_alias()
+    if (
+        state is None or alias is None or state.sticky
+        or request.method not in SAFE_METHODS
+        or recently_changed(versions)
+    ):
+        return
+    state.read_alias = alias
+
+
+class ReplicaReadMixin:
+    """Read from the replica for safe requests (needs ``ReplicaRoutingMiddleware``)."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        read_from_replica(request, getattr(self, 'cache_versions', None))
@@ -0,0 +1,179 @@
+"""
+Shared engine for the ``scrape_*`` management commands.
+
+Pages are fetched concurrently: every request runs ``requests`` in a worker
+thread (``asyncio.to_thread``), an ``asyncio.Semaphore`` caps the requests in
+flight and the session's connection pool is sized to the same number, so
+connections are reused instead of re-opened. Responses are parsed with
+BeautifulSoup; Next.js pages also carry their data as JSON in
+``<script id="__NEXT_DATA__">``, available as ``Page.next_data``.
+
+No browser is involved, so the commands run headless on the server. Every
+command takes ``--base-url``; pointing it at a local server over saved pages
+(e.g. ``python -m http.server 8001`` in a directory with ``search``,
+``area`` and ``developer/index.html``) runs a crawl completely offline.
+
+Database writes stay in the command (synchronous ORM) after the fetches.
+"""
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_BASE_URL = 'https://www.nawy.com'
+USER_AGENT = (
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/126.0 Safari/537.36'
+)
+
+
+class Page:
+    def __init__(self, url, status, text):
+        self.url = url
+        self.status = status
+        self.text = text
+        self._soup = None
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.text, 'html.parser')
+        return self._soup
+
+    @property
+    def next_data(self):
+        """The page props Next.js embeds for hydration ({} if there are none)."""
+        script = self.soup.find('script', id='__NEXT_DATA__')
+        if script is None or not script.string:
+            return {}
+        try:
+            return json.loads(script.string)
+        except ValueError:
+            return {}
+
+    def links(self, pattern):
+        """[(absolute url, <a> tag)] for every link whose href matches ``pattern`` (first occurrence only)."""
+        regex = re.compile(pattern)
+        seen, found = set(), []
+        for tag in self.soup.find_all('a', href=True):
+            url = urljoin(self.url, tag['href'])
+            if regex.search(urlsplit(url).path) and url not in seen:
+                seen.add(url)
+                found.append((url, tag))
+        return found
+
+
+class Scraper:
+    def __init__(self, base_url=DEFAULT_BASE_URL, concurrency=8, timeout=20, retries=3):
+        self.base_url = base_url.rstrip('/') + '/'
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.errors = []
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT, 'Accept-Language': 'en'})
+        # الـ pool قد عدد الطلبات المتوازية عشان الـ connections تتعاد استخدامها
+        adapter = HTTPAdapter(
+            pool_connections=concurrency,
+            pool_maxsize=concurrency,
+            max_retries=Retry(total=retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.session.close()
+
+    def url(self, path):
+        return urljoin(self.base_url, path.lstrip('/')) if not path.startswith(('http://', 'https://')) else path
+
+    # ---------- async ----------
+    async def _get(self, semaphore, url):
+        async with semaphore:
+            return await asyncio.to_thread(self.session.get, url, timeout=self.timeout)
+
+    async def _gather(self, urls, convert):
+        # threads قد الـ concurrency (الـ default executor بيقف عند cpu + 4)
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(self.concurrency))
+        semaphore = asyncio.Semaphore(self.concurrency)
+        responses = await asyncio.gather(*[self._get(semaphore, url) for url in urls], return_exceptions=True)
+        results = []
+        for url, response in zip(urls, responses):
+            if isinstance(response, Exception):
+                self.errors.append(f'{url}: {response}')
+                results.append(None)
+            elif not response.ok:
+                self.errors.append(f'{url}: HTTP {response.status_code}')
+                results.append(None)
+            else:
+                results.append(convert(url, response))
+        return results
+
+    # ---------- sync entry points (the commands are synchronous) ----------
+    def fetch_pages(self, paths):
+        """Pages in the same order as ``paths``; None where the fetch failed (see ``errors``)."""
+        urls = [self.url(path) for path in paths]
+        return asyncio.run(self._gather(urls, lambda url, response: Page(response.url, response.status_code, response.text)))
+
+    def fetch_page(self, path):
+        return self.fetch_pages([path])[0]
+
+    def fetch_files(self, urls):
+        """Raw bytes (images) for each url, None where the download failed."""
+        urls = [self.url(url) for url in urls]
+        return asyncio.run(self._gather(urls, lambda url, response: response.content))
+
+
+def find_objects(data, keys):
+    """Every dict nested anywhere in ``data`` that has all of ``keys``."""
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if all(key in item for key in keys):
+                yield item
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+
+
+def first_number(data, keys):
+    """The first numeric value under any of ``keys`` in a (nested) dict, or None."""
+    for obj in find_objects(data, ()):
+        for key in keys:
+            value = obj.get(key)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0:
+                return value
+            if isinstance(value, str) and re.fullmatch(r'\d[\d,]*(\.\d+)?', value.strip()):
+                return float(value.replace(',', ''))
+    return None
+
+
+def link_text(tag):
+    """Visible text of a link, first line only (cards often append counts/prices)."""
+    lines = tag.get_text('\n', strip=True).split('\n')
+    return lines[0].strip() if lines else ''
+
+
+def add_arguments(parser):
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL,
+                        help='Site to crawl; point it at a local server with saved pages to run offline')
+    parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight (and pooled connections)')
+    parser.add_argument('--timeout', type=int, default=20)
+
+
+def from_options(options):
+    return Scraper(options['base_url'], concurrency=options['concurrency'], timeout=options['timeout'])
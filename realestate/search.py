@@ -0,0 +1,156 @@
+"""
+Full-text search for compounds and properties on SQLite FTS5.
+
+Each searchable model has an FTS5 table (created by migration 0009) whose
+rowid is the object's id. Text is normalized the same way on the way in and
+on the way out - Arabic alef/yaa/taa-marbuta variants folded, tashkeel and
+tatweel removed, everything case-folded - and the unicode61 tokenizer strips
+Latin diacritics. Rows are kept in sync by the receivers in ``signals.py``.
+
+``SearchIndex.search()`` joins the FTS table, so SQLite drives the query from
+the full-text match instead of scanning the catalog, and annotates a bm25
+``search_rank`` (lower is better). It returns None when the index cannot be
+used (other database vendors, table missing, nothing searchable in the
+value) so callers keep their ``icontains`` lookups as the fallback.
+"""
+import re
+
+from django.db import connections
+from django.db.models import F, FloatField, Func, Value
+from django.utils.html import strip_tags
+
+from .models import Compound, Property
+
+# Tashkeel, Quranic marks and tatweel
+ARABIC_MARKS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06dc\u06df-\u06e8\u06ea-\u06ed\u0640]')
+ARABIC_LETTERS = str.maketrans({
+    '\u0623': '\u0627',  # alef with hamza above -> alef
+    '\u0625': '\u0627',  # alef with hamza below -> alef
+    '\u0622': '\u0627',  # alef with madda -> alef
+    '\u0671': '\u0627',  # alef wasla -> alef
+    '\u0649': '\u064a',  # alef maksura -> yaa
+    '\u0626': '\u064a',  # yaa with hamza -> yaa
+    '\u0624': '\u0648',  # waw with hamza -> waw
+    '\u0629': '\u0647',  # taa marbuta -> haa
+})
+TOKEN = re.compile(r'\w+')
+BATCH_SIZE = 500
+
+
+def normalize(text):
+    if not text:
+        return ''
+    return ARABIC_MARKS.sub('', str(text)).translate(ARABIC_LETTERS).casefold()
+
+
+def build_match_query(value):
+    """
+    Every word has to match; the last one as a prefix since it is usually
+    still being typed: ``new cai`` -> ``"new" "cai"*``. Prefixing every word
+    would make common words expand to huge doclists.
+    """
+    tokens = [f'"{token}"' for token in TOKEN.findall(normalize(value))]
+    if tokens:
+        tokens[-1] += '*'
+    return ' '.join(tokens)
+
+
+class SearchIndex:
+    def __init__(self, model, table, columns, weights):
+        self.model = model
+        self.table = table
+        self.columns = columns    # FTS column -> lookup on the model
+        self.weights = weights    # bm25 weight of each FTS column
+
+    # ---------- querying ----------
+    def is_available(self, using='default'):
+        connection = connections[using]
+        if connection.vendor != 'sqlite':
+            return False
+        tables = connection.__dict__.setdefault('_realestate_fts_tables', {})
+        if self.table not in tables:
+            tables[self.table] = self.table in connection.introspection.table_names()
+        return tables[self.table]
+
+    def search(self, queryset, value):
+        query = build_match_query(value)
+        if not query or not self.is_available(queryset.db):
+            return None
+        return queryset.filter(search_document__document__match=query).annotate(
+            search_rank=Func(
+                F('search_document__document'),
+                *[Value(weight) for weight in self.weights],
+                function='bm25',
+                output_field=FloatField(),
+            )
+        )
+
+    # ---------- indexing ----------
+    def documents(self, queryset):
+        rows = queryset.values_list('id', *self.columns.values()).iterator(chunk_size=2000)
+        for object_id, *texts in rows:
+            yield (object_id, *[normalize(strip_tags(text or '')) for text in texts])
+
+    def index(self, ids, using='default'):
+        """(Re)index the given object ids; ids that no longer exist are dropped."""
+        ids = list(ids)
+        if not ids or not self.is_available(using):
+            return
+        manager = self.model._default_manager.using(using)
+        with connections[using].cursor() as cursor:
+            for start in range(0, len(ids), BATCH_SIZE):
+                chunk = ids[start:start + BATCH_SIZE]
+                self._delete(cursor, chunk)
+                self._insert(cursor, list(self.documents(manager.filter(id__in=chunk))))
+
+    def remove(self, ids, using='default'):
+        ids = list(ids)
+        if not ids or not self.is_available(using):
+            return
+        with connections[using].cursor() as cursor:
+            for start in range(0, len(ids), BATCH_SIZE):
+                self._delete(cursor, ids[start:start + BATCH_SIZE])
+
+    def rebuild(self, queryset=None, using='default'):
+        """Re-create every row; ``queryset`` lets migrations pass a historical model."""
+        if queryset is None:
+            queryset = self.model._default_manager.using(using)
+        with connections[using].cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            batch = []
+            for row in self.documents(queryset.order_by('id')):
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    self._insert(cursor, batch)
+                    batch = []
+            self._insert(cursor, batch)
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('optimize')")
+
+    def create_table_sql(self):
+        return (
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5('
+            f'{", ".join(self.columns)}, tokenize="unicode61 remove_diacritics 2", prefix="2 3 4")'
+        )
+
+    def _delete(self, cursor, ids):
+        cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({", ".join(["%s"] * len(ids))})', ids)
+
+    def _insert(self, cursor, rows):
+        if rows:
+            values = ', '.join(['%s'] * (len(self.columns) + 1))
+            cursor.executemany(f'INSERT INTO {self.table} (rowid, {", ".join(self.columns)}) VALUES ({values})', rows)
+
+
+compound_index = SearchIndex(
+    Compound,
+    'realestate_compound_search',
+    {'name': 'name', 'location': 'location__name', 'developer': 'developer__name'},
+    weights=(10.0, 3.0, 3.0),
+)
+
+property_index = SearchIndex(
+    Property,
+    'realestate_property_search',
+    {'title': 'title', 'compound': 'compound__name', 'location': 'location__name', 'description': 'description'},
+    weights=(10.0, 5.0, 3.0, 1.0),
+)
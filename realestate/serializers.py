@@ -1,8 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
+from django.utils.encoding import filepath_to_uri, iri_to_uri
 from django.utils.text import slugify
 import time
 
+from . import images, instrumentation
+from .fieldsets import ALL, SparseFieldsSerializerMixin, is_compact
 from .models import (
     Compound, Developer, Location, Property, PropertyImage,
     BlogPost, Author, Amenity, ContactFormSubmission,
@@ -17,6 +21,35 @@ def get_full_image_url(image_field, request):
         return request.build_absolute_uri(image_field.url)
     return None
 
+def compact_developer(developer, request):
+    # شكل مختصر للمطور في كروت القوائم (من غير الوصف والنسخ المصغرة)
+    return {
+        'id': developer.id,
+        'name': developer.name,
+        'slug': developer.slug,
+        'logo': get_full_image_url(developer.logo, request),
+    }
+
+def image_url_builder(storage, request):
+    """
+    name -> same URL as get_full_image_url() on the FieldFile, for rows read
+    with .values(). For local storage the absolute MEDIA_URL prefix is
+    resolved once instead of running urljoin() + build_absolute_uri() per image.
+    """
+    if request is None:
+        return lambda name: None
+    if isinstance(storage, FileSystemStorage):
+        prefix = request.build_absolute_uri(storage.base_url)
+        return lambda name: iri_to_uri(prefix + filepath_to_uri(name).lstrip('/')) if name else None
+    return lambda name: request.build_absolute_uri(storage.url(name)) if name else None
+
+def get_image_srcset(image_field, variants, request):
+    # {"webp": "url 320w, url 640w, ...", "jpeg": ...} أو None لو النسخ المصغرة لسه متعملتش
+    if not image_field or not request:
+        return None
+    storage = image_field.storage
+    return images.srcset(image_field.name, variants, lambda name: request.build_absolute_uri(storage.url(name)))
+
 # ==========================================
 #  User & Helpers Serializers
 # ==========================================
@@ -41,10 +74,14 @@ class LocationSerializer(serializers.ModelSerializer):
 class DeveloperSerializer(serializers.ModelSerializer):
     # جعل الـ Slug اختياري لنتفادى خطأ 400
     slug = serializers.SlugField(required=False, allow_blank=True)
+    logo_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Developer
-        fields = '__all__'
+        exclude = ['logo_variants']
+
+    def get_logo_srcset(self, obj):
+        return get_image_srcset(obj.logo, obj.logo_variants, self.context.get('request'))
 
     # إصلاح روابط الصور
     def to_representation(self, instance):
@@ -100,22 +137,28 @@ class ContactFormSubmissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ContactFormSubmission
         fields = '__all__'
+        read_only_fields = ['notification_status', 'notification_attempts', 'notification_error',
+                            'notify_after', 'notified_at']
 
 # ==========================================
 #  Compound Serializer (Existing Fix)
 # ==========================================
 class CompoundImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = CompoundImage
-        fields = ['id', 'image', 'image_url']
+        fields = ['id', 'image', 'image_url', 'image_srcset']
 
     def get_image_url(self, obj):
         request = self.context.get('request')
         return get_full_image_url(obj.image, request)
 
-class CompoundSerializer(serializers.ModelSerializer):
+    def get_image_srcset(self, obj):
+        return get_image_srcset(obj.image, obj.image_variants, self.context.get('request'))
+
+class CompoundSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     images = CompoundImageSerializer(many=True, read_only=True)
     
     uploaded_images = serializers.ListField(
@@ -131,10 +174,24 @@ class CompoundSerializer(serializers.ModelSerializer):
     amenities = serializers.PrimaryKeyRelatedField(
         many=True, queryset=Amenity.objects.all(), required=False
     )
+    main_image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Compound
-        fields = '__all__'
+        exclude = ['main_image_variants', 'geohash']
+
+    # ?fields= / ?expand= (fieldsets.py)
+    card_fields = [
+        'id', 'name', 'slug', 'developer', 'location', 'main_image', 'main_image_srcset', 'status',
+        'min_area', 'is_new_launch', 'is_featured', 'min_price', 'max_installment_years', 'delivery_date',
+        'latitude', 'longitude', 'updated_at',
+    ]
+    compact_fields = {'developer': ['id', 'name', 'slug', 'logo']}
+    expandable_fields = ['developer']
+    field_sources = {'main_image_srcset': ['main_image', 'main_image_variants']}
+
+    def get_main_image_srcset(self, obj):
+        return get_image_srcset(obj.main_image, obj.main_image_variants, self.context.get('request'))
 
     # 🔥 FIX: Override data processing BEFORE validation
     def to_internal_value(self, data):
@@ -163,23 +220,27 @@ class CompoundSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         response = super().to_representation(instance)
         request = self.context.get('request')
+        # الحقول اللي مش مطلوبة (?fields=) ممكن تكون deferred، فمنلمسهاش
+        wants = self.selection.wants
 
         # 1. Fix Image URLs
-        if instance.main_image:
+        if wants('main_image') and instance.main_image:
             response['main_image'] = get_full_image_url(instance.main_image, request)
-        if hasattr(instance, 'map_image') and instance.map_image:
+        if wants('map_image') and instance.map_image:
             response['map_image'] = get_full_image_url(instance.map_image, request)
 
         # 2. Return full Amenity objects instead of just IDs
-        if instance.amenities.exists():
+        # (served from the viewset's prefetch cache, no extra query per row)
+        if wants('amenities'):
             response['amenities'] = AmenitySerializer(instance.amenities.all(), many=True).data
-        else:
-            response['amenities'] = []
 
-        # 3. Expand related fields
-        if instance.developer:
-            response['developer'] = DeveloperSerializer(instance.developer, context=self.context).data
-        if instance.location:
+        # 3. Expand related fields (developer/location come from select_related)
+        if wants('developer') and instance.developer:
+            if self.is_compact('developer'):
+                response['developer'] = compact_developer(instance.developer, request)
+            else:
+                response['developer'] = DeveloperSerializer(instance.developer, context=self.context).data
+        if wants('location') and instance.location:
             response['location'] = LocationSerializer(instance.location).data
 
         return response
@@ -219,40 +280,200 @@ class CompoundSerializer(serializers.ModelSerializer):
 # ==========================================
 class PropertyImageSerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
     class Meta:
         model = PropertyImage
-        fields = ['id', 'image', 'alt_text']
+        fields = ['id', 'image', 'image_srcset', 'alt_text']
     def get_image(self, obj):
         request = self.context.get('request')
         return get_full_image_url(obj.image, request)
+    def get_image_srcset(self, obj):
+        return get_image_srcset(obj.image, obj.image_variants, self.context.get('request'))
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     gallery_images = PropertyImageSerializer(many=True, read_only=True)
+    main_image_srcset = serializers.SerializerMethodField()
     class Meta:
         model = Property
         fields = [
             'id', 'title', 'slug', 'compound', 'developer', 'location',
             'property_type', 'price', 'area', 'bedrooms', 'bathrooms',
-            'description', 'main_image', 'floor_plan_image', 'map_image',
-            'is_new_launch', 'is_featured', 'amenities', 'gallery_images'
+            'description', 'main_image', 'main_image_srcset', 'floor_plan_image', 'map_image',
+            'is_new_launch', 'is_featured', 'amenities', 'gallery_images', 'latitude', 'longitude', 'updated_at'
         ]
+    # ?fields= / ?expand= (fieldsets.py)
+    card_fields = [
+        'id', 'title', 'slug', 'compound', 'developer', 'location',
+        'property_type', 'price', 'area', 'bedrooms', 'bathrooms',
+        'main_image', 'main_image_srcset', 'is_new_launch', 'is_featured', 'latitude', 'longitude', 'updated_at',
+    ]
+    compact_fields = {'compound': ['id', 'name', 'slug'], 'developer': ['id', 'name', 'slug', 'logo']}
+    expandable_fields = ['developer']
+    field_sources = {'main_image_srcset': ['main_image', 'main_image_variants']}
+    def get_main_image_srcset(self, obj):
+        return get_image_srcset(obj.main_image, obj.main_image_variants, self.context.get('request'))
     def to_representation(self, instance):
         response = super().to_representation(instance)
         request = self.context.get('request')
-        if instance.main_image: response['main_image'] = get_full_image_url(instance.main_image, request)
-        if instance.floor_plan_image: response['floor_plan_image'] = get_full_image_url(instance.floor_plan_image, request)
-        if instance.map_image: response['map_image'] = get_full_image_url(instance.map_image, request)
+        wants = self.selection.wants
+        if wants('main_image') and instance.main_image: response['main_image'] = get_full_image_url(instance.main_image, request)
+        if wants('floor_plan_image') and instance.floor_plan_image: response['floor_plan_image'] = get_full_image_url(instance.floor_plan_image, request)
+        if wants('map_image') and instance.map_image: response['map_image'] = get_full_image_url(instance.map_image, request)
         
-        if instance.compound:
+        if wants('compound') and instance.compound:
             response['compound'] = {'id': instance.compound.id, 'name': instance.compound.name, 'slug': instance.compound.slug}
-        if instance.developer:
-            response['developer'] = DeveloperSerializer(instance.developer, context=self.context).data
-        if instance.location:
+        if wants('developer') and instance.developer:
+            if self.is_compact('developer'):
+                response['developer'] = compact_developer(instance.developer, request)
+            else:
+                response['developer'] = DeveloperSerializer(instance.developer, context=self.context).data
+        if wants('location') and instance.location:
             response['location'] = LocationSerializer(instance.location).data
-        if instance.amenities.exists():
+        if wants('amenities') and instance.amenities.exists():
             response['amenities'] = AmenitySerializer(instance.amenities.all(), many=True).data
         return response
 
+# ==========================================
+#  Property List Fast Path (read-only)
+# ==========================================
+class PropertyListFastSerializer:
+    """
+    Read-only list mode for the public property list.
+
+    Produces exactly the same JSON as ``PropertySerializer(many=True)`` but
+    works on ``.values()`` rows: scalar columns are copied straight across and
+    every relation is resolved with one batched query for the whole page,
+    each developer/location being serialized once instead of once per row.
+
+    Honours the ``field_selection`` in the context (?fields= / ?expand=):
+    ``columns_for()`` gives the columns to fetch and relations that are not
+    selected are not queried at all.
+    """
+    columns = [
+        'id', 'title', 'slug', 'compound_id', 'developer_id', 'location_id',
+        'property_type', 'price', 'area', 'bedrooms', 'bathrooms',
+        'description', 'main_image', 'main_image_variants', 'floor_plan_image', 'map_image',
+        'is_new_launch', 'is_featured', 'latitude', 'longitude', 'updated_at',
+    ]
+    # output field -> columns it reads (default: the field itself)
+    sources = {
+        'compound': ['compound_id'],
+        'developer': ['developer_id'],
+        'location': ['location_id'],
+        'main_image_srcset': ['main_image', 'main_image_variants'],
+        'amenities': [],
+        'gallery_images': [],
+    }
+    image_columns = ['main_image', 'floor_plan_image', 'map_image']
+
+    def __init__(self, rows, context=None):
+        self.rows = rows
+        self.context = context or {}
+
+    @classmethod
+    def columns_for(cls, selection, keep=()):
+        columns = [
+            column for name in PropertySerializer.Meta.fields if selection.wants(name)
+            for column in cls.sources.get(name, [name])
+        ]
+        return list(dict.fromkeys(['id', *columns, *keep]))
+
+    def image_url_builder(self, storage):
+        return image_url_builder(storage, self.context.get('request'))
+
+    def related_ids(self, rows, column):
+        return {row[column] for row in rows if row[column]}
+
+    @property
+    @instrumentation.timed('serializer')
+    def data(self):
+        selection = self.context.get('field_selection') or ALL
+        wants = selection.wants
+        rows = list(self.rows)
+        ids = [row['id'] for row in rows]
+
+        compounds, developers, locations, amenities, gallery = {}, {}, {}, {}, {}
+        if wants('compound'):
+            compounds = {
+                c['id']: {'id': c['id'], 'name': c['name'], 'slug': c['slug']}
+                for c in Compound.objects.filter(id__in=self.related_ids(rows, 'compound_id')).values('id', 'name', 'slug')
+            }
+        if wants('developer'):
+            request = self.context.get('request')
+            if is_compact(PropertySerializer, selection, 'developer'):
+                developers = {
+                    d.id: compact_developer(d, request)
+                    for d in Developer.objects.filter(id__in=self.related_ids(rows, 'developer_id')).only('id', 'name', 'slug', 'logo')
+                }
+            else:
+                developers = {
+                    d.id: DeveloperSerializer(d, context=self.context).data
+                    for d in Developer.objects.filter(id__in=self.related_ids(rows, 'developer_id'))
+                }
+        if wants('location'):
+            locations = {
+                l.id: LocationSerializer(l).data
+                for l in Location.objects.filter(id__in=self.related_ids(rows, 'location_id'))
+            }
+
+        if wants('amenities'):
+            links = list(Property.amenities.through.objects
+                         .filter(property_id__in=ids)
+                         .order_by('property_id', 'amenity_id')
+                         .values_list('property_id', 'amenity_id'))
+            amenity_data = {
+                a['id']: a for a in Amenity.objects.filter(id__in={amenity_id for _, amenity_id in links}).values('id', 'name')
+            }
+            for property_id, amenity_id in links:
+                amenities.setdefault(property_id, []).append(dict(amenity_data[amenity_id]))
+
+        if wants('gallery_images'):
+            gallery_url = self.image_url_builder(PropertyImage._meta.get_field('image').storage)
+            for image in (PropertyImage.objects.filter(property_id__in=ids)
+                          .values('id', 'property_id', 'image', 'image_variants', 'alt_text')
+                          .order_by('property_id', 'id')):
+                gallery.setdefault(image['property_id'], []).append({
+                    'id': image['id'],
+                    'image': gallery_url(image['image']),
+                    'image_srcset': images.srcset(image['image'], image['image_variants'], gallery_url),
+                    'alt_text': image['alt_text'],
+                })
+
+        fields = PropertySerializer().fields
+        price_field, updated_at_field = fields['price'], fields['updated_at']
+        main_image_url, floor_plan_url, map_image_url = (
+            self.image_url_builder(Property._meta.get_field(name).storage) for name in self.image_columns
+        )
+
+        # field -> value for one row, in PropertySerializer's field order
+        builders = {
+            'id': lambda row: row['id'],
+            'title': lambda row: row['title'],
+            'slug': lambda row: row['slug'],
+            'compound': lambda row: compounds.get(row['compound_id']),
+            'developer': lambda row: developers.get(row['developer_id']),
+            'location': lambda row: locations.get(row['location_id']),
+            'property_type': lambda row: row['property_type'],
+            'price': lambda row: price_field.to_representation(row['price']),
+            'area': lambda row: row['area'],
+            'bedrooms': lambda row: row['bedrooms'],
+            'bathrooms': lambda row: row['bathrooms'],
+            'description': lambda row: row['description'],
+            'main_image': lambda row: main_image_url(row['main_image']),
+            'main_image_srcset': lambda row: images.srcset(row['main_image'], row['main_image_variants'], main_image_url),
+            'floor_plan_image': lambda row: floor_plan_url(row['floor_plan_image']),
+            'map_image': lambda row: map_image_url(row['map_image']),
+            'is_new_launch': lambda row: row['is_new_launch'],
+            'is_featured': lambda row: row['is_featured'],
+            'amenities': lambda row: amenities.get(row['id'], []),
+            'gallery_images': lambda row: gallery.get(row['id'], []),
+            'latitude': lambda row: row['latitude'],
+            'longitude': lambda row: row['longitude'],
+            'updated_at': lambda row: updated_at_field.to_representation(row['updated_at']),
+        }
+        selected = [(name, builders[name]) for name in PropertySerializer.Meta.fields if wants(name)]
+        return [{name: build(row) for name, build in selected} for row in rows]
+
 class BlogPostSerializer(serializers.ModelSerializer):
     class Meta:
         model = BlogPost
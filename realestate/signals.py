@@ -0,0 +1,280 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import histograms, images, related
+from .bulk import bulk_upserted
+from .cache import bump_version
+from .models import (
+    Amenity, Author, BlogPost, Compound, CompoundImage, Developer, HistogramBucket, Location,
+    Partner, Property, PropertyImage, RelatedCompound, Testimonial
+)
+from .search import compound_index, property_index
+
+# ==========================================
+#  Public API cache invalidation
+# ==========================================
+# كل موديل بيتعدل بيغير الـ version بتاعه، فكل الصفحات المتخزنة اللي معتمدة عليه بتتلغي
+CACHED_MODELS = [
+    Compound, Property, Developer, Location, Amenity, BlogPost, Partner,
+    Testimonial, Author, CompoundImage, PropertyImage,
+]
+
+
+def invalidate_public_cache(model):
+    # بعد الـ commit عشان محدش يخزن الداتا القديمة بالـ version الجديد
+    transaction.on_commit(lambda: bump_version(model))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_on_change(sender, **kwargs):
+    if sender in CACHED_MODELS:
+        invalidate_public_cache(sender)
+
+
+@receiver(m2m_changed, sender=Compound.amenities.through)
+@receiver(m2m_changed, sender=Property.amenities.through)
+def invalidate_on_amenities_change(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_public_cache(Compound if sender is Compound.amenities.through else Property)
+
+
+# ==========================================
+#  Full-text search index (search.py)
+# ==========================================
+@receiver(post_save, sender=Compound)
+def index_compound(sender, instance, using, **kwargs):
+    compound_index.index([instance.pk], using=using)
+    # اسم الكمبوند جزء من الـ index بتاع الوحدات
+    property_index.index(Property.objects.using(using).filter(compound=instance).values_list('id', flat=True), using=using)
+
+
+@receiver(post_save, sender=Property)
+def index_property(sender, instance, using, **kwargs):
+    property_index.index([instance.pk], using=using)
+
+
+@receiver(post_save, sender=Developer)
+def index_developer_compounds(sender, instance, using, **kwargs):
+    compound_index.index(Compound.objects.using(using).filter(developer=instance).values_list('id', flat=True), using=using)
+
+
+@receiver(post_save, sender=Location)
+def index_location_catalog(sender, instance, using, **kwargs):
+    compound_index.index(Compound.objects.using(using).filter(location=instance).values_list('id', flat=True), using=using)
+    property_index.index(Property.objects.using(using).filter(location=instance).values_list('id', flat=True), using=using)
+
+
+# الحذف بيعمل SET_NULL على الوحدات/الكمبوندات المرتبطة من غير signals،
+# فبنحفظ الـ ids قبل الحذف ونعيد فهرستها بعده
+@receiver(pre_delete, sender=Compound)
+def collect_compound_dependents(sender, instance, using, **kwargs):
+    instance._search_dependents = [
+        (property_index, list(Property.objects.using(using).filter(compound=instance).values_list('id', flat=True))),
+    ]
+
+
+@receiver(pre_delete, sender=Location)
+def collect_location_dependents(sender, instance, using, **kwargs):
+    instance._search_dependents = [
+        (compound_index, list(Compound.objects.using(using).filter(location=instance).values_list('id', flat=True))),
+        (property_index, list(Property.objects.using(using).filter(location=instance).values_list('id', flat=True))),
+    ]
+
+
+@receiver(post_delete, sender=Compound)
+@receiver(post_delete, sender=Property)
+@receiver(post_delete, sender=Location)
+def unindex_deleted(sender, instance, using, **kwargs):
+    if sender is Compound:
+        compound_index.remove([instance.pk], using=using)
+    elif sender is Property:
+        property_index.remove([instance.pk], using=using)
+    for index, ids in getattr(instance, '_search_dependents', []):
+        index.index(ids, using=using)
+
+
+# ==========================================
+#  Related compounds (related.py)
+# ==========================================
+def refresh_related(pk=None, locations=(), developers=(), ids=(), using='default'):
+    # بعد الـ commit: بنحسب القوائم من الداتا النهائية، وبعدين نلغي كاش /related/
+    def refresh():
+        affected = set(ids) | related.affected_ids(pk, locations, developers, using=using)
+        if affected:
+            related.refresh(affected, using=using)
+            bump_version(RelatedCompound)
+    transaction.on_commit(refresh, using=using)
+
+
+@receiver(pre_save, sender=Compound)
+def snapshot_compound(sender, instance, using, raw, **kwargs):
+    instance._compound_snapshot = None
+    if instance.pk and not raw:
+        instance._compound_snapshot = (
+            Compound.objects.using(using).filter(pk=instance.pk).values(*related.TRACKED_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Compound)
+def refresh_related_on_save(sender, instance, using, raw, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_compound_snapshot', None) or {}
+    after = {field: getattr(instance, field) for field in related.TRACKED_FIELDS}
+    if before == after:
+        return
+    refresh_related(
+        instance.pk,
+        locations=[before.get('location_id'), after['location_id']],
+        developers=[before.get('developer_id'), after['developer_id']],
+        using=using,
+    )
+
+
+@receiver(post_delete, sender=Compound)
+def refresh_related_on_delete(sender, instance, using, **kwargs):
+    refresh_related(locations=[instance.location_id], developers=[instance.developer_id], using=using)
+
+
+# الـ location لما تتمسح الكمبوندات بتاعتها بتبقى NULL (SET_NULL) من غير signals
+@receiver(pre_delete, sender=Location)
+def collect_location_related(sender, instance, using, **kwargs):
+    instance._related_dependents = list(Compound.objects.using(using).filter(location=instance).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Location)
+def refresh_related_on_location_delete(sender, instance, using, **kwargs):
+    refresh_related(ids=getattr(instance, '_related_dependents', []), using=using)
+
+
+# ==========================================
+#  Slider histograms (histograms.py)
+# ==========================================
+@receiver(pre_save, sender=Compound)
+@receiver(pre_save, sender=Property)
+def snapshot_histogram_values(sender, instance, using, raw, **kwargs):
+    instance._histogram_snapshot = None
+    if instance.pk and not raw:
+        instance._histogram_snapshot = (
+            sender.objects.using(using).filter(pk=instance.pk).values(*histograms.row_fields(sender)).first()
+        )
+
+
+@receiver(post_save, sender=Compound)
+@receiver(post_save, sender=Property)
+def update_histograms_on_save(sender, instance, using, raw, update_fields, **kwargs):
+    if raw:
+        return
+    before = getattr(instance, '_histogram_snapshot', None)
+    after = histograms.row_of(instance)
+    if before and update_fields is not None:
+        # الحقول اللي مااتحفظتش فاضلة زي ما هي في الداتابيز
+        saved = {name for name in after if name in update_fields or name.removesuffix('_id') in update_fields}
+        after = {name: after[name] if name in saved else before[name] for name in after}
+    histograms.update(sender, before, after, using=using)
+
+
+@receiver(post_delete, sender=Compound)
+@receiver(post_delete, sender=Property)
+def update_histograms_on_delete(sender, instance, using, **kwargs):
+    histograms.update(sender, histograms.row_of(instance), None, using=using)
+
+
+# الوحدات/الكمبوندات بتبقى location/developer = NULL (SET_NULL) من غير signals
+@receiver(post_delete, sender=Location)
+@receiver(post_delete, sender=Developer)
+def drop_histogram_scope(sender, instance, using, **kwargs):
+    scope = 'location' if sender is Location else 'developer'
+    HistogramBucket.objects.using(using).filter(scope=scope, scope_id=instance.pk).delete()
+
+
+# ==========================================
+#  Image derivatives (images.py)
+# ==========================================
+@receiver(post_save)
+def schedule_image_derivatives(sender, instance, using, raw, **kwargs):
+    if raw:
+        return
+    for model, field_name in images.TARGETS:
+        if sender is model:
+            name = getattr(instance, field_name).name
+            if name and not images.is_current(name, getattr(instance, images.variants_field(field_name))):
+                images.schedule(model, instance.pk, field_name, using=using)
+
+
+# ==========================================
+#  Bulk imports (bulk.py) - bulk_create من غير post_save
+# ==========================================
+@receiver(bulk_upserted)
+def sync_bulk_upserted(sender, pks, using, created=(), before=None, **kwargs):
+    if not pks:
+        return
+    if sender in CACHED_MODELS:
+        invalidate_public_cache(sender)
+
+    if sender in (Compound, Property):
+        # الصفوف الجديدة + القيم القديمة للي اتكتب فوقه (BatchUpserter)؛ الباقي متغيرش
+        histograms.apply_batch(sender, created, before or {}, using=using)
+
+    if sender is Compound:
+        compound_index.index(pks, using=using)
+        property_index.index(Property.objects.using(using).filter(compound_id__in=pks).values_list('id', flat=True), using=using)
+        # الجيران حسب القيم الحالية؛ لو كمبوند موجود اتنقل لمكان/مطور تاني
+        # القوائم القديمة بتتصلح بـ rebuild_related_compounds
+        rows = list(Compound.objects.using(using).filter(pk__in=pks).values_list('location_id', 'developer_id'))
+        refresh_related(ids=pks, locations=[row[0] for row in rows], developers=[row[1] for row in rows], using=using)
+    elif sender is Property:
+        property_index.index(pks, using=using)
+    elif sender is Developer:
+        compound_index.index(Compound.objects.using(using).filter(developer_id__in=pks).values_list('id', flat=True), using=using)
+    elif sender is Location:
+        compound_index.index(Compound.objects.using(using).filter(location_id__in=pks).values_list('id', flat=True), using=using)
+        property_index.index(Property.objects.using(using).filter(location_id__in=pks).values_list('id', flat=True), using=using)
+
+    for model, field_name in images.TARGETS:
+        if sender is model:
+            column = images.variants_field(field_name)
+            for pk, name, variants in sender.objects.using(using).filter(pk__in=pks).values_list('pk', field_name, column):
+                if name and not images.is_current(name, variants):
+                    images.schedule(model, pk, field_name, using=using)
+
+
+# ==========================================
+#  Developer.projects_count
+# ==========================================
+def change_projects_count(developer_id, delta, using):
+    if developer_id is not None:
+        # Greatest: عداد قديم غلط (0) ميوقعش الـ delete بسبب الـ CHECK constraint
+        Developer.objects.using(using).filter(pk=developer_id).update(projects_count=Greatest(F('projects_count') + delta, 0))
+        invalidate_public_cache(Developer)
+
+
+@receiver(post_save, sender=Compound)
+def count_project_on_save(sender, instance, created, using, raw, **kwargs):
+    if raw:
+        return  # loaddata: العدادات جاية مع الـ fixture (أو rebuild_project_counts)
+    # الـ snapshot من snapshot_compound (pre_save) فيه الـ developer القديم
+    before = getattr(instance, '_compound_snapshot', None) or {}
+    if created:
+        change_projects_count(instance.developer_id, 1, using)
+    elif before and before['developer_id'] != instance.developer_id:
+        change_projects_count(before['developer_id'], -1, using)
+        change_projects_count(instance.developer_id, 1, using)
+
+
+@receiver(post_delete, sender=Compound)
+def count_project_on_delete(sender, instance, using, **kwargs):
+    change_projects_count(instance.developer_id, -1, using)
+
+
+@receiver(bulk_upserted, sender=Compound)
+def count_bulk_projects(sender, pks, using, before=None, **kwargs):
+    # المطورين الحاليين + القدام بتوع الكمبوندات اللي اتنقلت (before من BatchUpserter)
+    developers = set(Compound.objects.using(using).filter(pk__in=pks).values_list('developer_id', flat=True))
+    developers |= {values['developer_id'] for values in (before or {}).values() if values.get('developer_id') is not None}
+    Developer.objects.using(using).filter(pk__in=developers).recount_projects()
+    invalidate_public_cache(Developer)
@@ -0,0 +1,192 @@
+"""
+Contact form pipeline (``contact_queue.py``): the 202 ``create`` path only
+enqueues, and ``process_contact_queue`` stores the submissions and delivers
+the notifications to a local SMTP stand-in (aiosmtpd), retrying or giving up
+as configured.
+"""
+import shutil
+import socket
+import tempfile
+from datetime import timedelta
+from email import message_from_bytes
+from io import StringIO
+from pathlib import Path
+
+from aiosmtpd.controller import Controller
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from realestate.contact_queue import get_queue
+from realestate.models import ContactFormSubmission
+
+FORM = {'name': 'Mona Adel', 'email': 'mona@example.com', 'phone': '+201001234567', 'message': 'Call me about Mivida.'}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Inbox:
+    """aiosmtpd handler that keeps the delivered messages (or rejects them while ``reject`` is set)."""
+
+    def __init__(self):
+        self.messages = []
+        self.reject = False
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.reject:
+            return '451 Try again later'
+        self.messages.append((envelope.rcpt_tos, message_from_bytes(envelope.content)))
+        return '250 Message accepted for delivery'
+
+
+class ContactQueueTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.inbox = Inbox()
+        controller = Controller(cls.inbox, hostname='127.0.0.1', port=free_port())
+        controller.start()
+        cls.addClassCleanup(controller.stop)
+        cls.smtp_port = controller.port
+
+    def setUp(self):
+        self.inbox.messages.clear()
+        self.inbox.reject = False
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings_override = override_settings(
+            CONTACT_QUEUE={
+                **settings.CONTACT_QUEUE,
+                'PATH': str(Path(directory) / 'contact.sqlite3'),
+                'GROUP_COMMIT_WAIT': 0,
+                'NOTIFY_EMAILS': ['sales@example.com'],
+                'MAX_ATTEMPTS': 3,
+                'RETRY_DELAY': 60,
+            },
+            # الـ test runner بيحط locmem؛ هنا الإيميل رايح فعلاً للـ SMTP المحلي
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.smtp_port,
+            EMAIL_HOST_USER='',
+            EMAIL_HOST_PASSWORD='',
+            EMAIL_USE_TLS=False,
+            THROTTLE={**settings.THROTTLE, 'SCOPES': {
+                **settings.THROTTLE['SCOPES'], 'contact': {'rate': '1000/min', 'burst': 1000},
+            }},
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def submit(self, data=FORM):
+        return self.client.post('/api/public/contact-submissions/', data, content_type='application/json')
+
+    def process(self):
+        out = StringIO()
+        call_command('process_contact_queue', '--once', stdout=out)
+        return out.getvalue()
+
+    # ---------- request ----------
+    def test_create_enqueues_and_answers_202(self):
+        response = self.submit()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'queued')
+        self.assertEqual(len(get_queue()), 1)
+        self.assertFalse(ContactFormSubmission.objects.exists())       # stored by the worker, not the request
+        self.assertEqual(self.inbox.messages, [])
+
+    def test_invalid_form_is_not_queued(self):
+        response = self.submit({**FORM, 'email': 'not an email'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(get_queue()), 0)
+
+    # ---------- worker ----------
+    def test_worker_stores_and_delivers(self):
+        reference = self.submit().json()['reference']
+
+        output = self.process()
+
+        submission = ContactFormSubmission.objects.get()
+        self.assertEqual(str(submission.reference), reference)
+        self.assertEqual((submission.name, submission.email, submission.message), (FORM['name'], FORM['email'], FORM['message']))
+        self.assertEqual(submission.notification_status, 'sent')
+        self.assertEqual(submission.notification_attempts, 1)
+        self.assertIsNotNone(submission.notified_at)
+        self.assertEqual(len(get_queue()), 0)
+        self.assertIn('stored 1, notified 1, failed 0', output)
+
+        [(recipients, message)] = self.inbox.messages
+        self.assertEqual(recipients, ['sales@example.com'])
+        self.assertEqual(message['Subject'], f"New contact form submission from {FORM['name']}")
+        self.assertEqual(message['Reply-To'], FORM['email'])
+        self.assertIn(FORM['message'], message.get_payload(decode=True).decode())
+
+    def test_a_rejected_send_is_retried_after_the_delay(self):
+        self.submit()
+        self.inbox.reject = True
+        before = timezone.now()
+
+        self.process()
+
+        submission = ContactFormSubmission.objects.get()
+        self.assertEqual(submission.notification_status, 'pending')
+        self.assertEqual(submission.notification_attempts, 1)
+        self.assertIn('451', submission.notification_error)
+        self.assertGreaterEqual(submission.notify_after, before + timedelta(seconds=60))
+
+        # مش مستحقة لسه: مفيش محاولة تانية
+        self.inbox.reject = False
+        self.process()
+        submission.refresh_from_db()
+        self.assertEqual(submission.notification_attempts, 1)
+        self.assertEqual(self.inbox.messages, [])
+
+        ContactFormSubmission.objects.update(notify_after=timezone.now() - timedelta(seconds=1))
+        self.process()
+        submission.refresh_from_db()
+        self.assertEqual(submission.notification_status, 'sent')
+        self.assertEqual(submission.notification_attempts, 2)
+        self.assertEqual(submission.notification_error, '')
+        self.assertEqual(len(self.inbox.messages), 1)
+
+    def test_backoff_doubles_and_gives_up_after_max_attempts(self):
+        self.submit()
+        self.inbox.reject = True
+
+        delays = []
+        for _ in range(3):
+            ContactFormSubmission.objects.update(notify_after=None)     # due now
+            started = timezone.now()
+            self.process()
+            submission = ContactFormSubmission.objects.get()
+            if submission.notification_status == 'pending':
+                delays.append(round((submission.notify_after - started).total_seconds()))
+
+        self.assertEqual(delays, [60, 120])         # RETRY_DELAY * 2**(attempts - 1)
+        self.assertEqual(submission.notification_status, 'failed')
+        self.assertEqual(submission.notification_attempts, 3)
+        self.assertEqual(self.inbox.messages, [])
+
+        ContactFormSubmission.objects.update(notify_after=None)
+        self.process()      # failed: no more attempts
+        submission.refresh_from_db()
+        self.assertEqual(submission.notification_attempts, 3)
+
+    def test_smtp_down_defers_the_whole_batch(self):
+        self.submit()
+        self.submit({**FORM, 'name': 'Omar'})
+
+        with override_settings(EMAIL_PORT=free_port()):
+            output = self.process()
+
+        self.assertIn('stored 2, notified 0, failed 2', output)
+        for submission in ContactFormSubmission.objects.all():
+            self.assertEqual(submission.notification_status, 'pending')
+            self.assertEqual(submission.notification_attempts, 1)
+            self.assertIsNotNone(submission.notify_after)
@@ -0,0 +1,51 @@
+"""
+Homepage endpoint (``homepage.py``): the cached page follows changes to every
+model its sections serialize.
+"""
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from realestate.models import Compound, Developer, Location
+
+URL = '/api/public/homepage/'
+
+
+@override_settings(PUBLIC_API_CACHE_ALIAS='default')
+class HomepageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.developer = Developer.objects.create(name='Sodic')
+        cls.location = Location.objects.create(name='New Zayed')
+        Compound.objects.create(name='Vye', developer=cls.developer, location=cls.location, is_featured=True)
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def get_compound(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        return response, response.json()['featured_compounds'][0]
+
+    def test_renamed_location_gives_a_fresh_page(self):
+        response, _ = self.get_compound()
+        self.assertEqual(self.client.get(URL)['X-Cache'], 'HIT')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.location.name = 'Sheikh Zayed'
+            self.location.save()
+
+        fresh, compound = self.get_compound()
+        self.assertEqual(fresh['X-Cache'], 'MISS')
+        self.assertNotEqual(fresh['ETag'], response['ETag'])
+        self.assertIn('Sheikh Zayed', str(compound['location']))
+
+    def test_renamed_developer_gives_a_fresh_page(self):
+        self.get_compound()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.developer.name = 'SODIC'
+            self.developer.save()
+
+        fresh, compound = self.get_compound()
+        self.assertEqual(fresh['X-Cache'], 'MISS')
+        self.assertIn('SODIC', str(compound['developer']))
@@ -0,0 +1,48 @@
+"""
+Request instrumentation (``instrumentation.py``): serializer timing is
+scoped to the instrumented views and sampled requests.
+"""
+import re
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from rest_framework.serializers import BaseSerializer
+
+from realestate.instrumentation import timed_serializer
+from realestate.models import Developer
+from realestate.serializers import DeveloperSerializer
+
+
+def timings(response):
+    return {name: float(duration) for name, duration in re.findall(r'(\w+);dur=([\d.]+)', response['Server-Timing'])}
+
+
+# cache hit = مفيش serializer؛ الـ locmem بيتمسح قبل كل test
+@override_settings(INSTRUMENTATION={'SAMPLE_RATE': 1.0, 'LOG': False}, PUBLIC_API_CACHE_ALIAS='default')
+class SerializerTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Developer.objects.create(name='Sodic', slug='sodic')
+
+    def setUp(self):
+        caches['default'].clear()
+
+    def test_public_viewset_reports_serializer_time(self):
+        response = self.client.get('/api/public/developers/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertGreater(timings(response)['serializer'], 0)
+
+    def test_serializer_classes_are_not_patched(self):
+        original = BaseSerializer.__dict__['data']
+        self.client.get('/api/public/developers/')
+
+        self.assertIs(BaseSerializer.__dict__['data'], original)
+        self.assertNotIn('data', DeveloperSerializer.__dict__)
+
+    def test_timed_serializer_outside_a_sampled_request(self):
+        serializer = DeveloperSerializer(Developer.objects.get())
+
+        self.assertIs(type(timed_serializer(serializer)), DeveloperSerializer)
+        self.assertEqual(serializer.data['slug'], 'sodic')
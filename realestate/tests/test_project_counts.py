@@ -0,0 +1,45 @@
+"""
+``Developer.projects_count`` (``signals.py``): kept in step with single
+saves/deletes and with bulk upserts that move compounds between developers.
+"""
+from django.test import TestCase
+
+from realestate.bulk import BatchUpserter
+from realestate.models import Compound, Developer
+
+
+class ProjectCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.old = Developer.objects.create(name='Sodic')
+        cls.new = Developer.objects.create(name='Emaar Misr')
+        for name in ('Vye', 'Villette', 'Eastown'):
+            Compound.objects.create(name=name, developer=cls.old)
+
+    def counts(self):
+        return dict(Developer.objects.values_list('name', 'projects_count'))
+
+    def test_save_and_delete(self):
+        self.assertEqual(self.counts(), {'Sodic': 3, 'Emaar Misr': 0})
+
+        compound = Compound.objects.get(name='Vye')
+        compound.developer = self.new
+        compound.save()
+        self.assertEqual(self.counts(), {'Sodic': 2, 'Emaar Misr': 1})
+
+        compound.delete()
+        self.assertEqual(self.counts(), {'Sodic': 2, 'Emaar Misr': 0})
+
+    def test_bulk_move_recounts_the_old_developer(self):
+        with BatchUpserter(Compound, key='slug', update_fields=['developer']) as compounds:
+            for slug in ('vye', 'villette'):
+                compounds.add(Compound(name=slug.title(), slug=slug, developer=self.new))
+
+        self.assertEqual(self.counts(), {'Sodic': 1, 'Emaar Misr': 2})
+
+    def test_delete_with_a_stale_zero_count(self):
+        Developer.objects.filter(pk=self.old.pk).update(projects_count=0)
+
+        Compound.objects.get(name='Vye').delete()
+
+        self.assertEqual(self.counts()['Sodic'], 0)
@@ -0,0 +1,149 @@
+"""
+Offline runs of the scraping engine and the ``scrape_*`` commands against
+saved pages (``fixtures/nawy``) served by ``http.server``, the same way
+``--base-url`` is used to crawl a local copy of the site.
+"""
+import functools
+import shutil
+import tempfile
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from realestate import scraping
+from realestate.models import Developer, Property
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures' / 'nawy'
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class SavedSiteMixin:
+    """Serve ``fixtures/nawy`` on a free local port for the whole test class."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(FIXTURES)))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        cls.addClassCleanup(server.server_close)
+        cls.addClassCleanup(server.shutdown)
+        cls.base_url = f'http://127.0.0.1:{server.server_port}'
+
+        # اللوجوهات المتحملة بتتكتب في media مؤقت
+        media_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        cls.addClassCleanup(settings_override.disable)
+
+    def scrape(self, command, *args):
+        out = StringIO()
+        call_command(command, '--base-url', self.base_url, '--timeout', '5', *args, stdout=out)
+        return out.getvalue()
+
+
+class ScraperTests(SavedSiteMixin, SimpleTestCase):
+    def test_fetch_pages_keeps_order_and_reports_failures(self):
+        with scraping.Scraper(self.base_url, concurrency=2, timeout=5) as scraper:
+            pages = scraper.fetch_pages(['/developer/', '/property/77-chalet-in-sahel', '/search?page=1'])
+
+        self.assertTrue(pages[0].ok)
+        self.assertIn('Developers', pages[0].text)
+        self.assertIsNone(pages[1])
+        self.assertIn('search', pages[2].url)
+        self.assertEqual(len(scraper.errors), 1)
+        self.assertIn('77-chalet-in-sahel: HTTP 404', scraper.errors[0])
+
+    def test_links_are_absolute_and_deduplicated(self):
+        with scraping.Scraper(self.base_url, timeout=5) as scraper:
+            page = scraper.fetch_page('/developer/')
+
+        links = page.links(r'/developer/\d+-')
+        self.assertEqual([url for url, _ in links], [
+            f'{self.base_url}/developer/8-sodic',
+            f'{self.base_url}/developer/12-emaar-misr',
+            f'{self.base_url}/developer/31-palm-hills',
+            f'{self.base_url}/developer/40-hyde-park',
+        ])
+
+    def test_next_data_and_first_number(self):
+        with scraping.Scraper(self.base_url, timeout=5) as scraper:
+            compound, search = scraper.fetch_pages(['/compound/101-mivida', '/search'])
+
+        data = compound.next_data
+        self.assertEqual(data['page'], '/compound/[slug]')
+        self.assertEqual(scraping.first_number(data, ('min_price',)), 5200000)
+        self.assertIsNone(scraping.first_number(data, ('max_price',)))
+        self.assertEqual(search.next_data, {})
+
+    def test_fetch_files(self):
+        with scraping.Scraper(self.base_url, timeout=5) as scraper:
+            sodic, missing = scraper.fetch_files(['/logos/sodic.png', '/logos/palm-hills.png'])
+
+        self.assertEqual(sodic, (FIXTURES / 'logos' / 'sodic.png').read_bytes())
+        self.assertIsNone(missing)
+
+
+class ScrapeDevelopersTests(SavedSiteMixin, TestCase):
+    def test_developers_are_upserted_with_their_logos(self):
+        output = self.scrape('scrape_developers')
+
+        developers = {developer.slug: developer for developer in Developer.objects.all()}
+        # Hyde Park has no logo on the page and is skipped
+        self.assertEqual(sorted(developers), ['emaar-misr', 'palm-hills', 'sodic'])
+        self.assertEqual(developers['sodic'].name, 'Sodic')
+        self.assertEqual(developers['emaar-misr'].name, 'Emaar Misr')     # from the link, the alt is empty
+
+        self.assertEqual(developers['sodic'].logo.name, 'developers/logos/sodic.png')
+        with default_storage.open(developers['sodic'].logo.name, 'rb') as logo:
+            self.assertEqual(logo.read(), (FIXTURES / 'logos' / 'sodic.png').read_bytes())
+        self.assertTrue(default_storage.exists(developers['emaar-misr'].logo.name))     # data-src
+        self.assertFalse(developers['palm-hills'].logo)                                 # 404: saved without one
+        self.assertIn('3 created, 0 existing', output)
+
+    def test_second_run_adds_nothing(self):
+        self.scrape('scrape_developers')
+        output = self.scrape('scrape_developers')
+
+        self.assertEqual(Developer.objects.count(), 3)
+        self.assertIn('العدد 0', output)
+
+
+class ScrapeNawyTests(SavedSiteMixin, TestCase):
+    def test_properties_are_upserted_from_the_detail_pages(self):
+        output = self.scrape('scrape_nawy')
+
+        properties = {unit.slug: unit for unit in Property.objects.all()}
+        self.assertEqual(sorted(properties), ['chalet-in-sahel', 'mivida-apartment', 'villa-in-new-zayed'])
+
+        mivida = properties['mivida-apartment']
+        self.assertEqual(mivida.title, 'Mivida Apartment')
+        self.assertEqual((mivida.price, mivida.area, mivida.bedrooms, mivida.bathrooms), (5200000, 120, 2, 2))
+        self.assertEqual(mivida.description, f'Unit from Nawy. Link: {self.base_url}/compound/101-mivida')
+
+        villa = properties['villa-in-new-zayed']
+        self.assertEqual((villa.price, villa.area, villa.bedrooms, villa.bathrooms), (12750000, 310, 4, 3))
+
+        # no detail page: estimated numbers
+        chalet = properties['chalet-in-sahel']
+        self.assertTrue(1000000 <= chalet.price <= 5000000)
+        self.assertTrue(100 <= chalet.area <= 300)
+        self.assertIn('77-chalet-in-sahel: HTTP 404', output)
+        self.assertIn('Successfully saved 3 properties (0 already existed)', output)
+
+    def test_second_run_keeps_existing_rows(self):
+        self.scrape('scrape_nawy')
+        before = dict(Property.objects.values_list('slug', 'price'))
+        output = self.scrape('scrape_nawy', '--pages', '2')
+
+        self.assertEqual(dict(Property.objects.values_list('slug', 'price')), before)
+        self.assertIn('Successfully saved 0 properties (3 already existed)', output)
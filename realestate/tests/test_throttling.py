@@ -0,0 +1,42 @@
+"""
+Throttle bucket table (``throttling.py``): the default file belongs to one
+project and database, and test runs never share buckets with anything else.
+"""
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.db import connections
+from django.test import SimpleTestCase
+
+from realestate import throttling
+
+
+class DefaultPathTests(SimpleTestCase):
+    def test_in_memory_database_keeps_buckets_in_the_process(self):
+        self.assertIsNone(throttling.default_path())
+
+        table = throttling.BucketTable(None, 512)
+        self.assertIsNone(table.fd)
+        self.assertEqual(table.take('contact:10.0.0.1', rate=1, burst=1), (True, 0.0))
+
+    def test_file_is_per_database(self):
+        connection = connections['default']
+        paths = []
+        for name in ('/srv/fourseasons/db.sqlite3', '/srv/staging/db.sqlite3'):
+            with mock.patch.object(connection, 'is_in_memory_db', return_value=False), \
+                    mock.patch.dict(connection.settings_dict, NAME=name):
+                paths.append(throttling.default_path())
+
+        self.assertNotEqual(paths[0], paths[1])
+        self.assertNotEqual(Path(paths[0]).name, 'fourseasons-throttle.bin')
+
+    def test_tables_on_the_same_file_share_buckets(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = str(Path(directory) / 'throttle.bin')
+
+        first, second = throttling.BucketTable(path, 512), throttling.BucketTable(path, 512)
+        self.assertTrue(first.take('search:10.0.0.1', rate=1, burst=1)[0])
+        self.assertFalse(second.take('search:10.0.0.1', rate=1, burst=1)[0])
@@ -0,0 +1,193 @@
+"""
+Token bucket throttles for the public API, shared by every gunicorn worker.
+
+DRF's built-in throttles keep a list of timestamps per client in the cache
+backend: a cache read and write on every request. Here each client/scope
+pair is one 24-byte bucket (key hash, tokens, last refill) in a memory-mapped
+file, so a check is a hash, a short ``fcntl`` byte-range lock and a few
+``struct.unpack_from`` calls - no syscall beyond the lock, no network.
+
+Budgets are per scope (``settings.THROTTLE['SCOPES']``): a bucket holds up
+to ``burst`` tokens and refills at ``rate``; a request spends one token or
+gets a 429 with ``Retry-After``.
+
+* ``PublicReadThrottle`` - every public GET that reaches the view (cache
+  hits and 304s are answered before DRF and cost nothing, so they are not
+  counted),
+* ``SearchThrottle`` - public requests with ``?search=``,
+* ``ContactThrottle`` - contact form posts.
+
+The file is a fixed table (``SLOTS`` buckets in groups of 8). A key lives in
+the group its hash points to; when the group is full the least recently
+used bucket is recycled, which only ever gives a client a fresh (full)
+bucket. Where ``fcntl`` is not available (Windows) the table is an ordinary
+per-process buffer.
+
+The file is ``settings.THROTTLE['PATH']``; by default one per project and
+database (``fourseasons-throttle-<hash>.bin`` under ``/dev/shm`` when
+available), so other checkouts and sites on the host don't share budgets.
+With an in-memory database (test runs) the table is a per-process buffer and
+every run starts with full buckets.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.throttling import BaseThrottle
+
+try:
+    import fcntl
+except ImportError:         # Windows: buckets per process
+    fcntl = None
+
+DEFAULTS = {
+    'PATH': None,           # default_path()
+    'SLOTS': 65536,
+    'SCOPES': {},
+}
+SLOT = struct.Struct('<Qdd')        # key hash, tokens, last refill (time.time())
+GROUP = 8                           # slots probed per key
+STRIPES = 64                        # lock granularity
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'THROTTLE', {})}
+
+
+def default_path():
+    """Bucket file for this project and database; None (per-process buffer) for an in-memory database."""
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+        return None
+    project = hashlib.blake2b(f"{settings.BASE_DIR}:{connection.settings_dict['NAME']}".encode(), digest_size=6)
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else str(settings.BASE_DIR / 'cache')
+    return os.path.join(directory, f'fourseasons-throttle-{project.hexdigest()}.bin')
+
+
+def parse_rate(rate):
+    """'60/min' -> tokens per second (same format as DRF's rates)."""
+    num, period = rate.split('/')
+    return int(num) / PERIODS[period[0]]
+
+
+class BucketTable:
+    def __init__(self, path, slots):
+        self.groups = max(slots // GROUP, STRIPES)
+        self.size = self.groups * GROUP * SLOT.size
+        self.locks = [threading.Lock() for _ in range(STRIPES)]
+        if fcntl is None or path is None:
+            self.fd = None
+            self.buffer = bytearray(self.size)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < self.size:
+            os.ftruncate(self.fd, self.size)
+        self.buffer = mmap.mmap(self.fd, self.size)
+
+    def take(self, key, rate, burst, cost=1):
+        """Spend ``cost`` tokens from ``key``'s bucket; returns (allowed, seconds until allowed)."""
+        digest = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+        group = digest % self.groups
+        stripe = group % STRIPES
+        base = group * GROUP * SLOT.size
+        buffer = self.buffer
+
+        # lock الـ thread جوه الـ process، و fcntl بين الـ workers (الـ fcntl locks بتاعة الـ process كله)
+        with self.locks[stripe]:
+            if self.fd is not None:
+                fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                now = time.time()
+                offset, tokens, updated = None, burst, now
+                victim, victim_updated = base, None
+                for index in range(GROUP):
+                    slot = base + index * SLOT.size
+                    slot_key, slot_tokens, slot_updated = SLOT.unpack_from(buffer, slot)
+                    if slot_key == digest:
+                        offset, tokens, updated = slot, slot_tokens, slot_updated
+                        break
+                    if victim_updated is None or slot_updated < victim_updated:
+                        victim, victim_updated = slot, slot_updated     # فاضي (0) أو الأقدم
+                if offset is None:
+                    offset = victim
+
+                tokens = min(burst, tokens + max(now - updated, 0) * rate)
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                SLOT.pack_into(buffer, offset, digest, tokens, now)
+            finally:
+                if self.fd is not None:
+                    fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, stripe)
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+
+_table = None
+_table_pid = None
+_table_lock = threading.Lock()
+
+
+def get_table():
+    global _table, _table_pid
+    # بعد الـ fork (gunicorn --preload) كل worker يفتح الملف بنفسه
+    if _table is None or _table_pid != os.getpid():
+        with _table_lock:
+            if _table is None or _table_pid != os.getpid():
+                config = get_config()
+                path = config['PATH'] or default_path()
+                _table, _table_pid = BucketTable(path, config['SLOTS']), os.getpid()
+    return _table
+
+
+def take(scope, key):
+    """Spend a token of ``scope`` for ``key``: (allowed, seconds to wait). Unknown scopes are not limited."""
+    budget = get_config()['SCOPES'].get(scope)
+    if budget is None:
+        return True, 0.0
+    rate = parse_rate(budget['rate'])
+    return get_table().take(f'{scope}:{key}', rate, budget.get('burst', max(rate, 1)))
+
+
+class TokenBucketThrottle(BaseThrottle):
+    scope = None
+
+    def get_scope(self, request, view):
+        """The scope that applies to this request, or None to skip it."""
+        return self.scope
+
+    def get_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        allowed, self.retry_after = take(scope, self.get_key(request))
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+
+class PublicReadThrottle(TokenBucketThrottle):
+    scope = 'public'
+
+
+class SearchThrottle(TokenBucketThrottle):
+    scope = 'search'
+
+    def get_scope(self, request, view):
+        return self.scope if request.query_params.get('search') else None
+
+
+class ContactThrottle(TokenBucketThrottle):
+    scope = 'contact'
@@ -10,11 +10,12 @@ from .views import (
     PublicCompoundViewSet, PublicDeveloperViewSet, PublicLocationViewSet,
     PublicPropertyViewSet, PublicBlogPostViewSet, PublicAuthorViewSet,
     PublicAmenityViewSet, PublicTestimonialViewSet, PublicPartnerViewSet,
-    PublicContactFormSubmissionViewSet,
+    PublicContactFormSubmissionViewSet, PublicHomepageView,
 
     # 3. Auth & Utils
     CustomAuthToken, CurrentUserView, image_upload_view
 )
+from .async_views import CompoundPageView, PropertyPageView
 
 router = DefaultRouter()
 
@@ -49,6 +50,12 @@ router.register(r'public/partners', PublicPartnerViewSet, basename='public-partn
 router.register(r'public/contact-submissions', PublicContactFormSubmissionViewSet, basename='public-contact-submission')
 
 urlpatterns = [
+    path('public/homepage/', PublicHomepageView.as_view(), name='public-homepage'),
+
+    # صفحات التفاصيل async (async_views.py): الكائن + الكروت اللي جنبه في request واحد
+    path('public/compounds/<int:pk>/page/', CompoundPageView.as_view(), name='public-compound-page'),
+    path('public/properties/<int:pk>/page/', PropertyPageView.as_view(), name='public-property-page'),
+
     path('', include(router.urls)),
     
     # 👇👇 (1) رابط تسجيل الدخول
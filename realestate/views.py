@@ -1,10 +1,11 @@
+import math
+
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.core.files.storage import default_storage
 from django.contrib.auth.models import User 
-from django.core.mail import send_mail
 from django.conf import settings
-from rest_framework import viewsets, mixins , permissions
+from rest_framework import viewsets, mixins , permissions, status
 from rest_framework.views import APIView                  # <--- (1) هام
 from rest_framework.permissions import IsAuthenticated    # <--- (2) هام
 from rest_framework.authtoken.views import ObtainAuthToken
@@ -13,19 +14,32 @@ from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters as drf_filters 
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 
 from .models import (
     Compound, Developer, Location, Property, PropertyImage,
     BlogPost, Author, Amenity, ContactFormSubmission,
-    Testimonial, Partner
+    Testimonial, Partner, CompoundImage, RelatedCompound
 )
 from .serializers import (
     CompoundSerializer, DeveloperSerializer, LocationSerializer, 
-    PropertySerializer, PropertyImageSerializer, BlogPostSerializer, 
+    PropertySerializer, PropertyListFastSerializer, PropertyImageSerializer, BlogPostSerializer, 
     AuthorSerializer, AmenitySerializer, ContactFormSubmissionSerializer,
     TestimonialSerializer, PartnerSerializer, UserSerializer
 )
-from .filters import CompoundFilter 
+from .filters import CompoundFilter, FullTextSearchFilter, RankedOrderingFilter
+from .cache import CachedResponseMixin
+from .contact_queue import enqueue_submission
+from .export import ExportMixin
+from .facets import FacetedListMixin, compound_facets, property_facets
+from .fieldsets import SparseFieldsetMixin
+from .geo import GeoSearchMixin
+from .histograms import HistogramMixin
+from .homepage import build_homepage
+from .instrumentation import SerializerTimingMixin
+from .pagination import CatalogPagination
+from .replicas import ReplicaReadMixin
+from .throttling import ContactThrottle, PublicReadThrottle, SearchThrottle
 
 # ==========================================
 #  0. Authentication Views (Login & Current User)
@@ -61,45 +75,41 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
-class CompoundViewSet(viewsets.ModelViewSet):
-    queryset = Compound.objects.all()
+class CompoundViewSet(ExportMixin, viewsets.ModelViewSet):
+    queryset = Compound.objects.select_related('developer', 'location').prefetch_related('amenities', 'images')
     serializer_class = CompoundSerializer
-    filter_backends = [DjangoFilterBackend, drf_filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, RankedOrderingFilter]
     filterset_class = CompoundFilter
     ordering_fields = ['min_price', 'delivery_date', 'id']
     ordering = ['-id']
-@action(detail=True, methods=['get'])
-def related(self, request, pk=None):
-        current_compound = self.get_object()
-        related = Compound.objects.filter(
-            location=current_compound.location
-        ).exclude(id=current_compound.id)
-
-        if current_compound.min_price:
-            min_range = current_compound.min_price * 0.8
-            max_range = current_compound.min_price * 1.2
-            related = related.filter(
-                min_price__gte=min_range, 
-                min_price__lte=max_range
-            ) | related.filter(min_price__isnull=True)
-
-        related = related.distinct()[:4]
-        serializer = self.get_serializer(related, many=True)
-        return Response(serializer.data)
+    export_name = 'compounds'
+    export_fields = {
+        'id': 'id', 'name': 'name', 'slug': 'slug',
+        'developer_id': 'developer_id', 'developer': 'developer__name',
+        'location_id': 'location_id', 'location': 'location__name',
+        'status': 'status', 'min_price': 'min_price', 'min_area': 'min_area',
+        'max_installment_years': 'max_installment_years', 'delivery_date': 'delivery_date',
+        'is_new_launch': 'is_new_launch', 'is_featured': 'is_featured',
+        'main_image': 'main_image', 'video_url': 'video_url', 'description': 'description',
+        'updated_at': 'updated_at',
+    }
 class DeveloperViewSet(viewsets.ModelViewSet):
     queryset = Developer.objects.all()
     serializer_class = DeveloperSerializer
-    filter_backends = [drf_filters.SearchFilter]
+    filter_backends = [drf_filters.SearchFilter, DjangoFilterBackend, drf_filters.OrderingFilter]
     search_fields = ['name']
+    # projects_count عمود في الجدول (بيتحدث من signals.py) فالترتيب والفلترة من غير queries زيادة
+    filterset_fields = {'projects_count': ['exact', 'gte', 'lte']}
+    ordering_fields = ['name', 'projects_count', 'id']
 
 class LocationViewSet(viewsets.ModelViewSet):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
 
-class PropertyViewSet(viewsets.ModelViewSet):
-    queryset = Property.objects.all()
+class PropertyViewSet(ExportMixin, viewsets.ModelViewSet):
+    queryset = Property.objects.select_related('compound', 'developer', 'location').prefetch_related('amenities', 'gallery_images')
     serializer_class = PropertySerializer
-    filter_backends = [DjangoFilterBackend, drf_filters.SearchFilter, drf_filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, RankedOrderingFilter]
     filterset_fields = {
         'location': ['exact'],
         'property_type': ['exact'],
@@ -111,6 +121,18 @@ class PropertyViewSet(viewsets.ModelViewSet):
         'is_new_launch': ['exact'],
     }
     search_fields = ['title', 'description', 'location__name', 'compound__name']
+    export_name = 'properties'
+    export_fields = {
+        'id': 'id', 'title': 'title', 'slug': 'slug',
+        'compound_id': 'compound_id', 'compound': 'compound__name',
+        'developer_id': 'developer_id', 'developer': 'developer__name',
+        'location_id': 'location_id', 'location': 'location__name',
+        'property_type': 'property_type', 'price': 'price', 'area': 'area',
+        'bedrooms': 'bedrooms', 'bathrooms': 'bathrooms',
+        'is_new_launch': 'is_new_launch', 'is_featured': 'is_featured',
+        'main_image': 'main_image', 'description': 'description',
+        'updated_at': 'updated_at',
+    }
 
 class PropertyImageViewSet(viewsets.ModelViewSet):
     queryset = PropertyImage.objects.all()
@@ -146,80 +168,140 @@ class PartnerViewSet(viewsets.ModelViewSet):
 #  2. Public ViewSets (Read Only & Submission)
 # ==========================================
 
-class PublicPropertyViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Property.objects.all()
+PUBLIC_THROTTLES = [PublicReadThrottle, SearchThrottle]
+
+class PublicPropertyViewSet(SerializerTimingMixin, ReplicaReadMixin, CachedResponseMixin, FacetedListMixin, GeoSearchMixin, HistogramMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = PropertyViewSet.queryset
     serializer_class = PropertySerializer
+    cache_models = (Property, Compound, Developer, Location, Amenity, PropertyImage)
+    throttle_classes = PUBLIC_THROTTLES
     filter_backends = PropertyViewSet.filter_backends
     filterset_fields = PropertyViewSet.filterset_fields
     search_fields = PropertyViewSet.search_fields
+    pagination_class = CatalogPagination
+    cursor_ordering_fields = ['price', 'area', 'id']
+    facet_set = property_facets
+    map_marker_fields = ('id', 'title', 'slug', 'latitude', 'longitude', 'price', 'property_type', 'bedrooms')
+    map_price_field = 'price'
+
+    # القائمة بتتبني من .values() مباشرة (نفس الـ JSON بالظبط بس أسرع)، بالأعمدة المطلوبة بس
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = PropertyListFastSerializer.columns_for(self.get_field_selection(), keep=self.cursor_ordering_fields)
+        rows = queryset.prefetch_related(None).values(*columns)
 
-class PublicCompoundViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Compound.objects.all()
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            serializer = PropertyListFastSerializer(page, context=self.get_serializer_context())
+            return self.get_paginated_response(serializer.data)
+
+        serializer = PropertyListFastSerializer(rows, context=self.get_serializer_context())
+        return Response(serializer.data)
+
+    def get_nearby_data(self, queryset):
+        columns = PropertyListFastSerializer.columns_for(self.get_field_selection())
+        rows = list(queryset.prefetch_related(None).values(*columns, 'distance_sq'))
+        data = PropertyListFastSerializer(rows, context=self.get_serializer_context()).data
+        for row, card in zip(rows, data):
+            card['distance_km'] = round(math.sqrt(row['distance_sq']), 3)
+        return data
+
+class PublicCompoundViewSet(SerializerTimingMixin, ReplicaReadMixin, CachedResponseMixin, FacetedListMixin, GeoSearchMixin, HistogramMixin, SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = CompoundViewSet.queryset
     serializer_class = CompoundSerializer
+    cache_models = (Compound, Developer, Location, Amenity, CompoundImage, RelatedCompound)
+    throttle_classes = PUBLIC_THROTTLES
     filter_backends = CompoundViewSet.filter_backends
     filterset_class = CompoundViewSet.filterset_class
     ordering_fields = CompoundViewSet.ordering_fields
     ordering = CompoundViewSet.ordering
+    pagination_class = CatalogPagination
+    cursor_ordering_fields = CompoundViewSet.ordering_fields
+    facet_set = compound_facets
+    map_marker_fields = ('id', 'name', 'slug', 'latitude', 'longitude', 'min_price', 'is_featured')
+    map_price_field = 'min_price'
     @action(detail=True, methods=['get'])
     def related(self, request, pk=None):
-        current_compound = self.get_object()
-        related = Compound.objects.filter(
-            location=current_compound.location
-        ).exclude(id=current_compound.id) # استبعاد المشروع الحالي
-        # 2. فلتر حسب السعر (اختياري: مثلاً في نطاق 20% زيادة أو نقصان)
-        if current_compound.min_price:
-            min_range = current_compound.min_price * 0.8  # أقل بـ 20%
-            max_range = current_compound.min_price * 1.2  # أزيد بـ 20%
-            
-            # هات المشروعات اللي سعرها في الرينج ده، أو المشروعات اللي سعرها مش محدد (عشان منخسرش داتا)
-            related = related.filter(
-                min_price__gte=min_range, 
-                min_price__lte=max_range
-            ) | related.filter(min_price__isnull=True)
-
-        # 3. خد أول 4 نتايج فقط عشان الصفحة متطولش
-        related = related.distinct()[:5]
-
+        # القايمة محسوبة مسبقاً في RelatedCompound (related.py) - lookup واحد بالـ index
+        try:
+            compound_id = int(pk)
+        except (TypeError, ValueError):
+            raise NotFound()
+        related = self.get_queryset().filter(linked_from__compound_id=compound_id).order_by('linked_from__rank')
         serializer = self.get_serializer(related, many=True)
+        if not serializer.data and not self.get_queryset().filter(pk=compound_id).exists():
+            raise NotFound()
         return Response(serializer.data)
 
-class PublicDeveloperViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicDeveloperViewSet(SerializerTimingMixin, ReplicaReadMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Developer.objects.all()
     serializer_class = DeveloperSerializer
+    cache_models = (Developer,)
+    throttle_classes = PUBLIC_THROTTLES
     filter_backends = DeveloperViewSet.filter_backends
     search_fields = DeveloperViewSet.search_fields
+    filterset_fields = DeveloperViewSet.filterset_fields
+    ordering_fields = DeveloperViewSet.ordering_fields
 
-class PublicLocationViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicLocationViewSet(SerializerTimingMixin, ReplicaReadMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
+    cache_models = (Location,)
+    throttle_classes = PUBLIC_THROTTLES
 
-class PublicBlogPostViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicBlogPostViewSet(SerializerTimingMixin, ReplicaReadMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = BlogPost.objects.filter(status='Published')
     serializer_class = BlogPostSerializer
+    cache_models = (BlogPost, Author)
+    throttle_classes = PUBLIC_THROTTLES
     filter_backends = BlogPostViewSet.filter_backends
     search_fields = BlogPostViewSet.search_fields
     filterset_fields = BlogPostViewSet.filterset_fields
 
-class PublicAuthorViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicAuthorViewSet(SerializerTimingMixin, ReplicaReadMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
+    cache_models = (Author,)
+    throttle_classes = PUBLIC_THROTTLES
 
-class PublicTestimonialViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicTestimonialViewSet(SerializerTimingMixin, ReplicaReadMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Testimonial.objects.all()
     serializer_class = TestimonialSerializer
+    cache_models = (Testimonial,)
+    throttle_classes = PUBLIC_THROTTLES
 
-class PublicPartnerViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicPartnerViewSet(SerializerTimingMixin, ReplicaReadMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Partner.objects.all()
     serializer_class = PartnerSerializer
+    cache_models = (Partner,)
+    throttle_classes = PUBLIC_THROTTLES
 
-class PublicAmenityViewSet(viewsets.ReadOnlyModelViewSet):
+class PublicAmenityViewSet(SerializerTimingMixin, ReplicaReadMixin, CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Amenity.objects.all()
     serializer_class = AmenitySerializer
+    cache_models = (Amenity,)
+    throttle_classes = PUBLIC_THROTTLES
+
+# كل أقسام الصفحة الرئيسية في request واحد (homepage.py)، متخزنة كوحدة واحدة
+class PublicHomepageView(ReplicaReadMixin, CachedResponseMixin, APIView):
+    cache_models = (Compound, Developer, Location, Partner, Testimonial, BlogPost, Author)
+    throttle_classes = PUBLIC_THROTTLES
+
+    def get(self, request):
+        return Response(build_homepage(request, CompoundViewSet.queryset))
 
 class PublicContactFormSubmissionViewSet(viewsets.GenericViewSet, mixins.CreateModelMixin):
     queryset = ContactFormSubmission.objects.all()
     serializer_class = ContactFormSubmissionSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [ContactThrottle]
+
+    # الطلب بيخلص أول ما الرسالة تتكتب في الطابور؛ الحفظ والإيميل في process_contact_queue
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reference = enqueue_submission(serializer.validated_data)
+        return Response({'reference': reference, 'status': 'queued'}, status=status.HTTP_202_ACCEPTED)
 # ==========================================
 #  3. Utilities
 # ==========================================